@@ -0,0 +1,67 @@
+"""
+Excel 写入吞吐基准
+比较 ExcelGenerator 常规模式（ws.cell 逐单元格，保存前保留全部单元格对象）与只写模式（ws.append）的行/秒，
+并用 tracemalloc 比较两种模式在不同记录数下的内存峰值（只写模式应基本不随记录数增长）
+
+常规模式在百万级记录时需要数 GB 内存，默认只用较少的记录数测量
+用法: python benchmarks/bench_excel_write.py [记录数，默认 1000000] [常规模式记录数，默认 200000]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic import generate_transactions
+from excel_generator import ExcelGenerator
+
+
+def write(transactions, file_path: str, write_only: bool):
+    generator = ExcelGenerator(write_only=write_only)
+    generator._create_workbook()
+    generator.add_transactions(transactions)
+    generator.save(file_path)
+
+
+def timed(label: str, transactions, file_path: str, write_only: bool):
+    gc.collect()
+    start = time.perf_counter()
+    write(transactions, file_path, write_only)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {len(transactions):>9} 条 {elapsed:>7.2f}s  {len(transactions) / elapsed:>10.0f} 行/秒  "
+          f"{os.path.getsize(file_path) / 1024 / 1024:.1f} MiB")
+
+
+def peak_memory(transactions, file_path: str, write_only: bool) -> float:
+    """写入过程中新分配内存的峰值（MiB，不含交易记录本身）"""
+    gc.collect()
+    tracemalloc.start()
+    write(transactions, file_path, write_only)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    standard_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    transactions = generate_transactions(max(count, standard_count))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "bench_随手记.xlsx")
+        print("=== Excel 写入吞吐 ===")
+        timed("只写模式", transactions[:count], file_path, True)
+        timed("只写模式", transactions[:standard_count], file_path, True)
+        timed("常规模式", transactions[:standard_count], file_path, False)
+
+        print("\n=== 写入内存峰值（tracemalloc） ===")
+        for size in (10_000, 100_000):
+            subset = transactions[:size]
+            write_only = peak_memory(subset, file_path, True)
+            standard = peak_memory(subset, file_path, False)
+            print(f"{size:>9} 条  只写模式 {write_only:>8.1f} MiB  常规模式 {standard:>8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
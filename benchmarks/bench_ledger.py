@@ -0,0 +1,57 @@
+"""
+本地交易账本基准
+合成多年的合并结果写入账本（ledger.py），测量首次写入与重复写入的耗时（重复写入后记录数不变、没有记录被更新），
+以及按季度 + 分类、按年 + 账户、全部按月汇总的查询耗时
+
+用法: python benchmarks/bench_ledger.py [记录数，默认 1000000]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from synthetic import generate_transactions
+from ledger import connect, period_range, query_totals, update_ledger
+from transaction_table import TransactionTable
+
+
+def timed_query(conn: sqlite3.Connection, label: str, **kwargs):
+    start = time.perf_counter()
+    totals = query_totals(conn, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {len(totals):>4} 组 {elapsed * 1000:>8.1f}ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    table = TransactionTable.from_transactions(generate_transactions(count))
+    table = table.sort_by_date()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ledger_path = os.path.join(tmp_dir, "ledger.sqlite")
+        source = os.path.join(tmp_dir, "merged_账单.xlsx")
+
+        print(f"=== 写入账本（{count} 条） ===")
+        for label in ("首次写入", "重复写入"):
+            start = time.perf_counter()
+            inserted, updated, deleted = update_ledger(ledger_path, table, source)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<10} 新增 {inserted:>8} 更新 {updated:>8} 删除 {deleted:>6} {elapsed:>7.2f}s")
+        assert (inserted, updated, deleted) == (0, 0, 0), "重复写入不应新增、更新或删除记录"
+
+        conn = connect(ledger_path)
+        rows = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        assert rows == len(table), "重复写入后记录数变化"
+
+        print(f"\n=== 查询耗时（{rows} 条） ===")
+        start, end = period_range("2022Q3")
+        timed_query(conn, "季度 + 分类（食品酒水）", start=start, end=end, category="食品酒水")
+        start, end = period_range("2023")
+        timed_query(conn, "年 + 按账户", start=start, end=end, by="account")
+        timed_query(conn, "全部按月", by="month")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
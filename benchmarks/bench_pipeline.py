@@ -0,0 +1,59 @@
+"""
+端到端基准：两阶段流程 vs 内存一体化流程
+两阶段：逐账单写出 *_随手记.xlsx，再由 merge.py 读回合并；一体化：账单直接进入合并阶段
+两种流程使用同一批合成账单（不含 PDF/CSV 解析，两者该部分相同），核对合并结果一致
+
+用法: python benchmarks/bench_pipeline.py [记录数，默认 50000]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import generate_statements
+from excel_generator import ExcelGenerator
+from merge import merge_excel_files, merge_transactions, write_merged, _read_openpyxl
+from pipeline import statements_to_table
+
+
+def two_stage(statements, work_dir: str, output_path: str):
+    for name, statement in statements.items():
+        ExcelGenerator().generate(statement, os.path.join(work_dir, name))
+    merge_excel_files(work_dir, output_path, jobs=1)
+
+
+def one_shot(statements, output_path: str):
+    write_merged(merge_transactions(statements_to_table(statements)), output_path)
+
+
+def timed(label: str, run, *args) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:>7.2f}s")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    statements = generate_statements(count)
+    print(f"=== 端到端耗时（{count} 条，{len(statements)} 个账单） ===")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = os.path.join(tmp_dir, "output")
+        os.makedirs(work_dir)
+        two_stage_path = os.path.join(tmp_dir, "two_stage.xlsx")
+        one_shot_path = os.path.join(tmp_dir, "one_shot.xlsx")
+
+        before = timed("两阶段", two_stage, statements, work_dir, two_stage_path)
+        after = timed("一体化", one_shot, statements, one_shot_path)
+        same = _read_openpyxl(two_stage_path) == _read_openpyxl(one_shot_path)
+
+    print(f"加速 {before / after:.1f}x，合并结果{'一致' if same else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+信用卡退款对冲基准
+合成含大量小额退款的信用卡账单，比较 credit_card_parser.offset_refunds（(商户, 金额分) 索引）
+与原先逐条退款扫描全部消费的嵌套循环的耗时，并核对两者对冲结果一致
+
+嵌套循环随记录数平方增长，默认只在较少的记录数下运行
+用法: python benchmarks/bench_refund_offset.py [记录数，默认 200000] [嵌套循环记录数，默认 10000]
+"""
+import contextlib
+import io
+import random
+import sys
+import time
+
+from synthetic import CHANNELS, MERCHANTS
+from credit_card_parser import offset_refunds
+from parsers.cmb_parser import CMBParser
+
+
+def generate_raw(count: int, seed: int = 42) -> list:
+    """合成信用卡原始交易：约 1/5 为退款（商户与某条消费相同，金额多为几元的小额）"""
+    rng = random.Random(seed)
+    merchants = [f"{m}{i}" for m in MERCHANTS for i in range(50)]
+    raw = []
+    for i in range(count):
+        merchant = rng.choice(merchants)
+        cents = rng.choice((100, 200, 500, 990, 1000))
+        if i % 5 == 4:
+            raw.append({"date": "2024-01-01", "description": f"{merchant}退款", "amount": -cents})
+        else:
+            raw.append({"date": "2024-01-01", "description": rng.choice(CHANNELS) + merchant, "amount": cents})
+    return raw
+
+
+def nested_offset(expenses: list, refunds: list, extract_merchant) -> tuple:
+    """原实现：每条退款顺序扫描全部消费，并对每条消费重新提取商户（现在提取结果有缓存）"""
+    matched_expense_indices = set()
+    matched_refund_indices = set()
+    for ri, refund in enumerate(refunds):
+        refund_cents = abs(refund['amount'])
+        refund_merchant = extract_merchant(refund['description'])
+        for ei, expense in enumerate(expenses):
+            if ei in matched_expense_indices:
+                continue
+            expense_merchant = extract_merchant(expense['description'])
+            if (expense['amount'] == refund_cents and
+                    refund_merchant and expense_merchant and
+                    refund_merchant == expense_merchant):
+                matched_expense_indices.add(ei)
+                matched_refund_indices.add(ri)
+                break
+    return matched_expense_indices, matched_refund_indices
+
+
+def timed(label: str, func, count: int):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {count:>9} 条 {elapsed:>8.3f}s")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    nested_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    parser = CMBParser()
+
+    print("=== 退款对冲耗时 ===")
+    for size in sorted({nested_count, count}):
+        raw = generate_raw(size)
+        expenses = [tx for tx in raw if tx['amount'] > 0]
+        refunds = [tx for tx in raw if tx['amount'] < 0]
+        indexed = timed("索引", lambda: offset_refunds(expenses, refunds, parser._extract_merchant), size)
+        if size <= nested_count:
+            nested = timed("嵌套循环", lambda: nested_offset(expenses, refunds, parser._extract_merchant), size)
+            assert indexed[2:] == nested, "对冲结果不一致"
+        print(f"  对冲 {len(indexed[3])} / {len(refunds)} 笔退款")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+SQLite 合并引擎基准
+合成交易表，比较内存合并（退款对冲 + 转账识别 + 亲属卡处理）与 SQLite 引擎（sqlite_merge.py）的耗时，
+两种结果按 (日期, origin) 排序后逐条核对一致（行来源、各字段）
+
+用法: python benchmarks/bench_sqlite_merge.py [记录数，默认 200000]
+"""
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+
+from synthetic import generate_transactions
+from merge import _bank_contributions, process_family_card, refunds_and_transfers
+from sqlite_merge import sqlite_merge
+from transaction_table import TransactionTable
+
+
+def in_memory(table: TransactionTable) -> TransactionTable:
+    """内存合并，按 (日期, origin) 排序（与 merge.py 的全量合并相同）"""
+    post_transfer = refunds_and_transfers(table)
+    _, accounts = _bank_contributions(post_transfer)
+    result = process_family_card(post_transfer, accounts_with_data=set(accounts))
+    return result.take(np.lexsort((result.origin, result.date_ord)))
+
+
+def timed(label: str, run, table: TransactionTable) -> TransactionTable:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = run(table)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {len(table):>9} 条 -> {len(result):>9} 条 {elapsed:>8.2f}s")
+    return result
+
+
+def fresh_table(count: int) -> TransactionTable:
+    table = TransactionTable.from_transactions(generate_transactions(count))
+    table.origin = np.arange(len(table), dtype=np.int64)
+    return table
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    print(f"=== 合并耗时（{count} 条） ===")
+    # 亲属卡处理会修改输入表，两种引擎各用一份
+    expected = timed("内存", in_memory, fresh_table(count))
+    actual = timed("SQLite", sqlite_merge, fresh_table(count))
+    assert np.array_equal(expected.origin, actual.origin), "行来源不一致"
+    assert expected.to_transactions() == actual.to_transactions(), "合并结果不一致"
+    print("  两种结果一致")
+
+
+if __name__ == "__main__":
+    main()
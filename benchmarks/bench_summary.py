@@ -0,0 +1,43 @@
+"""
+合并结果汇总基准
+合成已排序的合并结果，比较写出合并文件（随手记Excel 只写模式 / CSV）与计算并写出汇总（summary.py）的耗时，
+汇总耗时应远小于写出合并文件
+
+用法: python benchmarks/bench_summary.py [记录数，默认 200000]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import generate_transactions
+from summary import write_summary
+from transaction_table import TransactionTable
+from writers import get_writer
+
+
+def timed(run, *args) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    table = TransactionTable.from_transactions(generate_transactions(count)).sort_by_date()
+
+    print(f"=== 写出耗时（{count} 条） ===")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        summary_time = timed(write_summary, table, os.path.join(tmp_dir, "merged.xlsx"))
+        for fmt in ("xlsx", "csv"):
+            output_path = os.path.join(tmp_dir, "merged." + fmt)
+            write_time = timed(get_writer(fmt).write_table, table, output_path)
+            print(f"{fmt:<6} 合并文件 {write_time:>7.2f}s  汇总 {summary_time * 1000:>7.1f}ms"
+                  f"（{summary_time / write_time:.1%}）")
+
+
+if __name__ == "__main__":
+    main()
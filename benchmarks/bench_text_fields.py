@@ -0,0 +1,125 @@
+"""
+预计算文本字段基准
+统计退款对冲 + 转账识别两个阶段对每条交易执行的字符串操作次数（lower、子串查找、正则调用），
+比较原先各阶段各自转小写/查找关键词/标准化商户的做法与列式表预计算文本字段（text_fields.py）后的做法
+
+用法: python benchmarks/bench_text_fields.py [记录数，默认 200000]
+"""
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+
+from synthetic import generate_transactions
+import merge
+import text_fields
+from accounts import DEBIT, account_types
+from merchant_normalizer import merchant_key
+from transaction_table import TransactionTable
+
+# 字符串操作计数
+ops = [0]
+
+
+class CountingStr(str):
+    """统计 lower 与子串查找次数的字符串"""
+
+    def lower(self):
+        ops[0] += 1
+        return CountingStr(str.lower(self))
+
+    def __contains__(self, item):
+        ops[0] += 1
+        return str.__contains__(self, item)
+
+
+class CountingPattern:
+    """统计调用次数的正则"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def sub(self, *args):
+        ops[0] += 1
+        return self.pattern.sub(*args)
+
+    def findall(self, *args):
+        ops[0] += 1
+        return self.pattern.findall(*args)
+
+
+def legacy_text_ops(table: TransactionTable):
+    """原实现中两个阶段的文本处理：每个阶段各自转小写、查找关键词，商户每次重新标准化"""
+    normalize = merchant_key()._normalize
+    is_expense = table.tx_type == table.code("支出")
+    incomes = np.flatnonzero(table.tx_type == table.code("收入"))
+
+    # 退款对冲：收入描述查找"退款"，消费与退款标准化商户
+    refunds = [i for i in incomes if "退款" in (table.description[i] or "").lower()]
+    for i in list(np.flatnonzero(is_expense)) + refunds:
+        normalize(table.merchant[i] or table.description[i])
+
+    # 转账识别：储蓄卡支出识别转账目标，无目标时再次转小写查找还款关键词
+    debit = ((account_types(table) & DEBIT) != 0) & is_expense
+    for i in np.flatnonzero(debit):
+        description = table.description[i]
+        desc_lower = description.lower()
+        target = None
+        for keyword, value in text_fields.TRANSFER_KEYWORDS.items():
+            if keyword in ("微信", "零钱", "支付宝", "余额宝"):
+                continue
+            if CountingStr(keyword).lower() in desc_lower:
+                target = value
+                break
+        if target is None:
+            has_wallet = any(k in desc_lower for k in ("微信", "零钱", "支付宝", "余额宝"))
+            if has_wallet and any(m in desc_lower for m in text_fields.WALLET_TRANSFER_MARKERS):
+                target = "支付宝" if "支付宝" in desc_lower or "余额宝" in desc_lower else "微信"
+        if not target:
+            desc = (description or "").lower()
+            "跨行还款" in desc or "还款" in desc or "信用卡" in desc
+
+
+def build_table(count: int) -> TransactionTable:
+    table = TransactionTable.from_transactions(generate_transactions(count))
+    table.description = np.array([CountingStr(d) for d in table.description], dtype=object)
+    return table
+
+
+def reset_caches():
+    text_fields.describe.cache_clear()
+    merchant_key()._normalize_text.cache_clear()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    key = merchant_key()
+    key.strip_prefix, key.remove = CountingPattern(key.strip_prefix), CountingPattern(key.remove)
+    text_fields._KEYWORD_RE = CountingPattern(text_fields._KEYWORD_RE)
+
+    print(f"=== 字符串操作次数（{count} 条） ===")
+    table = build_table(count)
+    reset_caches()
+    ops[0] = 0
+    start = time.perf_counter()
+    legacy_text_ops(table)
+    legacy_elapsed = time.perf_counter() - start
+    print(f"各阶段分别处理   {ops[0]:>10} 次  {ops[0] / count:.2f} 次/条  {legacy_elapsed:.2f}s")
+
+    table = build_table(count)
+    reset_caches()
+    ops[0] = 0
+    start = time.perf_counter()
+    table.text_fields()
+    compute_ops, compute_elapsed = ops[0], time.perf_counter() - start
+    with contextlib.redirect_stdout(io.StringIO()):
+        merge.identify_transfers(merge.reconcile_refunds(table))
+    stage_ops = ops[0] - compute_ops
+    print(f"预计算文本字段   {ops[0]:>10} 次  {ops[0] / count:.2f} 次/条  "
+          f"（计算 {compute_ops / count:.2f} 次/条 {compute_elapsed:.2f}s，两个阶段复用后 {stage_ops / count:.2f} 次/条）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Transaction 内存基准
+比较旧版 dataclass（__dict__ + 逐条字符串）与当前 __slots__ + 驻留字段的每条交易字节数
+
+用法: python benchmarks/bench_transaction_memory.py [记录数，默认 1000000]
+"""
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from synthetic import generate_rows
+from models import Transaction
+
+
+@dataclass
+class LegacyTransaction:
+    """改造前的 Transaction 布局（普通 dataclass，浮点金额，不驻留）"""
+    date: str
+    category: str
+    subcategory: str
+    account: str
+    amount: float
+    description: str
+    transaction_type: str = "支出"
+    transfer_to_account: Optional[str] = None
+    merchant: Optional[str] = None
+
+
+def measure(label: str, build, count: int) -> float:
+    """构建 count 条记录，返回每条记录占用的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    records = build(count)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_record = current / len(records)
+    print(f"{label:<28} {current / 1024 / 1024:>9.1f} MiB  {per_record:>7.1f} 字节/条")
+    del records
+    return per_record
+
+
+def build_legacy(count: int):
+    return [
+        LegacyTransaction(date, category, subcategory, account, cents / 100, description,
+                          tx_type, transfer_to or None, merchant)
+        for date, category, subcategory, account, cents, description, tx_type, transfer_to, merchant
+        in generate_rows(count)
+    ]
+
+
+def build_current(count: int):
+    return [
+        Transaction(date, category, subcategory, account, cents, description,
+                    tx_type, transfer_to or None, merchant)
+        for date, category, subcategory, account, cents, description, tx_type, transfer_to, merchant
+        in generate_rows(count)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"=== Transaction 内存基准（{count} 条） ===")
+    before = measure("改造前 (dict, 未驻留)", build_legacy, count)
+    after = measure("当前 (slots, 驻留)", build_current, count)
+    print(f"节省 {before - after:.1f} 字节/条（{(1 - after / before) * 100:.0f}%）")
+
+
+if __name__ == "__main__":
+    main()
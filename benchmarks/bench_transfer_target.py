@@ -0,0 +1,88 @@
+"""
+转账目标识别基准
+按常见的储蓄卡账单描述格式（摘要 + 附言 + 对方户名，含还款/充值/经钱包的商户消费等）合成大量互不相同的描述，
+比较原先逐个关键词查找（转账关键词表按顺序查找，再分别查找钱包关键词和转账标记）
+与 text_fields 编译后的单次扫描的耗时，并核对两者识别的目标账户一致
+
+用法: python benchmarks/bench_transfer_target.py [描述数，默认 200000]
+"""
+import random
+import sys
+import time
+
+from synthetic import MERCHANTS
+import text_fields
+
+SUMMARIES = ["消费", "跨行转出", "转支", "网银转账", "快捷支付", "银联入账", "代扣", "转账", "汇出", "自动还款"]
+MEMOS = [
+    "财付通-微信支付-{m}", "支付宝-{m}消费", "微信零钱充值", "支付宝余额宝转入", "招商银行信用卡还款",
+    "中信银行 自动还款", "浦发信用卡 还款", "建设银行信用卡还款", "花呗自动还款", "京东白条还款",
+    "跨行还款", "信用卡还款", "{m}", "美团-{m}", "零钱提现", "微信转账", "工资代发", "房租",
+]
+NAMES = ["张三", "李四", "王五", "财付通支付科技有限公司", "支付宝（中国）网络技术有限公司", "/", ""]
+
+
+def generate_descriptions(count: int, seed: int = 42) -> list:
+    """合成储蓄卡账单描述（带流水号，互不相同）"""
+    rng = random.Random(seed)
+    descriptions = []
+    for i in range(count):
+        memo = rng.choice(MEMOS).format(m=rng.choice(MERCHANTS))
+        parts = [rng.choice(SUMMARIES), memo, rng.choice(NAMES), f"{i:08d}"]
+        descriptions.append(" ".join(p for p in parts if p and p != "/"))
+    return descriptions
+
+
+# 原实现的关键词表（钱包类关键词在表中但单独处理）
+LEGACY_KEYWORDS = dict(text_fields.TRANSFER_KEYWORDS)
+for _wallet, _keywords in text_fields.WALLET_TARGETS.items():
+    for _keyword in _keywords:
+        LEGACY_KEYWORDS[_keyword] = _wallet
+LEGACY_WALLET_KEYWORDS = ("微信", "零钱", "支付宝", "余额宝")
+
+
+def legacy_target(description: str):
+    """原实现：按顺序查找转账关键词，再分别查找钱包关键词和转账标记"""
+    if not description:
+        return None
+    desc_lower = description.lower()
+    for keyword, target in LEGACY_KEYWORDS.items():
+        if keyword in LEGACY_WALLET_KEYWORDS:
+            continue
+        if keyword.lower() in desc_lower:
+            return target
+    has_wallet = any(k in desc_lower for k in LEGACY_WALLET_KEYWORDS)
+    if has_wallet and any(m in desc_lower for m in text_fields.WALLET_TRANSFER_MARKERS):
+        if "支付宝" in desc_lower or "余额宝" in desc_lower:
+            return "支付宝"
+        return "微信"
+    return None
+
+
+def compiled_target(description: str):
+    """单次扫描（不经过 describe 的缓存）"""
+    return text_fields.scan_text(description.lower())[1] if description else None
+
+
+def timed(label: str, func, descriptions: list) -> list:
+    start = time.perf_counter()
+    result = [func(d) for d in descriptions]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {len(descriptions):>9} 条 {elapsed:>8.3f}s  {elapsed / len(descriptions) * 1e6:>6.2f} µs/条")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    descriptions = generate_descriptions(count)
+
+    print("=== 转账目标识别耗时 ===")
+    legacy = timed("逐个查找", legacy_target, descriptions)
+    compiled = timed("单次扫描", compiled_target, descriptions)
+    assert legacy == compiled, "识别结果不一致"
+    found = sum(1 for target in compiled if target)
+    print(f"  识别出目标 {found} / {count} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+滑动窗口合并基准
+合成不同历史长度（交易密度相同）的 *_随手记.xlsx 目录，比较内存合并（merge.py）与
+滑动窗口合并（window_merge.py）的耗时和 Python 内存峰值（tracemalloc），并统计两者输出记录的重合数
+（两者在退款窗口与并列候选的取舍上有意不同，见 window_merge.py）
+
+用法: python benchmarks/bench_window_merge.py [每 6 年记录数，默认 20000] [最长历史的 6 年段数，默认 4]
+"""
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+from synthetic import generate_rows
+from excel_generator import ExcelGenerator
+from merge import list_excel_files, merge_excel_files
+from models import BankStatement, Transaction
+from window_merge import window_merge
+
+
+def write_history(work_dir: str, rows_per_block: int, blocks: int) -> int:
+    """写出 blocks 个 6 年段的合成账单（按 账户-年月 分文件），返回记录数"""
+    grouped = {}
+    for block in range(blocks):
+        for date, category, subcategory, account, cents, description, tx_type, transfer_to, merchant \
+                in generate_rows(rows_per_block, seed=block, start_year=2000 + 6 * block):
+            name = f"{account}-{date[:7].replace('-', '')}_随手记.xlsx"
+            grouped.setdefault(name, []).append(Transaction(
+                date=date, category=category, subcategory=subcategory, account=account,
+                amount_cents=cents, description=description, transaction_type=tx_type,
+                transfer_to_account=transfer_to or None, merchant=merchant,
+            ))
+    for name, transactions in grouped.items():
+        statement = BankStatement(bank_name=name.split("-")[0], account_name="", account_number="",
+                                  statement_period="", transactions=transactions)
+        ExcelGenerator().generate(statement, os.path.join(work_dir, name))
+    return rows_per_block * blocks
+
+
+def measured(run, *args, **kwargs):
+    """返回 (耗时, 内存峰值 MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def read_rows(output_path: str) -> Counter:
+    """读取 CSV 输出的全部记录（各Sheet）"""
+    rows = Counter()
+    base, ext = os.path.splitext(output_path)
+    for sheet in ("支出", "收入", "转账"):
+        with open(f"{base}_{sheet}{ext}", encoding="utf-8-sig", newline="") as f:
+            rows.update((sheet, *row) for row in list(csv.reader(f))[1:])
+    return rows
+
+
+def main():
+    rows_per_block = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    max_blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(f"=== 合并耗时与内存峰值（每 6 年 {rows_per_block} 条） ===")
+    print(f"{'历史':>6} {'记录数':>9} {'内存合并':>18} {'滑动窗口':>18} {'输出重合':>16}")
+    blocks = 1
+    while blocks <= max_blocks:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            work_dir = os.path.join(tmp_dir, "output")
+            os.makedirs(work_dir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                count = write_history(work_dir, rows_per_block, blocks)
+            in_memory_path = os.path.join(tmp_dir, "in_memory.csv")
+            window_path = os.path.join(tmp_dir, "window.csv")
+
+            memory_time, memory_peak = measured(merge_excel_files, work_dir, in_memory_path,
+                                                jobs=1, full=True, fmt="csv")
+            window_time, window_peak = measured(window_merge, list_excel_files(work_dir), window_path, fmt="csv")
+            expected, actual = read_rows(in_memory_path), read_rows(window_path)
+            overlap = sum((expected & actual).values())
+
+        print(f"{6 * blocks:>4}年 {count:>9} {memory_time:>7.2f}s {memory_peak:>7.1f}MB "
+              f"{window_time:>7.2f}s {window_peak:>7.1f}MB {overlap:>7}/{sum(expected.values()):<7}")
+        blocks *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Excel 读取吞吐基准
+用 ExcelGenerator 生成一个 *_随手记.xlsx 及其列式副本，比较 openpyxl 逐单元格读取、流式读取与读取副本的行/秒，
+并核对三者结果一致
+
+用法: python benchmarks/bench_xlsx_read.py [记录数，默认 200000]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import generate_transactions
+from excel_generator import ExcelGenerator
+from merge import _read_fast, _read_openpyxl, transactions_as_read
+from sidecar import load_sidecar, write_sidecar
+
+
+def timed(label: str, read, file_path: str, count: int):
+    start = time.perf_counter()
+    transactions = read(file_path)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {elapsed:>7.2f}s  {count / elapsed:>10.0f} 行/秒")
+    return transactions, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"=== Excel 读取吞吐（{count} 条） ===")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "bench_随手记.xlsx")
+        generator = ExcelGenerator()
+        generator._create_workbook()
+        transactions = generate_transactions(count)
+        generator.add_transactions(transactions)
+        generator.save(file_path)
+        write_sidecar(file_path, transactions_as_read(transactions), "synthetic", "1", "")
+
+        legacy, before = timed("openpyxl", _read_openpyxl, file_path, count)
+        fast, after = timed("流式读取", _read_fast, file_path, count)
+        sidecar, sidecar_elapsed = timed("列式副本", lambda path: load_sidecar(path).to_transactions(), file_path, count)
+
+    print(f"流式读取加速 {before / after:.1f}x，列式副本加速 {before / sidecar_elapsed:.1f}x，"
+          f"结果{'一致' if legacy == fast == sidecar else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+基准测试用合成数据
+生成与各解析器输出形态一致的交易行（账户/分类取值有限，描述各不相同）
+"""
+import os
+import random
+import sys
+from typing import Dict, Iterator, List, Tuple
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from models import BankStatement, Transaction
+
+
+ACCOUNTS = ["农业银行", "宁波银行", "建行储蓄卡", "招商信用卡", "中信信用卡", "浦发信用卡", "建行信用卡", "微信", "支付宝"]
+CATEGORIES = [
+    ("食品酒水", "早午晚餐"), ("食品酒水", "买菜"), ("居家物业", "日常用品"), ("行车交通", "打车租车"),
+    ("行车交通", "停车费"), ("休闲娱乐", "会员"), ("医疗保健", "药品费"), ("其他杂项", "其他支出"),
+]
+INCOME_CATEGORIES = [("职业收入", "工资收入"), ("其他收入", "退款"), ("其他收入", "抢红包")]
+MERCHANTS = ["肯德基", "Manner Coffee", "叮咚买菜", "盒马", "美团外卖", "滴滴出行", "京东商城", "天猫**营", "拼多多", "瑞幸咖啡"]
+CHANNELS = ["财付通-", "支付宝-", "微信支付-", "云闪付-", ""]
+DEBIT_DESCRIPTIONS = ["转支 还款-招商", "跨行还款", "中信 自动还款", "微信零钱充值", "支付宝-商户消费",
+                      "财付通-微信支付-美团", "余额宝转入", "消费 盒马", "建设银行信用卡还款", "网银转账"]
+
+Row = Tuple[str, str, str, str, int, str, str, str, str]
+
+
+def _fresh(text: str) -> str:
+    """返回内容相同的新字符串对象，模拟逐行从文件读出的字符串"""
+    return text.encode("utf-8").decode("utf-8")
+
+
+def generate_rows(count: int, seed: int = 42, start_year: int = 2020) -> Iterator[Row]:
+    """
+    生成合成交易行：(日期, 分类, 子分类, 账户, 金额分, 描述, 交易类型, 转入账户, 商户)
+    日期按行号递增，跨越多年
+    """
+    rnd = random.Random(seed)
+    days_per_year = max(count // 6, 1)
+    for i in range(count):
+        year = start_year + i // days_per_year
+        day_of_year = (i % days_per_year) * 336 // days_per_year
+        date = f"{year}-{day_of_year // 28 + 1:02d}-{day_of_year % 28 + 1:02d}"
+        account = rnd.choice(ACCOUNTS)
+        merchant = rnd.choice(MERCHANTS)
+        cents = rnd.choice((990, 1500, 2550, 3800, 9900, 12800, 50000)) + rnd.randint(0, 300) * 100
+        roll = rnd.random()
+        transfer_to = ""
+        if roll < 0.75:
+            tx_type = "支出"
+            category, subcategory = rnd.choice(CATEGORIES)
+            if account in ("农业银行", "宁波银行", "建行储蓄卡") and roll < 0.2:
+                description = rnd.choice(DEBIT_DESCRIPTIONS)
+            else:
+                description = f"{rnd.choice(CHANNELS)}{merchant} {i}"
+        elif roll < 0.95:
+            tx_type = "收入"
+            category, subcategory = rnd.choice(INCOME_CATEGORIES)
+            description = f"{merchant}退款 {i}" if subcategory == "退款" else f"收入 {i}"
+        else:
+            tx_type = "转账"
+            category, subcategory = "转账", ""
+            transfer_to = rnd.choice(("微信", "支付宝", "招商信用卡"))
+            description = f"转入零钱通 {i}"
+        yield (_fresh(date), _fresh(category), _fresh(subcategory), _fresh(account), cents,
+               description, _fresh(tx_type), _fresh(transfer_to), _fresh(merchant))
+
+
+def generate_transactions(count: int, seed: int = 42):
+    """生成合成 Transaction 列表"""
+    return [
+        Transaction(
+            date=date, category=category, subcategory=subcategory, account=account,
+            amount_cents=cents, description=description, transaction_type=tx_type,
+            transfer_to_account=transfer_to or None, merchant=merchant,
+        )
+        for date, category, subcategory, account, cents, description, tx_type, transfer_to, merchant
+        in generate_rows(count, seed)
+    ]
+
+
+def generate_statements(count: int, seed: int = 42) -> Dict[str, BankStatement]:
+    """
+    生成按 账户-年月 分组的合成账单：{随手记文件名: BankStatement}
+    模拟 main.py 批量处理一个目录得到的各账单
+    """
+    grouped: Dict[str, List[Transaction]] = {}
+    for transaction in generate_transactions(count, seed):
+        month = transaction.date[:7].replace("-", "")
+        grouped.setdefault(f"{transaction.account}-{month}_随手记.xlsx", []).append(transaction)
+    return {
+        name: BankStatement(bank_name=name.split("-")[0], account_name="", account_number="",
+                            statement_period=name.split("-")[1][:6], transactions=transactions)
+        for name, transactions in grouped.items()
+    }
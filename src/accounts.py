@@ -0,0 +1,79 @@
+"""
+账户登记表模块
+从 config/accounts.json 加载账户：每个账户有类型（储蓄卡/信用卡/电子钱包等）和别名。
+账户类型以位掩码表示，合并阶段把列式表的账户编码整列换算为类型掩码，账户判断都是整数运算；
+解析器提取的银行名称经别名解析为登记的账户名（如 建设银行 → 建行储蓄卡）；别名只在解析时使用，
+合并阶段按账户名本身判断类型（账户为别名的记录与未登记的账户相同），与按账户名查找的匹配一致。
+新增账户只需修改配置
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from config_loader import config_path, load_json_config
+
+ACCOUNTS_PATH = config_path("accounts.json")
+
+# 账户类型位
+TYPE_BITS = {
+    "cash": 1,
+    "debit": 2,
+    "credit": 4,
+    "wallet": 8,
+    "virtual": 16,
+    "liability": 32,
+    "asset": 64,
+    "investment": 128,
+}
+DEBIT = TYPE_BITS["debit"]
+CREDIT = TYPE_BITS["credit"]
+WALLET = TYPE_BITS["wallet"]
+
+# 银行卡/钱包账户（合并时参与转账识别和亲属卡匹配的账户）
+BANK = DEBIT | CREDIT | WALLET
+
+
+class AccountRegistry:
+    """
+    账户登记表：账户名 -> 类型掩码，别名 -> 账户名
+    """
+
+    def __init__(self, config: dict):
+        self.types: Dict[str, int] = {}
+        self.aliases: Dict[str, str] = {}
+        for account in config.get("accounts", []):
+            name = account["name"]
+            self.types[name] = TYPE_BITS.get(account.get("type"), 0)
+            for alias in account.get("aliases", ()):
+                self.aliases[alias] = name
+
+    def resolve(self, name: Optional[str]) -> Optional[str]:
+        """别名解析为登记的账户名（未登记的名称原样返回）"""
+        return self.aliases.get(name, name)
+
+    def type_mask(self, name: Optional[str]) -> int:
+        """账户类型掩码（未登记的名称和别名为 0）"""
+        return self.types.get(name, 0)
+
+    def is_type(self, name: Optional[str], mask: int) -> bool:
+        """账户是否属于掩码中的任一类型"""
+        return bool(self.type_mask(name) & mask)
+
+    def code_masks(self, strings: Iterable[str]) -> np.ndarray:
+        """
+        字符串池各编码的类型掩码，末尾两位分别对应 MISSING_CODE(-2) / NONE_CODE(-1)（均为 0），
+        可直接用编码列索引：code_masks(pool.strings)[table.account]
+        """
+        return np.array([self.type_mask(text) for text in strings] + [0, 0], dtype=np.int32)
+
+
+@lru_cache(maxsize=None)
+def account_registry() -> AccountRegistry:
+    """同一进程内共用的账户登记表"""
+    return AccountRegistry(load_json_config(ACCOUNTS_PATH, "没有登记的账户"))
+
+
+def account_types(table) -> np.ndarray:
+    """列式表各行账户的类型掩码"""
+    return account_registry().code_masks(table.pool.strings)[table.account]
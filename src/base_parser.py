@@ -2,11 +2,10 @@
 基础解析器模块
 定义抽象解析器基类和分类映射逻辑
 """
-import json
-import os
 from abc import ABC, abstractmethod
 from typing import List, Optional, Tuple
-from models import Transaction, BankStatement
+from config_loader import config_path, load_json_config
+from models import Transaction, BankStatement, to_cents
 
 
 class BaseParser(ABC):
@@ -14,6 +13,17 @@ class BaseParser(ABC):
     基础解析器抽象类
     """
 
+    # 解析器版本：解析结果有变化时递增，用于判断已生成的数据是否过期
+    VERSION = "1"
+
+    # PDF 文本可按页范围分段提取的解析器设为 True，并实现 _extract_pdf_text(file_path, start, stop) 与
+    # parse_lines(file_path, raw_lines)：各段文本按页序拼接后交给 parse_lines，结果与 parse 相同
+    # （大文件并发转换时由 scheduler.split_ranges 判断是否拆分到多个进程提取）
+    supports_page_split = False
+
+    # 支持流式解析的解析器设为 True：parse_stream 先读出表头信息，交易记录在遍历时逐页读取、逐条产出
+    STREAMING = False
+
     def __init__(self, config_path: str = None):
         """
         初始化解析器
@@ -25,21 +35,7 @@ class BaseParser(ABC):
         """
         加载分类映射配置文件
         """
-        config_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            "config",
-            filename
-        )
-
-        try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"警告：配置文件 {config_path} 未找到，使用默认分类")
-            return {}
-        except json.JSONDecodeError as e:
-            print(f"警告：配置文件解析失败 {e}，使用默认分类")
-            return {}
+        return load_json_config(config_path(filename), "使用默认分类")
 
     def match_category(self, description: str, is_income: bool = False) -> Tuple[str, str]:
         """
@@ -86,16 +82,19 @@ class BaseParser(ABC):
         
         return date_str
     
-    def parse_amount(self, amount_str: str) -> float:
+    def parse_amount(self, amount_str: str) -> int:
         """
-        解析金额字符串，返回浮点数
+        解析金额字符串，返回整数分（不经过浮点）
         """
-        try:
-            amount_str = amount_str.strip().replace(",", "")
-            return float(amount_str)
-        except ValueError:
-            return 0.0
+        return to_cents(amount_str)
     
+    @property
+    def name(self) -> str:
+        """
+        解析器名称（类名）
+        """
+        return type(self).__name__
+
     @abstractmethod
     def parse(self, file_path: str) -> BankStatement:
         """
@@ -103,6 +102,18 @@ class BaseParser(ABC):
         """
         pass
     
+    def parse_stream(self, file_path: str) -> BankStatement:
+        """
+        流式解析账单文件（STREAMING 的解析器返回 StreamingStatement，其余解析器与 parse 相同）
+        """
+        return self.parse(file_path)
+
+    def extract_page_lines(self, file_path: str, start: int, stop: Optional[int] = None) -> List[str]:
+        """
+        提取 PDF 第 start 到 stop-1 页的文本行（仅 supports_page_split 的解析器可用）
+        """
+        return self._extract_pdf_text(file_path, start, stop)
+
     @abstractmethod
     def get_supported_extensions(self) -> List[str]:
         """
@@ -0,0 +1,84 @@
+"""
+基础写入器模块
+定义输出写入器的抽象基类：随手记Excel（ExcelGenerator）及 CSV/TSV/JSON Lines 写入器（writers.py）
+使用相同的支出/收入/转账列定义
+"""
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from models import BankStatement, Transaction
+from transaction_table import TransactionTable
+
+# 三类交易对应的Sheet（输出顺序）
+SHEET_NAMES = ("支出", "收入", "转账")
+
+# generate 逐块写出时每块的记录数（流式账单同一时间只有一块在内存中）
+GENERATE_CHUNK_ROWS = 1 << 13
+
+
+def transaction_chunks(transactions: Iterable[Transaction],
+                       chunk_rows: int = GENERATE_CHUNK_ROWS) -> Iterator[TransactionTable]:
+    """按顺序每 chunk_rows 条交易组成一个列式表，边遍历边产出"""
+    iterator = iter(transactions)
+    while True:
+        batch = list(islice(iterator, chunk_rows))
+        if not batch:
+            return
+        yield TransactionTable.from_transactions(batch)
+
+
+class BaseWriter(ABC):
+    """
+    输出写入器抽象类
+    """
+
+    # --format 取值
+    FORMAT = ""
+    # 输出文件扩展名
+    EXTENSION = ""
+
+    def output_paths(self, output_path: str) -> List[str]:
+        """
+        写入 output_path 时实际生成的文件（用于判断输出是否仍存在）
+        """
+        return [output_path]
+
+    @abstractmethod
+    def write_table(self, table: TransactionTable, output_path: str) -> Dict[str, int]:
+        """
+        写出列式表中的交易记录，返回各Sheet的记录数
+        """
+        pass
+
+    def write_chunks(self, chunks: Iterable[TransactionTable], output_path: str) -> Dict[str, int]:
+        """
+        依次写出多个列式表（按顺序作为同一份输出），返回各Sheet的记录数
+        默认拼接后一次写出；各写入器改为逐块写出，内存只与块大小有关（流式合并）
+        """
+        return self.write_table(TransactionTable.concat(list(chunks)), output_path)
+
+    def generate(self, statement: BankStatement, output_path: str):
+        """
+        写出账单的交易记录：逐块转为列式表交给 write_chunks，流式账单（StreamingStatement）边解析边写出
+        """
+        counts = self.write_chunks(transaction_chunks(statement.iter_transactions(), GENERATE_CHUNK_ROWS), output_path)
+
+        print(f"生成完成，共 {sum(counts.values())} 条记录")
+        for sheet_name in SHEET_NAMES:
+            print(f"  {sheet_name}: {counts[sheet_name]} 条")
+
+
+def sheet_indices(table: TransactionTable) -> Dict[str, np.ndarray]:
+    """
+    各Sheet的行号（与 ExcelGenerator.sheet_for 的归类一致：收入、转账以外的类型归为支出）
+    """
+    income = table.tx_type == table.code("收入")
+    transfer = table.tx_type == table.code("转账")
+    return {
+        "支出": np.flatnonzero(~(income | transfer)),
+        "收入": np.flatnonzero(income),
+        "转账": np.flatnonzero(transfer),
+    }
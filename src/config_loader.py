@@ -0,0 +1,29 @@
+"""
+配置加载模块
+config/ 目录的位置与 JSON 配置文件的读取：文件不存在或格式错误时打印警告并返回空配置，
+由调用方按空配置降级（如不做商户标准化、没有登记的账户）
+"""
+import json
+import os
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
+
+
+def config_path(filename: str) -> str:
+    """config/ 目录下的配置文件路径"""
+    return os.path.join(CONFIG_DIR, filename)
+
+
+def load_json_config(path: str, fallback: str) -> dict:
+    """
+    加载 JSON 配置文件；不存在或解析失败时打印警告（fallback 说明此时的处理）并返回 {}
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"警告：配置文件 {path} 未找到，{fallback}")
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"警告：配置文件解析失败 {e}，{fallback}")
+        return {}
@@ -0,0 +1,171 @@
+"""
+信用卡解析器基类
+招商/中信/浦发/建行信用卡账单共用的退款对冲流程：
+各银行只提供交易归类（_classify_raw）和分类（_categorize）规则，商户提取规则见 config/merchant_rules.json；
+退款按 (商户, 金额分) 索引查找同商户、同金额的消费，每条交易只提取一次商户
+"""
+from abc import abstractmethod
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from base_parser import BaseParser
+from merchant_normalizer import merchant_extractor
+from models import Transaction, format_cents
+
+# _classify_raw 的归类结果；返回 None 的交易直接丢弃，不计入跳过数
+SKIP = "skip"            # 跳过（计入"跳过还款"）
+EXPENSE = "expense"      # 正常消费
+REFUND = "refund"        # 退款（待对冲）
+INCOME = "income"        # 红包/优惠/返现
+REPAYMENT = "repayment"  # 还款记录（保留供 merge.py 匹配转账来源）
+
+
+def offset_refunds(expenses: List[dict], refunds: List[dict],
+                   extract_merchant: Callable[[str], str]) -> Tuple[List[str], List[str], Set[int], Set[int]]:
+    """
+    退款与同商户、同金额的消费对冲
+    返回 (消费商户, 退款商户, 已对冲的消费下标, 已对冲的退款下标)
+
+    退款按顺序依次对冲，每条取尚未对冲的第一条匹配消费（商户为空的不参与对冲）
+    """
+    expense_merchants = [extract_merchant(tx['description']) for tx in expenses]
+    refund_merchants = [extract_merchant(tx['description']) for tx in refunds]
+
+    # (商户, 金额分) -> 按原顺序排列的消费下标
+    index: Dict[Tuple[str, int], Deque[int]] = defaultdict(deque)
+    for ei, (expense, merchant) in enumerate(zip(expenses, expense_merchants)):
+        if merchant:
+            index[(merchant, expense['amount'])].append(ei)
+
+    matched_expense_indices: Set[int] = set()
+    matched_refund_indices: Set[int] = set()
+    for ri, (refund, merchant) in enumerate(zip(refunds, refund_merchants)):
+        if not merchant:
+            continue
+        candidates = index.get((merchant, abs(refund['amount'])))
+        if not candidates:
+            continue
+        ei = candidates.popleft()
+        expense = expenses[ei]
+        matched_expense_indices.add(ei)
+        matched_refund_indices.add(ri)
+        print(f"  对冲: {expense['description']} {format_cents(expense['amount'])} <-> 退款 {format_cents(refund['amount'])}")
+
+    return expense_merchants, refund_merchants, matched_expense_indices, matched_refund_indices
+
+
+class CreditCardParser(BaseParser):
+    """
+    信用卡解析器抽象类
+    """
+
+    # 生成的消费/未匹配退款是否填写商户
+    MERCHANT_FIELD = False
+
+    # 红包/优惠/返现收入的统计标签（为 None 时该银行没有此类交易，不打印）
+    INCOME_LABEL: Optional[str] = None
+
+    # 是否保留还款记录（_classify_raw 返回 REPAYMENT）
+    KEEP_REPAYMENTS = False
+
+    def __init__(self, config_path: str = None):
+        super().__init__(config_path)
+        # 商户提取规则按解析器类名取自 config/merchant_rules.json
+        self.merchant_extractor = merchant_extractor(type(self).__name__)
+
+    @abstractmethod
+    def _classify_raw(self, tx: dict) -> Optional[str]:
+        """
+        交易归类，返回 SKIP / EXPENSE / REFUND / INCOME / REPAYMENT 之一
+        """
+        pass
+
+    def _extract_merchant(self, description: str) -> str:
+        """
+        从描述中提取商户名称（用于退款对冲），同一描述的结果有缓存
+        """
+        return self.merchant_extractor.extract_merchant(description)
+
+    def _process_refunds(self, raw_transactions: List[dict]) -> List[Transaction]:
+        """
+        处理退款对冲逻辑：按 _classify_raw 归类后，退款与同商户、同金额的消费对冲；
+        未对冲的退款作为收入
+        """
+        groups: Dict[str, List[dict]] = {EXPENSE: [], REFUND: [], INCOME: [], REPAYMENT: []}
+        skip_count = 0
+
+        for tx in raw_transactions:
+            kind = self._classify_raw(tx)
+            if kind == SKIP:
+                skip_count += 1
+            elif kind is not None:
+                groups[kind].append(tx)
+
+        expenses, refunds = groups[EXPENSE], groups[REFUND]
+        expense_merchants, refund_merchants, matched_expense_indices, matched_refund_indices = \
+            offset_refunds(expenses, refunds, self._extract_merchant)
+
+        # 生成最终交易列表
+        result = []
+
+        # 添加未对冲的消费
+        for i, exp in enumerate(expenses):
+            if i not in matched_expense_indices:
+                category, subcategory = self._categorize(exp['description'], False)
+                result.append(Transaction(
+                    date=exp['date'],
+                    category=category,
+                    subcategory=subcategory,
+                    account=self.account_name,
+                    amount_cents=abs(exp['amount']),
+                    description=exp['description'],
+                    transaction_type="支出",
+                    merchant=expense_merchants[i] if self.MERCHANT_FIELD else None
+                ))
+
+        # 添加未对冲的退款（作为收入）
+        for i, ref in enumerate(refunds):
+            if i not in matched_refund_indices:
+                result.append(Transaction(
+                    date=ref['date'],
+                    category="其他收入",
+                    subcategory="退款",
+                    account=self.account_name,
+                    amount_cents=abs(ref['amount']),
+                    description=ref['description'] + " (未匹配退款)",
+                    transaction_type="收入",
+                    merchant=refund_merchants[i] if self.MERCHANT_FIELD else None
+                ))
+
+        # 添加红包/优惠/返现收入
+        for inc in groups[INCOME]:
+            result.append(Transaction(
+                date=inc['date'],
+                category="其他收入",
+                subcategory="抢红包",
+                account=self.account_name,
+                amount_cents=abs(inc['amount']),
+                description=inc['description'],
+                transaction_type="收入"
+            ))
+
+        # 添加还款记录（用于merge.py匹配转账来源）
+        for rep in groups[REPAYMENT]:
+            result.append(Transaction(
+                date=rep['date'],
+                category="__REPAYMENT__",  # 特殊标记，merge.py匹配后会删除
+                subcategory="还款",
+                account=self.account_name,
+                amount_cents=abs(rep['amount']),
+                description=rep['description'],
+                transaction_type="收入"
+            ))
+
+        print(f"  跳过还款: {skip_count} 笔")
+        if self.KEEP_REPAYMENTS:
+            print(f"  保留还款记录: {len(groups[REPAYMENT])} 笔（用于匹配）")
+        print(f"  对冲退款: {len(matched_refund_indices)} 笔")
+        if self.INCOME_LABEL:
+            print(f"  {self.INCOME_LABEL}: {len(groups[INCOME])} 笔")
+
+        return result
@@ -4,18 +4,58 @@ Excel生成器模块
 支持三个分页：支出、收入、转账
 """
 import os
+import shutil
+from datetime import datetime
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from typing import List, Dict
+from openpyxl.writer.excel import ExcelWriter
+from typing import Dict, Iterable, List
+from base_writer import BaseWriter
 from models import Transaction, BankStatement
+from transaction_table import TransactionTable
 
 
-class ExcelGenerator:
+# 生成文件使用的固定时间戳（文档属性与压缩包条目），相同内容的工作簿逐字节相同
+FIXED_TIMESTAMP = datetime(1980, 1, 1)
+
+
+class _FixedTimeZipFile(ZipFile):
+    """
+    条目时间戳固定的 ZipFile
+    openpyxl 写入的条目默认带当前时间（工作表来自临时文件，带临时文件的修改时间）
+    """
+
+    def _fixed_info(self, arcname: str, compress_type=None) -> ZipInfo:
+        zinfo = ZipInfo(arcname, date_time=FIXED_TIMESTAMP.timetuple()[:6])
+        zinfo.compress_type = compress_type if compress_type is not None else self.compression
+        zinfo.external_attr = 0o600 << 16
+        return zinfo
+
+    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+        zinfo = self._fixed_info(arcname or os.path.basename(filename), compress_type)
+        with open(filename, "rb") as src, self.open(zinfo, "w", force_zip64=True) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if not isinstance(zinfo_or_arcname, ZipInfo):
+            zinfo_or_arcname = self._fixed_info(zinfo_or_arcname, compress_type)
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+
+class ExcelGenerator(BaseWriter):
     """
     Excel生成器类
     生成随手记兼容的Excel格式（3个Sheet）
+
+    write_only=True 时使用 openpyxl 的只写工作簿：各行经 ws.append 直接写入临时文件，
+    内存占用不随行数增长，适合大文件（合并结果）；工作簿只能保存一次，generate 每次重新创建
     """
 
+    FORMAT = "xlsx"
+    EXTENSION = ".xlsx"
+
     # 支出Sheet列定义
     EXPENSE_COLUMNS = [
         "交易类型",  # A
@@ -57,11 +97,12 @@ class ExcelGenerator:
         "备注"       # I
     ]
 
-    def __init__(self, template_path: str = None):
+    def __init__(self, template_path: str = None, write_only: bool = False):
         """
         初始化Excel生成器
         """
         self.template_path = template_path
+        self.write_only = write_only
         self.workbook = None
         self.sheets: Dict[str, openpyxl.worksheet.worksheet.Worksheet] = {}
         self.sheet_rows: Dict[str, int] = {}
@@ -70,12 +111,13 @@ class ExcelGenerator:
         """
         创建新的工作簿并设置三个Sheet
         """
-        self.workbook = openpyxl.Workbook()
+        self.workbook = openpyxl.Workbook(write_only=self.write_only)
 
         # 创建三个Sheet
-        # 删除默认sheet
-        default_sheet = self.workbook.active
-        self.workbook.remove(default_sheet)
+        # 删除默认sheet（只写工作簿没有默认sheet）
+        if not self.write_only:
+            default_sheet = self.workbook.active
+            self.workbook.remove(default_sheet)
 
         # 按顺序创建：支出、收入、转账
         self.sheets["支出"] = self.workbook.create_sheet("支出")
@@ -107,15 +149,7 @@ class ExcelGenerator:
             bottom=Side(style='thin')
         )
 
-        # 写入表头
-        for col, header in enumerate(columns, 1):
-            cell = worksheet.cell(row=1, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = thin_border
-
-        # 设置列宽
+        # 设置列宽（只写工作簿需在写入第一行之前设置）
         if len(columns) == 10:  # 支出/收入
             column_widths = [10, 20, 12, 12, 12, 10, 8, 15, 10, 30]
         else:  # 转账 (9列)
@@ -124,88 +158,67 @@ class ExcelGenerator:
         for col, width in enumerate(column_widths, 1):
             worksheet.column_dimensions[openpyxl.utils.get_column_letter(col)].width = width
 
-    def add_transaction(self, transaction: Transaction):
-        """
-        添加交易记录到对应的Sheet
-        """
-        if not self.sheets:
-            raise Exception("请先创建工作簿")
-
-        tx_type = transaction.transaction_type
+        # 写入表头
+        header_cells = []
+        for col, header in enumerate(columns, 1):
+            if self.write_only:
+                cell = WriteOnlyCell(worksheet, value=header)
+                header_cells.append(cell)
+            else:
+                cell = worksheet.cell(row=1, column=col, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            cell.border = thin_border
 
-        if tx_type == "支出":
-            self._add_expense(transaction)
-        elif tx_type == "收入":
-            self._add_income(transaction)
-        elif tx_type == "转账":
-            self._add_transfer(transaction)
-        else:
-            # 默认归类为支出
-            self._add_expense(transaction)
+        if self.write_only:
+            worksheet.append(header_cells)
 
-    def _add_expense(self, transaction: Transaction):
+    @staticmethod
+    def sheet_for(transaction: Transaction) -> str:
         """
-        添加支出记录
+        交易记录所属的Sheet（未知类型默认归类为支出）
         """
-        ws = self.sheets["支出"]
-        row = self.sheet_rows["支出"]
-
-        # 交易类型, 日期, 分类, 子分类, 支出账户, 金额, 成员, 商家, 项目, 备注
-        ws.cell(row=row, column=1, value="支出")
-        ws.cell(row=row, column=2, value=transaction.date)
-        ws.cell(row=row, column=3, value=transaction.category)
-        ws.cell(row=row, column=4, value=transaction.subcategory)
-        ws.cell(row=row, column=5, value=transaction.account)
-        ws.cell(row=row, column=6, value=transaction.amount)
-        ws.cell(row=row, column=7, value="")  # 成员
-        ws.cell(row=row, column=8, value=getattr(transaction, 'merchant', None) or "")
-        ws.cell(row=row, column=9, value="")  # 项目
-        ws.cell(row=row, column=10, value=transaction.description or "")
-
-        self.sheet_rows["支出"] += 1
+        tx_type = transaction.transaction_type
+        return tx_type if tx_type in ("收入", "转账") else "支出"
 
-    def _add_income(self, transaction: Transaction):
+    @staticmethod
+    def row_values(transaction: Transaction, sheet_name: str) -> list:
         """
-        添加收入记录
+        交易记录在指定Sheet中的一行单元格值
         """
-        ws = self.sheets["收入"]
-        row = self.sheet_rows["收入"]
+        merchant = getattr(transaction, 'merchant', None) or ""
+        description = transaction.description or ""
 
-        # 交易类型, 日期, 分类, 子分类, 收入账户, 金额, 成员, 商家, 项目, 备注
-        ws.cell(row=row, column=1, value="收入")
-        ws.cell(row=row, column=2, value=transaction.date)
-        ws.cell(row=row, column=3, value=transaction.category)
-        ws.cell(row=row, column=4, value=transaction.subcategory)
-        ws.cell(row=row, column=5, value=transaction.account)
-        ws.cell(row=row, column=6, value=transaction.amount)
-        ws.cell(row=row, column=7, value="")  # 成员
-        ws.cell(row=row, column=8, value=getattr(transaction, 'merchant', None) or "")
-        ws.cell(row=row, column=9, value="")  # 项目
-        ws.cell(row=row, column=10, value=transaction.description or "")
+        if sheet_name == "转账":
+            # 交易类型, 日期, 转出账户, 转入账户, 金额, 成员, 商家, 项目, 备注
+            return ["转账", transaction.date, transaction.account, transaction.transfer_to_account or "",
+                    transaction.amount, "", merchant, "", description]
 
-        self.sheet_rows["收入"] += 1
+        # 交易类型, 日期, 分类, 子分类, 支出/收入账户, 金额, 成员, 商家, 项目, 备注
+        return [sheet_name, transaction.date, transaction.category, transaction.subcategory,
+                transaction.account, transaction.amount, "", merchant, "", description]
 
-    def _add_transfer(self, transaction: Transaction):
+    def add_transaction(self, transaction: Transaction):
         """
-        添加转账记录
+        添加交易记录到对应的Sheet
         """
-        ws = self.sheets["转账"]
-        row = self.sheet_rows["转账"]
+        if not self.sheets:
+            raise Exception("请先创建工作簿")
+
+        sheet_name = self.sheet_for(transaction)
+        ws = self.sheets[sheet_name]
+        row = self.sheet_rows[sheet_name]
 
-        # 交易类型, 日期, 转出账户, 转入账户, 金额, 成员, 商家, 项目, 备注
-        ws.cell(row=row, column=1, value="转账")
-        ws.cell(row=row, column=2, value=transaction.date)
-        ws.cell(row=row, column=3, value=transaction.account)  # 转出账户
-        ws.cell(row=row, column=4, value=transaction.transfer_to_account or "")  # 转入账户
-        ws.cell(row=row, column=5, value=transaction.amount)
-        ws.cell(row=row, column=6, value="")  # 成员
-        ws.cell(row=row, column=7, value=getattr(transaction, 'merchant', None) or "")
-        ws.cell(row=row, column=8, value="")  # 项目
-        ws.cell(row=row, column=9, value=transaction.description or "")
+        if self.write_only:
+            ws.append(self.row_values(transaction, sheet_name))
+        else:
+            for col, value in enumerate(self.row_values(transaction, sheet_name), 1):
+                ws.cell(row=row, column=col, value=value)
 
-        self.sheet_rows["转账"] += 1
+        self.sheet_rows[sheet_name] += 1
 
-    def add_transactions(self, transactions: List[Transaction]):
+    def add_transactions(self, transactions: Iterable[Transaction]):
         """
         批量添加交易记录
         """
@@ -225,17 +238,38 @@ class ExcelGenerator:
             os.makedirs(output_dir, exist_ok=True)
 
         try:
-            self.workbook.save(output_path)
+            # 固定文档属性和压缩包条目的时间戳，相同交易生成逐字节相同的文件
+            self.workbook.properties.created = FIXED_TIMESTAMP
+            self.workbook.properties.modified = FIXED_TIMESTAMP
+            archive = _FixedTimeZipFile(output_path, 'w', ZIP_DEFLATED, allowZip64=True)
+            ExcelWriter(self.workbook, archive).save()
             print(f"成功保存文件：{output_path}")
         except Exception as e:
             raise Exception(f"保存文件失败：{e}")
 
+    def write_table(self, table: TransactionTable, output_path: str) -> Dict[str, int]:
+        """
+        写出列式表中的交易记录，返回各Sheet的记录数
+        """
+        return self.write_chunks([table], output_path)
+
+    def write_chunks(self, chunks: Iterable[TransactionTable], output_path: str) -> Dict[str, int]:
+        """
+        逐块追加到同一个工作簿（只写模式下各行直接写入临时文件）
+        """
+        self._create_workbook()
+        for table in chunks:
+            self.add_transactions(table.iter_transactions())
+        self.save(output_path)
+        return {sheet_name: row - 2 for sheet_name, row in self.sheet_rows.items()}
+
     def generate(self, statement: BankStatement, output_path: str):
         """
         生成随手记Excel文件
+        流式账单（StreamingStatement）边解析边写入，各Sheet的计数在写入时累加
         """
         self._create_workbook()
-        self.add_transactions(statement.transactions)
+        self.add_transactions(statement.iter_transactions())
         self.save(output_path)
 
         # 统计各类型数量
@@ -243,7 +277,7 @@ class ExcelGenerator:
         income_count = self.sheet_rows["收入"] - 2
         transfer_count = self.sheet_rows["转账"] - 2
 
-        print(f"生成完成，共 {len(statement.transactions)} 条记录")
+        print(f"生成完成，共 {expense_count + income_count + transfer_count} 条记录")
         print(f"  支出: {expense_count} 条")
         print(f"  收入: {income_count} 条")
         print(f"  转账: {transfer_count} 条")
@@ -0,0 +1,239 @@
+"""
+本地交易账本
+merge.py --ledger 把最终合并结果写入本地 SQLite 账本（标准库 sqlite3），之后按时间范围、分类、账户汇总
+不必再打开合并文件或重新合并。
+
+每条交易以稳定指纹为主键：合并来源（合并文件路径）、日期、账户、金额、描述、商户，以及在本次合并结果中
+相同记录里的序号；重复合并时只更新分类等字段确有变化的记录，不产生重复记录。账本可存放多个合并来源，
+各来源的记录互不覆盖（同一交易出现在两个来源的合并结果中时各存一条），
+同一来源上次有、本次没有的记录（如之后被退款对冲或识别为转账的交易）在本次写入时删除。
+日期统一存为 YYYY-MM-DD（无法解析时为空），按日期、(账户, 日期)、(分类, 日期) 建索引
+
+用法: python ledger.py ledger.sqlite --period 2025Q3 --category 食品酒水
+"""
+import argparse
+import calendar
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter
+from datetime import date
+from itertools import repeat
+from typing import Iterator, List, Optional, Tuple
+
+# 添加src目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import format_cents
+from transaction_table import TransactionTable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,         -- 合并文件路径
+    merged_at TEXT NOT NULL,
+    rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    fingerprint TEXT PRIMARY KEY,
+    date TEXT,                    -- YYYY-MM-DD，日期无法解析时为空
+    date_text TEXT,               -- 合并结果中的原始日期
+    tx_type TEXT,
+    category TEXT,
+    subcategory TEXT,
+    account TEXT,
+    transfer_to TEXT,
+    cents INTEGER NOT NULL,
+    description TEXT,
+    merchant TEXT,
+    source TEXT NOT NULL,
+    run INTEGER NOT NULL          -- 新增或最近一次修改该记录的合并批次
+);
+CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS transactions_account_date ON transactions (account, date);
+CREATE INDEX IF NOT EXISTS transactions_category_date ON transactions (category, date);
+CREATE INDEX IF NOT EXISTS transactions_source_run ON transactions (source, run);
+"""
+
+# 已有记录只在分类等字段确有变化时更新（NULL 与 NULL 视为相同），未变化的记录不写入
+UPSERT = """
+INSERT INTO transactions (fingerprint, date, date_text, tx_type, category, subcategory, account, transfer_to,
+                          cents, description, merchant, source, run)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (fingerprint) DO UPDATE SET
+    tx_type = excluded.tx_type, category = excluded.category, subcategory = excluded.subcategory,
+    transfer_to = excluded.transfer_to, run = excluded.run
+WHERE tx_type IS NOT excluded.tx_type OR category IS NOT excluded.category
+   OR subcategory IS NOT excluded.subcategory OR transfer_to IS NOT excluded.transfer_to
+"""
+
+# 汇总维度 -> 分组表达式
+GROUPS = {
+    "category": "category",
+    "subcategory": "category || '-' || subcategory",
+    "account": "account",
+    "month": "substr(date, 1, 7)",
+    "type": "tx_type",
+}
+
+TYPES = ("支出", "收入", "转账")
+
+
+def connect(ledger_path: str) -> sqlite3.Connection:
+    """打开账本（不存在时创建）"""
+    directory = os.path.dirname(os.path.abspath(ledger_path))
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(ledger_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def fingerprints(table: TransactionTable, source: str) -> List[str]:
+    """
+    各行的稳定指纹：合并来源、日期、账户、金额分、描述、商户，加上该组合在表中（按行顺序）第几次出现；
+    合并结果按 (日期, 行来源) 排序，输入不变时同一交易的指纹不变，不同来源的指纹互不相同
+    """
+    seen = Counter()
+    result = []
+    for row in zip(repeat(source), table.date.tolist(), table.decode("account"), table.cents.tolist(),
+                   table.description.tolist(), table.merchant.tolist()):
+        key = "\x1f".join(str(value) if value is not None else "" for value in row)
+        seen[key] += 1
+        result.append(hashlib.blake2b(f"{key}\x1f{seen[key]}".encode("utf-8"), digest_size=16).hexdigest())
+    return result
+
+
+def _rows(table: TransactionTable, keys: List[str], source: str, run: int) -> Iterator[tuple]:
+    """账本行（与 UPSERT 的列顺序相同），keys 为各行指纹"""
+    # 日期序数 -> YYYY-MM-DD（同一日期只转换一次）
+    days = {date_ord: date.fromordinal(date_ord).isoformat() if date_ord > 0 else None
+            for date_ord in set(table.date_ord.tolist())}
+    return zip(keys, map(days.get, table.date_ord.tolist()), table.date.tolist(),
+               table.decode("tx_type"), table.decode("category"), table.decode("subcategory"),
+               table.decode("account"), table.decode("transfer_to"), table.cents.tolist(),
+               table.description.tolist(), table.merchant.tolist(), repeat(source), repeat(run))
+
+
+def update_ledger(ledger_path: str, table: TransactionTable, source: str) -> Tuple[int, int, int]:
+    """
+    把合并结果写入账本，返回 (新增, 更新, 删除) 条数
+    source 为合并来源（合并文件路径），该来源本次没有的旧记录被删除；
+    已有记录只在类型、分类、子分类或转账目标变化时更新并计数
+    """
+    source = os.path.abspath(source)
+    conn = connect(ledger_path)
+    try:
+        with conn:
+            run = conn.execute("INSERT INTO runs (source, merged_at, rows) VALUES (?, datetime('now', 'localtime'), ?)",
+                               (source, len(table))).lastrowid
+            keys = fingerprints(table, source)
+            before = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+            # 新增与确有变化的更新各计 1 行，未变化的记录不计
+            written = conn.executemany(UPSERT, _rows(table, keys, source, run)).rowcount
+            # 同一来源本次没有出现的旧记录
+            stale = {key for key, in conn.execute("SELECT fingerprint FROM transactions WHERE source = ?", (source,))}
+            stale.difference_update(keys)
+            deleted = conn.executemany("DELETE FROM transactions WHERE fingerprint = ?", zip(stale)).rowcount
+            after = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    finally:
+        conn.close()
+    inserted = after - before + deleted
+    return inserted, written - inserted, deleted
+
+
+def period_range(period: str) -> Tuple[str, str]:
+    """
+    周期 -> (起始日期, 结束日期)：2025 / 2025Q3 / 2025-07
+    """
+    match = re.fullmatch(r"(\d{4})(?:[Qq]([1-4])|-(\d{1,2}))?", period)
+    if not match:
+        raise ValueError(f"无法识别的周期: {period}（示例: 2025、2025Q3、2025-07）")
+    year = int(match.group(1))
+    if match.group(2):
+        first = (int(match.group(2)) - 1) * 3 + 1
+        last = first + 2
+    elif match.group(3):
+        first = last = int(match.group(3))
+        if not 1 <= first <= 12:
+            raise ValueError(f"无法识别的周期: {period}（月份应为 1-12）")
+    else:
+        first, last = 1, 12
+    end_day = calendar.monthrange(year, last)[1]
+    return date(year, first, 1).isoformat(), date(year, last, end_day).isoformat()
+
+
+def query_totals(conn: sqlite3.Connection, start: Optional[str] = None, end: Optional[str] = None,
+                 tx_type: Optional[str] = None, category: Optional[str] = None, account: Optional[str] = None,
+                 by: str = "category") -> List[Tuple[Optional[str], int, int]]:
+    """
+    按时间范围（含两端）与条件汇总，返回 [(分组, 笔数, 金额分)]：按月份汇总时按月份排列，其他按金额从大到小
+    tx_type / category / account 为 None 时不按该项筛选
+    """
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("date >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("date <= ?")
+        params.append(end)
+    for column, value in (("tx_type", tx_type), ("category", category), ("account", account)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = "1" if by == "month" else "3 DESC, 1"
+    sql = f"SELECT {GROUPS[by]}, COUNT(*), SUM(cents) FROM transactions {where} GROUP BY 1 ORDER BY {order}"
+    return conn.execute(sql, params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="查询本地交易账本：按时间范围和分类/账户/月份汇总金额",
+        epilog="示例: python ledger.py ledger.sqlite --period 2025Q3 --category 食品酒水"
+               "\n      python ledger.py ledger.sqlite --from 2025-01-01 --to 2025-06-30 --by month"
+               "\n      python ledger.py ledger.sqlite --period 2025 --type 收入 --by account",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("ledger_path", help="账本文件（merge.py --ledger 写出）")
+    parser.add_argument("--period", default=None, help="周期：年（2025）、季度（2025Q3）或月（2025-07）")
+    parser.add_argument("--from", dest="start", default=None, help="起始日期 YYYY-MM-DD（含）")
+    parser.add_argument("--to", dest="end", default=None, help="结束日期 YYYY-MM-DD（含）")
+    parser.add_argument("--type", choices=TYPES, default=None, help="只统计该交易类型（默认全部类型）")
+    parser.add_argument("--category", default=None, help="只统计该分类")
+    parser.add_argument("--account", default=None, help="只统计该账户")
+    parser.add_argument("--by", choices=GROUPS, default="category",
+                        help="汇总维度：category（默认）、subcategory、account、month、type")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.ledger_path):
+        print(f"错误: 账本不存在 {args.ledger_path}")
+        sys.exit(1)
+
+    start, end = args.start, args.end
+    if args.period is not None:
+        try:
+            start, end = period_range(args.period)
+        except ValueError as e:
+            print(f"错误: {e}")
+            sys.exit(1)
+
+    conn = connect(args.ledger_path)
+    try:
+        began = time.perf_counter()
+        totals = query_totals(conn, start, end, args.type, args.category, args.account, args.by)
+        elapsed = time.perf_counter() - began
+    finally:
+        conn.close()
+
+    print(f"=== {args.type or '全部交易'}汇总（{start or '最早'} 至 {end or '最新'}） ===")
+    for name, count, cents in totals:
+        print(f"  {name or '(空)'}: {format_cents(cents)}（{count} 笔）")
+    print(f"  合计: {format_cents(sum(cents for _, _, cents in totals))}（{sum(count for _, count, _ in totals)} 笔）")
+    print(f"  查询耗时: {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
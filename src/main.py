@@ -2,14 +2,26 @@
 主程序入口
 处理账单文件并生成随手记Excel
 """
+import argparse
+import io
 import os
 import sys
 import re
-from typing import Optional
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stderr, redirect_stdout
+from typing import List, Optional, Tuple
 from parsers import CCBParser, CCBCreditParser, CCBDebitParser, ABCParser, BOCParser, CITICParser, CMBParser, WeChatParser, AlipayParser
 from parsers.spdb_parser import SPDBParser
-from excel_generator import ExcelGenerator
-from models import BankStatement
+from base_parser import BaseParser
+from manifest import ConversionManifest, config_fingerprint
+from merge import transactions_as_read
+from models import BankStatement, StreamingStatement
+from scheduler import CostLog, estimate_cost, longest_first, split_ranges
+from sidecar import file_sha256, sidecar_path_for, write_sidecar
+from writers import FORMATS, get_writer
 
 
 def check_virtual_environment():
@@ -51,13 +63,46 @@ FILE_PATTERNS = [
 ]
 
 
+def output_filename_for(input_path: str, extension: str = ".xlsx") -> str:
+    """
+    账单文件对应的随手记输出文件名（默认为Excel）
+    """
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    return f"{base_name}_随手记{extension}"
+
+
 class SuiConverter:
     """
     随手记转换器主类
     """
 
-    def __init__(self):
-        self.generator = ExcelGenerator()
+    def __init__(self, fmt: Optional[str] = None, stream: bool = False):
+        # 输出写入器：默认随手记Excel，--format 可选 CSV/TSV/JSON Lines
+        self.writer = get_writer(fmt)
+        # 流式转换：支持的解析器（BaseParser.STREAMING）边解析边写出，不在内存中保留整份账单
+        self.stream = stream
+        # 解析器实例按类复用（解析器在 parse 之间不保存状态），避免重复加载分类配置
+        self._parsers = {}
+
+    @staticmethod
+    def route_file(file_path: str):
+        """
+        按文件名匹配规则返回 (解析器类, 描述)，无法识别时返回 None
+        """
+        filename = os.path.basename(file_path).lower()
+
+        for pattern, parser_class, desc in FILE_PATTERNS:
+            if re.search(pattern, filename, re.IGNORECASE):
+                return parser_class, desc
+        return None
+
+    def parser_instance(self, parser_class) -> BaseParser:
+        """
+        按类复用的解析器实例
+        """
+        if parser_class not in self._parsers:
+            self._parsers[parser_class] = parser_class()
+        return self._parsers[parser_class]
 
     def get_parser_for_file(self, file_path: str):
         """
@@ -66,10 +111,11 @@ class SuiConverter:
         filename = os.path.basename(file_path).lower()
 
         # 按文件名规则匹配
-        for pattern, parser_class, desc in FILE_PATTERNS:
-            if re.search(pattern, filename, re.IGNORECASE):
-                print(f"识别为: {desc}")
-                return parser_class()
+        route = self.route_file(file_path)
+        if route is not None:
+            parser_class, desc = route
+            print(f"识别为: {desc}")
+            return self.parser_instance(parser_class)
 
         # 未匹配，提示用户
         print(f"无法识别文件类型: {filename}")
@@ -87,9 +133,12 @@ class SuiConverter:
         print("  - 支付宝*.csv     → 支付宝")
         return None
 
-    def process_file(self, input_path: str, output_path: str) -> bool:
+    def parse_file(self, input_path: str, raw_lines: Optional[List[str]] = None) -> Optional[Tuple[BaseParser, BankStatement]]:
         """
-        处理单个账单文件
+        解析单个账单文件，返回 (解析器, 账单)
+        raw_lines 为已分段提取的PDF文本行（见 BaseParser.supports_page_split），此时不再读取文件
+        流式转换时返回 StreamingStatement，交易记录在写出时才逐页解析
+        无法识别、解析失败或没有交易记录时返回 None
         """
         print(f"\n{'=' * 60}")
         print(f"处理文件: {os.path.basename(input_path)}")
@@ -98,19 +147,56 @@ class SuiConverter:
         parser = self.get_parser_for_file(input_path)
 
         if parser is None:
-            return False
+            return None
 
         try:
-            statement = parser.parse(input_path)
+            if raw_lines is not None:
+                statement = parser.parse_lines(input_path, raw_lines)
+            elif self.stream and parser.STREAMING:
+                statement = parser.parse_stream(input_path)
+            else:
+                statement = parser.parse(input_path)
+            has_transactions = statement.has_transactions()
+        except Exception as e:
+            print(f"处理失败: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-            if statement.get_transaction_count() == 0:
-                print("警告: 未找到任何交易记录")
-                return False
+        if not has_transactions:
+            print("警告: 未找到任何交易记录")
+            return None
 
-            # 确保输出目录存在
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        return parser, statement
 
-            self.generator.generate(statement, output_path)
+    def write_outputs(self, input_path: str, output_path: str, parser: BaseParser, statement: BankStatement):
+        """
+        生成随手记Excel，并在旁边写出列式副本（供 merge.py 快速读取）
+        其他输出格式只写出数据文件；流式账单不保留交易记录，不写列式副本（merge.py 改为流式读取 xlsx）
+        """
+        # 确保输出目录存在
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+        self.writer.generate(statement, output_path)
+        if isinstance(statement, StreamingStatement):
+            # 删除上次非流式转换留下的副本，避免 merge.py 读到旧数据
+            if os.path.exists(sidecar_path_for(output_path)):
+                os.remove(sidecar_path_for(output_path))
+        elif self.writer.FORMAT == "xlsx":
+            write_sidecar(output_path, transactions_as_read(statement.transactions),
+                          parser.name, parser.VERSION, file_sha256(input_path))
+
+    def process_file(self, input_path: str, output_path: str, raw_lines: Optional[List[str]] = None) -> bool:
+        """
+        处理单个账单文件
+        """
+        parsed = self.parse_file(input_path, raw_lines)
+
+        if parsed is None:
+            return False
+
+        try:
+            self.write_outputs(input_path, output_path, *parsed)
             return True
 
         except Exception as e:
@@ -119,9 +205,11 @@ class SuiConverter:
             traceback.print_exc()
             return False
 
-    def process_directory(self, input_dir: str, output_dir: str):
+    def process_directory(self, input_dir: str, output_dir: str, jobs: int = 1, split_pages: int = 0):
         """
-        批量处理目录中的账单文件
+        批量处理目录中的账单文件（按文件名顺序）
+        jobs > 1 时由进程池并发转换：按预估耗时从长到短派发，各文件的控制台输出按文件名顺序整块打印；
+        split_pages > 0 时页数超过该值的 PDF 按每段 split_pages 页拆给多个进程提取文本
         """
         print(f"\n{'=' * 60}")
         print(f"批量处理目录: {input_dir}")
@@ -133,11 +221,20 @@ class SuiConverter:
 
         os.makedirs(output_dir, exist_ok=True)
 
+        # 转换清单：账单内容、解析器版本、配置都没有变化且输出仍存在的文件直接跳过
+        manifest = ConversionManifest(output_dir)
+        config_hash = config_fingerprint()
+        # 只有并发转换需要按预估耗时派发，串行时不预估、不记录耗时
+        cost_log = CostLog(output_dir) if jobs > 1 else None
+
         success_count = 0
         fail_count = 0
         skip_count = 0
+        cached_count = 0
+        seen = set()
+        pending = []  # (文件名, 账单路径, 输出路径, 清单记录, 预估耗时（串行时为 None）)
 
-        for filename in os.listdir(input_dir):
+        for filename in sorted(os.listdir(input_dir)):
             file_path = os.path.join(input_dir, filename)
 
             if not os.path.isfile(file_path):
@@ -147,11 +244,31 @@ class SuiConverter:
             if filename.startswith('.') or filename.startswith('~'):
                 continue
 
-            base_name = os.path.splitext(filename)[0]
-            output_filename = f"{base_name}_随手记.xlsx"
-            output_path = os.path.join(output_dir, output_filename)
-
-            result = self.process_file(file_path, output_path)
+            output_path = os.path.join(output_dir, output_filename_for(filename, self.writer.EXTENSION))
+            seen.add(filename)
+
+            route = self.route_file(file_path)
+            entry = None
+            if route is not None:
+                entry = manifest.make_entry(file_sha256(file_path), route[0], config_hash, output_path)
+                if manifest.is_fresh(filename, entry, self.writer.output_paths(output_path)):
+                    print(f"已是最新，跳过转换: {filename}")
+                    cached_count += 1
+                    continue
+
+            cost = estimate_cost(file_path, route[0] if route is not None else None) if jobs > 1 else None
+            pending.append((filename, file_path, output_path, entry, cost))
+
+        if jobs > 1 and len(pending) > 1:
+            results = self._convert_parallel(pending, jobs, split_pages)
+        else:
+            results = self._convert_serial(pending)
+
+        for (filename, _, _, entry, cost), (result, actual, parts) in zip(pending, results):
+            manifest.record(filename, entry if result else None)
+            if entry is not None and cost_log is not None:
+                print(f"耗时: 预估 {cost.estimated:.2f}s, 实际 {actual:.2f}s")
+                cost_log.record(filename, cost, actual, result, parts)
             if result:
                 success_count += 1
             elif result is False:
@@ -159,10 +276,203 @@ class SuiConverter:
             else:
                 skip_count += 1
 
+        manifest.prune(seen)
+        manifest.save()
+        if cost_log is not None:
+            cost_log.save()
+
         print(f"\n{'=' * 60}")
-        print(f"处理完成: 成功 {success_count}, 失败 {fail_count}, 跳过 {skip_count}")
+        print(f"处理完成: 成功 {success_count}, 失败 {fail_count}, 跳过 {skip_count}, 缓存 {cached_count}")
         print(f"{'=' * 60}")
 
+    def _convert_serial(self, pending: list):
+        """
+        按 pending 顺序逐个转换，产出 (结果, 实际耗时, 分段数)
+        """
+        for _, file_path, output_path, _, _ in pending:
+            start = time.perf_counter()
+            result = self.process_file(file_path, output_path)
+            yield result, time.perf_counter() - start, 1
+
+    def _convert_parallel(self, pending: list, jobs: int, split_pages: int = 0):
+        """
+        进程池并发转换，按 pending 顺序逐个产出 (结果, 实际耗时, 分段数) 并打印该文件的输出
+        输出到同一文件的账单（同名不同扩展名）放在同一任务中按顺序转换，与串行时后者覆盖前者一致；
+        任务按预估耗时从长到短提交，避免大文件排在最后拖长总耗时
+        拆分的 PDF 先由多个进程分段提取文本，全部完成后按页序拼接，再提交解析与生成任务
+        """
+        groups = {}
+        group_costs = {}
+        positions = []
+        for _, file_path, output_path, _, cost in pending:
+            group = groups.setdefault(output_path, [])
+            positions.append((output_path, len(group)))
+            group.append((file_path, output_path, None))
+            group_costs[output_path] = group_costs.get(output_path, 0.0) + cost.estimated
+
+        # 可拆分的 PDF：单文件任务、解析器支持按页提取、页数超过阈值
+        splits = {}
+        for _, file_path, output_path, _, cost in pending:
+            if len(groups[output_path]) > 1:
+                continue
+            route = self.route_file(file_path)
+            parser_class = route[0] if route is not None else None
+            ranges = split_ranges(parser_class, cost, split_pages)
+            if ranges is not None:
+                splits[output_path] = (parser_class, ranges)
+
+        order = list(groups)
+        order = [order[i] for i in longest_first([group_costs[output_path] for output_path in order])]
+        tasks = len(groups) + sum(len(ranges) - 1 for _, ranges in splits.values())
+        jobs = min(jobs, tasks)
+        print(f"并发转换（{jobs} 个进程）")
+        for output_path, (_, ranges) in splits.items():
+            print(f"拆分: {os.path.basename(groups[output_path][0][0])} 共 {ranges[-1][1]} 页，分 {len(ranges)} 段提取")
+
+        # 任一工作进程异常退出都会使整个进程池失效，其余未完成的任务也以 BrokenProcessPool 失败：
+        # 此时关闭该进程池，未完成的任务改为各自在单独的工作进程中重试（最多 jobs 个同时进行），
+        # 重试时再异常退出只影响该任务
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                       initargs=(self.writer.FORMAT, self.stream))
+        futures = {}
+        extracting = {}
+        extract_times = {}
+        retry_queue = []
+        retried = set()
+        isolated = {}
+
+        def pool_broken():
+            nonlocal executor
+            print("工作进程异常退出，未完成的文件改为逐个在单独的工作进程中重试")
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = None
+            for output_path in order:
+                future = futures.get(output_path)
+                if future is None or not future.done() or isinstance(future.exception(), BrokenProcessPool):
+                    futures.pop(output_path, None)
+                    extracting.pop(output_path, None)
+                    extract_times.pop(output_path, None)
+                    retry_queue.append(output_path)
+                    retried.add(output_path)
+
+        def run_isolated():
+            for output_path, single in list(isolated.items()):
+                if futures[output_path].done():
+                    single.shutdown(wait=False)
+                    del isolated[output_path]
+            while retry_queue and len(isolated) < jobs:
+                output_path = retry_queue.pop(0)
+                isolated[output_path] = ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                                                            initargs=(self.writer.FORMAT, self.stream))
+                futures[output_path] = isolated[output_path].submit(_convert_group, groups[output_path])
+
+        def submit_extracted():
+            # 分段提取全部完成的文件提交解析任务；任一段失败时改为整文件转换（由工作进程报告错误），
+            # 进程池失效时抛出 BrokenProcessPool，由调用方改为逐个重试
+            for output_path, range_futures in list(extracting.items()):
+                if not all(future.done() for future in range_futures):
+                    continue
+                del extracting[output_path]
+                file_path = groups[output_path][0][0]
+                try:
+                    parts = [future.result() for future in range_futures]
+                except BrokenProcessPool:
+                    raise
+                except Exception:
+                    futures[output_path] = executor.submit(_convert_group, groups[output_path])
+                    continue
+                extract_times[output_path] = sum(elapsed for _, elapsed in parts)
+                raw_lines = [line for lines, _ in parts for line in lines]
+                futures[output_path] = executor.submit(_convert_group, [(file_path, output_path, raw_lines)])
+
+        try:
+            try:
+                for output_path in order:
+                    if output_path in splits:
+                        parser_class, ranges = splits[output_path]
+                        file_path = groups[output_path][0][0]
+                        extracting[output_path] = [executor.submit(_extract_pages, parser_class, file_path, start, stop)
+                                                   for start, stop in ranges]
+                    else:
+                        futures[output_path] = executor.submit(_convert_group, groups[output_path])
+            except BrokenProcessPool:
+                pool_broken()
+
+            for (filename, _, _, _, _), (output_path, index) in zip(pending, positions):
+                while True:
+                    try:
+                        if executor is not None:
+                            submit_extracted()
+                    except BrokenProcessPool:
+                        pool_broken()
+                    run_isolated()
+                    future = futures.get(output_path)
+                    if future is not None and future.done():
+                        if output_path in retried or not isinstance(future.exception(), BrokenProcessPool):
+                            break
+                        pool_broken()
+                        continue
+                    waiting = [f for range_futures in extracting.values() for f in range_futures]
+                    waiting += [futures[isolated_path] for isolated_path in isolated]
+                    if future is not None:
+                        waiting.append(future)
+                    wait(waiting, return_when=FIRST_COMPLETED)
+
+                try:
+                    result, output, actual = future.result()[index]
+                except BrokenProcessPool:
+                    result, output, actual = False, f"\n处理文件: {filename}\n处理失败（工作进程异常退出）\n", 0.0
+                except Exception as e:
+                    # 任务本身出错（如参数无法传给工作进程），只影响该任务
+                    result, output, actual = False, f"\n处理文件: {filename}\n处理失败（工作进程异常）: {e}\n", 0.0
+                parts = 1
+                if output_path in extract_times:
+                    actual += extract_times[output_path]
+                    parts = len(splits[output_path][1])
+                print(output, end="")
+                yield result, actual, parts
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            for single in isolated.values():
+                single.shutdown(cancel_futures=True)
+
+
+# 并发转换时每个工作进程持有一个转换器，解析器实例在进程内复用
+_worker_converter: Optional[SuiConverter] = None
+
+
+def _init_worker(fmt: str, stream: bool):
+    global _worker_converter
+    _worker_converter = SuiConverter(fmt, stream)
+
+
+def _convert_group(tasks: List[Tuple[str, str, Optional[List[str]]]]) -> List[Tuple[bool, str, float]]:
+    """
+    工作进程：依次转换 (账单路径, 输出路径, 已提取的文本行)，返回每个文件的 (结果, 控制台输出, 耗时)
+    """
+    results = []
+    for file_path, output_path, raw_lines in tasks:
+        buffer = io.StringIO()
+        start = time.perf_counter()
+        with redirect_stdout(buffer), redirect_stderr(buffer):
+            try:
+                result = _worker_converter.process_file(file_path, output_path, raw_lines)
+            except Exception:
+                traceback.print_exc()
+                result = False
+        results.append((result, buffer.getvalue(), time.perf_counter() - start))
+    return results
+
+
+def _extract_pages(parser_class, file_path: str, start: int, stop: int) -> Tuple[List[str], float]:
+    """
+    工作进程：提取 PDF 第 start 到 stop-1 页的文本行，返回 (文本行, 耗时)
+    """
+    began = time.perf_counter()
+    lines = _worker_converter.parser_instance(parser_class).extract_page_lines(file_path, start, stop)
+    return lines, time.perf_counter() - began
+
 
 def main():
     """
@@ -170,14 +480,30 @@ def main():
     """
     check_virtual_environment()
 
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="随手记账单格式转换工具")
+    parser.add_argument("input_path", nargs="?", help="账单文件或目录")
+    parser.add_argument("output_dir", nargs="?", default="output", help="输出目录（默认 output）")
+    parser.add_argument("--jobs", type=int, default=1, help="批量处理目录时的并发进程数（默认 1，串行）")
+    parser.add_argument("--split-pages", type=int, default=0,
+                        help="并发转换时把页数超过 N 的 PDF 按每段 N 页拆给多个进程提取（默认 0，不拆分）")
+    parser.add_argument("--format", choices=FORMATS, default="xlsx",
+                        help="输出格式：xlsx（随手记Excel，默认）、csv/tsv（每个Sheet一个文件）、jsonl")
+    parser.add_argument("--stream", action="store_true",
+                        help="流式转换：逐页解析并直接写出，内存占用不随账单大小增长（农行、宁波银行、建行储蓄卡PDF）")
+    args = parser.parse_args()
+
+    if args.input_path is None:
         print("随手记账单格式转换工具")
         print("=" * 40)
         print("\n使用方法:")
-        print("  python src/main.py <输入文件/目录> [输出目录]")
+        print("  python src/main.py <输入文件/目录> [输出目录] [--jobs N] [--split-pages N] [--format xlsx|csv|tsv|jsonl] [--stream]")
         print("\n示例:")
         print("  python src/main.py input/农行-xxx.pdf output/")
         print("  python src/main.py input/ output/")
+        print("  python src/main.py input/ output/ --jobs 4")
+        print("  python src/main.py input/ output/ --jobs 4 --split-pages 20")
+        print("  python src/main.py input/ output/ --format csv")
+        print("  python src/main.py input/农行-xxx.pdf output/ --stream")
         print("\n文件命名规则:")
         print("  农行*.pdf       → 农业银行储蓄卡")
         print("  浦发*.pdf       → 浦发信用卡")
@@ -192,18 +518,16 @@ def main():
         print("  支付宝*.csv     → 支付宝")
         return
 
-    input_path = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "output"
+    input_path = args.input_path
+    output_dir = args.output_dir
 
-    converter = SuiConverter()
+    converter = SuiConverter(args.format, args.stream)
 
     if os.path.isfile(input_path):
-        base_name = os.path.splitext(os.path.basename(input_path))[0]
-        output_filename = f"{base_name}_随手记.xlsx"
-        output_path = os.path.join(output_dir, output_filename)
+        output_path = os.path.join(output_dir, output_filename_for(input_path, converter.writer.EXTENSION))
         converter.process_file(input_path, output_path)
     elif os.path.isdir(input_path):
-        converter.process_directory(input_path, output_dir)
+        converter.process_directory(input_path, output_dir, jobs=args.jobs, split_pages=args.split_pages)
     else:
         print(f"错误: {input_path} 不是有效的文件或目录")
 
@@ -0,0 +1,76 @@
+"""
+转换清单模块
+在输出目录保存 .sui_manifest.json，记录每个账单文件的内容哈希、解析器及版本、配置哈希和生成的文件，
+SuiConverter.process_directory 据此跳过没有变化的账单
+"""
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from config_loader import CONFIG_DIR
+from sidecar import file_sha256
+
+MANIFEST_NAME = ".sui_manifest.json"
+
+# 清单格式版本
+MANIFEST_VERSION = 1
+
+def config_fingerprint(config_dir: str = CONFIG_DIR) -> str:
+    """配置目录下所有 JSON 文件（文件名 + 内容）的 SHA-256"""
+    digest = hashlib.sha256()
+    if os.path.isdir(config_dir):
+        for filename in sorted(os.listdir(config_dir)):
+            if filename.endswith(".json"):
+                digest.update(filename.encode("utf-8"))
+                digest.update(file_sha256(os.path.join(config_dir, filename)).encode("ascii"))
+    return digest.hexdigest()
+
+
+class ConversionManifest:
+    """
+    转换清单：{账单文件名: {"sha256", "parser", "parser_version", "config", "output"}}
+    """
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries: Dict[str, dict] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def make_entry(source_hash: str, parser_class, config_hash: str, output_path: str) -> dict:
+        return {
+            "sha256": source_hash,
+            "parser": parser_class.__name__,
+            "parser_version": parser_class.VERSION,
+            "config": config_hash,
+            "output": os.path.basename(output_path),
+        }
+
+    def is_fresh(self, filename: str, entry: dict, output_paths: List[str]) -> bool:
+        """记录与当前一致且输出文件都仍存在时，无需重新转换"""
+        return self.entries.get(filename) == entry and all(os.path.exists(path) for path in output_paths)
+
+    def record(self, filename: str, entry: Optional[dict]):
+        """记录转换成功的文件；entry 为 None 时移除（转换失败）"""
+        if entry is None:
+            self.entries.pop(filename, None)
+        else:
+            self.entries[filename] = entry
+
+    def prune(self, filenames):
+        """移除已不在输入目录中的账单记录"""
+        self.entries = {name: entry for name, entry in self.entries.items() if name in filenames}
+
+    def save(self):
+        """写出清单（先写临时文件再替换）"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
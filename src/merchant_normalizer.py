@@ -0,0 +1,114 @@
+"""
+商户名称标准化模块
+退款对冲按商户匹配消费：merge.py 用标准化商户作索引键，信用卡解析器从描述中提取商户。
+规则（支付渠道前缀、退款后缀、各银行的提取规则）保存在 config/merchant_rules.json，
+正则在加载时编译一次；同一文本的结果用 LRU 缓存，输出经 sys.intern 驻留，
+相同商户得到同一个字符串对象，索引查找时的相等比较退化为身份比较
+"""
+import re
+import sys
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+from config_loader import config_path, load_json_config
+
+RULES_PATH = config_path("merchant_rules.json")
+
+# 每个标准化器缓存的文本数
+MEMO_SIZE = 1 << 16
+
+
+def load_rules() -> dict:
+    """
+    加载商户标准化规则
+    """
+    return load_json_config(RULES_PATH, "商户名称不做标准化")
+
+
+def _words_pattern(words: List[str]) -> Optional[re.Pattern]:
+    """关键词列表 -> 匹配任一关键词的正则（列表为空时为 None）"""
+    return re.compile("|".join(map(re.escape, words))) if words else None
+
+
+class MerchantKey:
+    """
+    合并阶段的商户索引键：商户名（为空时用描述）去掉消费/退款等前缀和空白分隔符后转小写
+    """
+
+    def __init__(self, rules: dict):
+        key_rules = rules.get("merge_key", {})
+        self.strip_prefix = re.compile(key_rules["strip_prefix"]) if key_rules.get("strip_prefix") else None
+        self.remove = re.compile(key_rules["remove"]) if key_rules.get("remove") else None
+        self._normalize_text = lru_cache(maxsize=MEMO_SIZE)(self._normalize)
+
+    def _normalize(self, text: str) -> str:
+        if self.strip_prefix is not None:
+            text = self.strip_prefix.sub('', text)
+        if self.remove is not None:
+            text = self.remove.sub('', text)
+        return sys.intern(text.strip().lower())
+
+    def normalize(self, merchant: str, description: str) -> str:
+        """
+        标准化商户名称（优先使用商户名）；缓存按实际使用的文本命中
+        """
+        text = merchant if merchant else description
+        if not text:
+            return ""
+        return self._normalize_text(text)
+
+
+class MerchantExtractor:
+    """
+    信用卡解析器的商户提取：去掉支付渠道前缀，按银行的提取规则截取商户名，再去掉退款/退货/撤销字样
+    """
+
+    def __init__(self, rules: dict, parser_name: str):
+        parser_rules = rules.get("parsers", {}).get(parser_name, {})
+        self.prefixes: Tuple[str, ...] = tuple(parser_rules.get("channel_prefixes", ()))
+        # 渠道前缀的去除方式：replace 删除所有出现处，startswith 只去掉开头，split 取最后一次出现之后的部分
+        self.prefix_mode: str = parser_rules.get("prefix_mode", "replace")
+        self.extract: List[Tuple[Optional[str], re.Pattern]] = [
+            (rule.get("if_contains"), re.compile(rule["pattern"])) for rule in parser_rules.get("extract", ())
+        ]
+        self.refund_words = _words_pattern(rules.get("refund_words", []))
+        self.extract_merchant: Callable[[str], str] = lru_cache(maxsize=MEMO_SIZE)(self._extract)
+
+    def _strip_prefix(self, description: str) -> str:
+        for prefix in self.prefixes:
+            if self.prefix_mode == "startswith":
+                if description.startswith(prefix):
+                    return description[len(prefix):]
+            elif prefix in description:
+                if self.prefix_mode == "split":
+                    return description.split(prefix)[-1]
+                return description.replace(prefix, '')
+        return description
+
+    def _extract(self, description: str) -> str:
+        description = self._strip_prefix(description)
+
+        for marker, pattern in self.extract:
+            if marker is not None and marker not in description:
+                continue
+            match = pattern.search(description)
+            if match:
+                description = match.group(1)
+
+        if self.refund_words is not None:
+            description = self.refund_words.sub('', description)
+
+        return sys.intern(description.strip())
+
+
+@lru_cache(maxsize=None)
+def merchant_key() -> MerchantKey:
+    """合并阶段共用的商户索引键标准化器"""
+    return MerchantKey(load_rules())
+
+
+@lru_cache(maxsize=None)
+def merchant_extractor(parser_name: str) -> MerchantExtractor:
+    """指定解析器的商户提取器（同一进程内共用）"""
+    return MerchantExtractor(load_rules(), parser_name)
+
@@ -2,223 +2,218 @@
 合并处理脚本
 读取所有Excel文件，执行跨文件退款对冲和转账识别
 """
+import argparse
+import bisect
+import hashlib
+import io
 import os
 import sys
-import re
-from datetime import datetime, timedelta
-from typing import List, Tuple, Optional
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Dict, List, Set, Tuple, Optional, Union
+import numpy as np
 import openpyxl
 
 # 添加src目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from models import Transaction
+from models import Transaction, to_cents, format_cents, parse_date
+from transaction_table import TransactionTable, ORIGIN_ROUND_SHIFT
 from excel_generator import ExcelGenerator
+from xlsx_reader import XlsxStreamReader, UnsupportedWorkbook
+from sidecar import load_sidecar, file_sha256
+from merge_state import MergeState, state_path_for
+import accounts
+import merchant_normalizer
+import text_fields
+from accounts import ACCOUNTS_PATH, BANK, CREDIT, DEBIT, WALLET, account_registry, account_types
+from merchant_normalizer import RULES_PATH as MERCHANT_RULES_PATH, merchant_key
+from text_fields import FLAG_CREDIT_CARD, FLAG_REFUND, FLAG_REPAYMENT, TRANSFER_RULES_PATH, describe
+from split_output import PERIODS, index_path_for, parts_up_to_date, positive_int, write_split
+from summary import summary_path_for, write_summary
+from ledger import update_ledger
+from writers import FORMATS, get_writer
+
+
+# 账户类型见 config/accounts.json（accounts.py）：储蓄卡为转账来源，信用卡/钱包为转账目标
+TRANSFER_SOURCE = DEBIT
+TRANSFER_TARGET = CREDIT | WALLET
+
+# origin 低位（输入行号）掩码
+_ROW_MASK = (1 << ORIGIN_ROUND_SHIFT) - 1
+
+
+# 各sheet的列布局：字段 -> 列号（从0开始），与 ExcelGenerator 的列定义一一对应
+#   支出/收入: 交易类型(0), 日期(1), 分类(2), 子分类(3), 账户(4), 金额(5), 成员(6), 商家(7), 项目(8), 备注(9)
+#   转账: 交易类型(0), 日期(1), 转出账户(2), 转入账户(3), 金额(4), 成员(5), 商家(6), 项目(7), 备注(8)
+#   旧格式: 交易日期(0), 分类(1), 类型(2), 子分类(3), 支付账户(4), 金额(5), 成员(6), 商家(7), 项目(8), 备注(9)
+# 固定取值的字段用 fixed 给出；type 列为 None 表示交易类型取 fixed 中的值
+SHEET_SCHEMAS = {
+    "支出": {
+        "headers": ExcelGenerator.EXPENSE_COLUMNS,
+        "date": 1, "category": 2, "subcategory": 3, "account": 4, "amount": 5,
+        "merchant": 7, "description": 9, "type": None, "transfer_to": None,
+        "fixed": {"transaction_type": "支出"},
+    },
+    "收入": {
+        "headers": ExcelGenerator.INCOME_COLUMNS,
+        "date": 1, "category": 2, "subcategory": 3, "account": 4, "amount": 5,
+        "merchant": 7, "description": 9, "type": None, "transfer_to": None,
+        "fixed": {"transaction_type": "收入"},
+    },
+    "转账": {
+        "headers": ExcelGenerator.TRANSFER_COLUMNS,
+        "date": 1, "category": None, "subcategory": None, "account": 2, "amount": 4,
+        "merchant": 6, "description": 8, "type": None, "transfer_to": 3,
+        "fixed": {"transaction_type": "转账", "category": "转账", "subcategory": ""},
+    },
+}
 
-
-# 转账识别关键词映射
-TRANSFER_KEYWORDS = {
-    "中信": "中信信用卡",
-    "招商": "招商信用卡",
-    "浦发": "浦发信用卡",
-    "建行信用": "建行信用卡",
-    "建设银行信用": "建行信用卡",
-    "建行卡": "建行信用卡",
-    "花呗": "花呗",
-    "京东白条": "京东白条",
-    "微信": "微信",
-    "零钱": "微信",
-    "支付宝": "支付宝",
-    "余额宝": "支付宝",
-    "信用卡还款": None,  # 通用信用卡还款
-    "还款": None,
-    "跨行还款": None,  # 需要通过金额匹配确定目标
+LEGACY_SCHEMA = {
+    "headers": None,
+    "date": 0, "category": 1, "subcategory": 3, "account": 4, "amount": 5,
+    "merchant": 7, "description": 9, "type": 2, "transfer_to": None,
+    "fixed": {},
 }
 
-# 储蓄卡账户列表（转账来源）
-DEBIT_ACCOUNTS = ["农业银行", "宁波银行", "建行储蓄卡", "工商储蓄卡", "招商储蓄卡", "农村信用合作社"]
 
-# 信用卡/钱包账户列表（转账目标）
-CREDIT_ACCOUNTS = ["中信信用卡", "浦发信用卡", "招商信用卡", "建行信用卡", "信用卡", "花呗", "京东白条", "微信", "支付宝"]
+def _cell_text(row: tuple, col: Optional[int]) -> str:
+    """取单元格文本（列不存在或为空时为空字符串）"""
+    if col is None or col >= len(row):
+        return ""
+    return str(row[col] or "")
+
+
+def _row_to_transaction(row: tuple, schema: dict, legacy: bool = False) -> Transaction:
+    """按列布局把一行单元格值转为交易记录"""
+    fixed = schema["fixed"]
+    date_val = row[schema["date"]]
+    if isinstance(date_val, datetime):
+        date_str = date_val.strftime("%Y-%m-%d")
+    elif legacy:
+        date_str = str(date_val)
+    else:
+        date_str = str(date_val).split()[0] if date_val else ""
+
+    if legacy:
+        transaction_type = str(row[schema["type"]] or "支出")
+    else:
+        transaction_type = fixed["transaction_type"]
+
+    return Transaction(
+        date=date_str,
+        category=fixed.get("category", _cell_text(row, schema["category"])),
+        subcategory=fixed.get("subcategory", _cell_text(row, schema["subcategory"])),
+        account=_cell_text(row, schema["account"]),
+        amount_cents=to_cents(row[schema["amount"]]),
+        description=_cell_text(row, schema["description"]),
+        transaction_type=transaction_type,
+        transfer_to_account=_cell_text(row, schema["transfer_to"]) if schema["transfer_to"] is not None else None,
+        merchant=_cell_text(row, schema["merchant"]),
+    )
+
+
+def _rows_to_transactions(rows, schema: dict, legacy: bool = False) -> List[Transaction]:
+    """转换一个sheet的数据行（首列为空的行跳过）"""
+    return [_row_to_transaction(row, schema, legacy) for row in rows if row and row[0] is not None]
+
+
+def transactions_as_read(transactions: List[Transaction]) -> List[Transaction]:
+    """
+    不经过文件，得到 ExcelGenerator 写出后再由 read_excel_transactions 读回的交易记录
+    （按支出/收入/转账 sheet 分组，空字符串单元格读回为空值），供内存流水线与两阶段流程保持一致
+    """
+    rows = {sheet_name: [] for sheet_name in SHEET_SCHEMAS}
+    for transaction in transactions:
+        sheet_name = ExcelGenerator.sheet_for(transaction)
+        values = ExcelGenerator.row_values(transaction, sheet_name)
+        rows[sheet_name].append(tuple(None if value == "" else value for value in values))
+
+    result = []
+    for sheet_name, schema in SHEET_SCHEMAS.items():
+        result.extend(_rows_to_transactions(rows[sheet_name], schema))
+    return result
 
 
-def read_excel_transactions(file_path: str) -> List[Transaction]:
+def _read_fast(file_path: str) -> List[Transaction]:
     """
-    从Excel文件读取交易记录
-    支持新格式（3个Sheet：支出、收入、转账）
+    流式读取 ExcelGenerator 生成的文件
+    sheet 名与表头须与 SHEET_SCHEMAS 完全一致、日期列为文本，否则抛出 UnsupportedWorkbook
     """
     transactions = []
-    try:
-        wb = openpyxl.load_workbook(file_path, read_only=True)
+    with XlsxStreamReader(file_path) as reader:
+        sheet_names = reader.sheetnames
+        if not sheet_names or not set(sheet_names) <= set(SHEET_SCHEMAS):
+            raise UnsupportedWorkbook(f"sheet 不符合生成格式: {sheet_names}")
 
+        for sheet_name, schema in SHEET_SCHEMAS.items():
+            if sheet_name not in sheet_names:
+                continue
+            rows = reader.iter_rows(sheet_name)
+            header = next(rows, None)
+            if header is None or header[:len(schema["headers"])] != schema["headers"]:
+                raise UnsupportedWorkbook(f"{sheet_name} 表头不符合生成格式")
+
+            date_col = schema["date"]
+            for row in rows:
+                if not row or row[0] is None:
+                    continue
+                # 数字日期需要按单元格样式转换为 datetime，交给 openpyxl 处理
+                if len(row) <= date_col or not isinstance(row[date_col], str):
+                    raise UnsupportedWorkbook(f"{sheet_name} 日期列不是文本")
+                transactions.append(_row_to_transaction(row, schema))
+    return transactions
+
+
+def _read_openpyxl(file_path: str) -> List[Transaction]:
+    """用 openpyxl 读取任意格式的文件（新格式3个Sheet或旧格式单Sheet）"""
+    transactions = []
+    wb = openpyxl.load_workbook(file_path, read_only=True)
+    try:
         # 检查是否是新格式（有支出/收入/转账 sheet）
         sheet_names = wb.sheetnames
-        is_new_format = "支出" in sheet_names or "收入" in sheet_names or "转账" in sheet_names
+        is_new_format = any(name in sheet_names for name in SHEET_SCHEMAS)
 
         if is_new_format:
-            # 新格式：读取3个sheet
-            transactions.extend(_read_expense_sheet(wb, sheet_names))
-            transactions.extend(_read_income_sheet(wb, sheet_names))
-            transactions.extend(_read_transfer_sheet(wb, sheet_names))
+            # 新格式：依次读取3个sheet
+            for sheet_name, schema in SHEET_SCHEMAS.items():
+                if sheet_name in sheet_names:
+                    rows = wb[sheet_name].iter_rows(min_row=2, values_only=True)
+                    transactions.extend(_rows_to_transactions(rows, schema))
         else:
             # 旧格式：读取单个活动sheet
-            transactions.extend(_read_legacy_sheet(wb))
-
+            rows = wb.active.iter_rows(min_row=2, values_only=True)
+            transactions.extend(_rows_to_transactions(rows, LEGACY_SCHEMA, legacy=True))
+    finally:
         wb.close()
-    except Exception as e:
-        print(f"读取文件失败 {file_path}: {e}")
-
     return transactions
 
 
-def _read_expense_sheet(wb, sheet_names: List[str]) -> List[Transaction]:
-    """读取支出sheet"""
-    transactions = []
-    if "支出" not in sheet_names:
-        return transactions
-
-    ws = wb["支出"]
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row[0] is None:
-            continue
-
-        # 支出格式: 交易类型(0), 日期(1), 分类(2), 子分类(3), 支出账户(4), 金额(5), 成员(6), 商家(7), 项目(8), 备注(9)
-        date_val = row[1]
-        if isinstance(date_val, datetime):
-            date_str = date_val.strftime("%Y-%m-%d")
-        else:
-            date_str = str(date_val).split()[0] if date_val else ""
-
-        amount = float(row[5]) if row[5] else 0.0
-
-        transaction = Transaction(
-            date=date_str,
-            category=str(row[2] or ""),
-            subcategory=str(row[3] or ""),
-            account=str(row[4] or ""),
-            amount=amount,
-            description=str(row[9] or "") if len(row) > 9 else "",
-            transaction_type="支出",
-            merchant=str(row[7] or "") if len(row) > 7 else "",
-        )
-        transactions.append(transaction)
-
-    return transactions
-
-
-def _read_income_sheet(wb, sheet_names: List[str]) -> List[Transaction]:
-    """读取收入sheet"""
-    transactions = []
-    if "收入" not in sheet_names:
-        return transactions
-
-    ws = wb["收入"]
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row[0] is None:
-            continue
-
-        # 收入格式: 交易类型(0), 日期(1), 分类(2), 子分类(3), 收入账户(4), 金额(5), 成员(6), 商家(7), 项目(8), 备注(9)
-        date_val = row[1]
-        if isinstance(date_val, datetime):
-            date_str = date_val.strftime("%Y-%m-%d")
-        else:
-            date_str = str(date_val).split()[0] if date_val else ""
-
-        amount = float(row[5]) if row[5] else 0.0
-
-        transaction = Transaction(
-            date=date_str,
-            category=str(row[2] or ""),
-            subcategory=str(row[3] or ""),
-            account=str(row[4] or ""),
-            amount=amount,
-            description=str(row[9] or "") if len(row) > 9 else "",
-            transaction_type="收入",
-            merchant=str(row[7] or "") if len(row) > 7 else "",
-        )
-        transactions.append(transaction)
-
-    return transactions
-
-
-def _read_transfer_sheet(wb, sheet_names: List[str]) -> List[Transaction]:
-    """读取转账sheet"""
-    transactions = []
-    if "转账" not in sheet_names:
-        return transactions
-
-    ws = wb["转账"]
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row[0] is None:
-            continue
-
-        # 转账格式: 交易类型(0), 日期(1), 转出账户(2), 转入账户(3), 金额(4), 成员(5), 商家(6), 项目(7), 备注(8)
-        date_val = row[1]
-        if isinstance(date_val, datetime):
-            date_str = date_val.strftime("%Y-%m-%d")
-        else:
-            date_str = str(date_val).split()[0] if date_val else ""
-
-        amount = float(row[4]) if row[4] else 0.0
-
-        transaction = Transaction(
-            date=date_str,
-            category="转账",
-            subcategory="",
-            account=str(row[2] or ""),  # 转出账户
-            amount=amount,
-            description=str(row[8] or "") if len(row) > 8 else "",
-            transaction_type="转账",
-            transfer_to_account=str(row[3] or ""),  # 转入账户
-            merchant=str(row[6] or "") if len(row) > 6 else "",
-        )
-        transactions.append(transaction)
-
-    return transactions
-
-
-def _read_legacy_sheet(wb) -> List[Transaction]:
-    """读取旧格式的单个sheet"""
-    transactions = []
-    ws = wb.active
-
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if row[0] is None:
-            continue
-
-        # 旧格式: 交易日期(0), 分类(1), 类型(2), 子分类(3), 支付账户(4), 金额(5), 成员(6), 商家(7), 项目(8), 备注(9)
-        date_val = row[0]
-        if isinstance(date_val, datetime):
-            date_str = date_val.strftime("%Y-%m-%d")
-        else:
-            date_str = str(date_val)
-
-        amount = float(row[5]) if row[5] else 0.0
-
-        transaction = Transaction(
-            date=date_str,
-            category=str(row[1] or ""),
-            subcategory=str(row[3] or ""),
-            account=str(row[4] or ""),
-            amount=amount,
-            description=str(row[9] or ""),
-            transaction_type=str(row[2] or "支出"),
-            merchant=str(row[7] or ""),
-        )
-        transactions.append(transaction)
-
-    return transactions
-
+def read_excel_transactions(file_path: str, fast: bool = True) -> List[Transaction]:
+    """
+    从Excel文件读取交易记录
+    支持新格式（3个Sheet：支出、收入、转账）和旧格式（单Sheet）
+    fast=True 时优先使用 main.py 写出的列式副本（见 sidecar.py），其次流式读取，
+    文件不符合生成格式时回退到 openpyxl
+    """
+    if fast:
+        table = load_sidecar(file_path)
+        if table is not None:
+            return table.to_transactions()
 
-def parse_date(date_str: str) -> Optional[datetime]:
-    """解析日期字符串"""
-    formats = ["%Y-%m-%d", "%Y/%m/%d", "%Y年%m月%d日"]
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except ValueError:
-            continue
-    return None
+    try:
+        if fast:
+            try:
+                return _read_fast(file_path)
+            except UnsupportedWorkbook:
+                pass
+        return _read_openpyxl(file_path)
+    except Exception as e:
+        print(f"读取文件失败 {file_path}: {e}")
+        return []
 
 
 def dates_within_range(date1: str, date2: str, days: int = 3) -> bool:
@@ -230,26 +225,17 @@ def dates_within_range(date1: str, date2: str, days: int = 3) -> bool:
     return abs((d1 - d2).days) <= days
 
 
-def amounts_match(amount1: float, amount2: float, tolerance: float = 0.01) -> bool:
-    """检查两个金额是否匹配（允许小误差）"""
-    return abs(amount1 - amount2) <= tolerance
+def amounts_match(cents1: int, cents2: int) -> bool:
+    """检查两个金额（整数分）是否相等"""
+    return cents1 == cents2
 
 
 def normalize_merchant(merchant: str, description: str) -> str:
     """
     标准化商户名称，用于匹配
-    从商户名或描述中提取关键信息
+    从商户名或描述中提取关键信息（规则见 config/merchant_rules.json，结果有缓存且已驻留）
     """
-    # 优先使用商户名
-    text = merchant if merchant else description
-    if not text:
-        return ""
-
-    # 移除常见前缀后缀
-    text = re.sub(r'^(消费|支付|转账|退款|退货)[:\-\s]*', '', text)
-    text = re.sub(r'[\s\-_]+', '', text)
-
-    return text.strip().lower()
+    return merchant_key().normalize(merchant, description)
 
 
 def is_masked_or_person_name(merchant: str) -> bool:
@@ -269,101 +255,135 @@ def is_masked_or_person_name(merchant: str) -> bool:
     return False
 
 
-def reconcile_refunds(transactions: List[Transaction]) -> List[Transaction]:
+Transactions = Union[List[Transaction], TransactionTable]
+
+
+def _as_table(transactions: Transactions) -> Tuple[TransactionTable, bool]:
+    """
+    统一转换为列式表，返回 (表, 输入是否为列表)
+    各阶段对列表输入返回列表，对表输入返回表
+    """
+    if isinstance(transactions, TransactionTable):
+        return transactions, False
+    return TransactionTable.from_transactions(transactions), True
+
+
+def _from_table(table: TransactionTable, as_list: bool) -> Transactions:
+    return table.to_transactions() if as_list else table
+
+
+def _ordinals_within(ord1: int, ord2: int, days: int) -> bool:
+    """两个日期序数是否在指定天数范围内（序数 0 表示日期无法解析）"""
+    return ord1 > 0 and ord2 > 0 and abs(ord1 - ord2) <= days
+
+
+def _console_text(text: str) -> str:
+    """控制台输出用：替换 GBK 无法显示的字符"""
+    return text.encode('gbk', errors='replace').decode('gbk')
+
+
+def refund_rows(table: TransactionTable) -> np.ndarray:
+    """
+    退款行（按行号顺序）：收入中分类/子分类或描述含"退款"的记录
+    """
+    incomes = np.flatnonzero(table.tx_type == table.code("收入"))
+    # 分类/子分类含"退款"的编码（取值只有几十种，逐个判断即可）
+    refund_codes = np.array([code for code, text in enumerate(table.pool.strings) if "退款" in text.lower()],
+                            dtype=np.int32)
+    refund_label = np.isin(table.category, refund_codes) | np.isin(table.subcategory, refund_codes)
+    return incomes[refund_label[incomes] | table.text_fields().has(FLAG_REFUND)[incomes]]
+
+
+def reconcile_refunds(transactions: Transactions) -> Transactions:
     """
     执行退款对冲
     第一轮：同商户 + 同金额（精确匹配）
     第二轮：脱敏/人名商户 + 同金额 + 日期接近（模糊匹配）
     结果：匹配成功的消费和退款都删除
+
+    两轮都按 (商户, 金额分) / 金额分 建索引，每笔退款只扫描同金额的消费；
+    同一索引桶内按原顺序取第一条未删除的消费，与逐条比较的结果一致
     """
     print("\n=== 开始退款对冲 ===")
+    table, as_list = _as_table(transactions)
 
     # 分离支出和收入（退款）
-    expenses = []  # (index, transaction)
-    refunds = []   # (index, transaction)
-
-    for i, t in enumerate(transactions):
-        if t.transaction_type == "支出":
-            expenses.append((i, t))
-        elif t.transaction_type == "收入":
-            # 检查是否是退款类型
-            desc_lower = (t.description or "").lower()
-            cat_lower = (t.category or "").lower()
-            subcat_lower = (t.subcategory or "").lower()
-            if "退款" in desc_lower or "退款" in cat_lower or "退款" in subcat_lower:
-                refunds.append((i, t))
-
-    # 记录要删除的索引
-    to_remove = set()
+    expenses = np.flatnonzero(table.tx_type == table.code("支出"))
+    refunds = refund_rows(table)
+    fields = table.text_fields()
+
+    # 记录要保留的行
+    keep = np.ones(len(table), dtype=bool)
     matched_count = 0
     fuzzy_matched_count = 0
 
+    # 消费索引：(标准化商户, 金额分) -> 行号队列；金额分 -> 行号列表
+    # 标准化商户已预先算好且经驻留，同一商户的键是同一个字符串对象，字典查找只需比较身份
+    merchant_keys = fields.merchant_key
+    by_merchant: Dict[Tuple[str, int], deque] = defaultdict(deque)
+    by_cents: Dict[int, List[int]] = defaultdict(list)
+    for i in expenses:
+        key = merchant_keys[i]
+        cents = int(table.cents[i])
+        if key:
+            by_merchant[(key, cents)].append(i)
+        by_cents[cents].append(i)
+
+    def describe(i) -> str:
+        return _console_text(table.merchant[i] or table.description[i][:20])
+
     # 第一轮：精确商户匹配
-    for ref_idx, refund in refunds:
-        if ref_idx in to_remove:
+    for ref_idx in refunds:
+        ref_merchant = merchant_keys[ref_idx]
+        if not ref_merchant:
             continue
 
-        ref_merchant = normalize_merchant(refund.merchant, refund.description)
-
-        for exp_idx, expense in expenses:
-            if exp_idx in to_remove:
-                continue
-
-            exp_merchant = normalize_merchant(expense.merchant, expense.description)
-
-            # 匹配条件：商户相似 + 金额相同
-            if ref_merchant and exp_merchant and ref_merchant == exp_merchant:
-                if amounts_match(refund.amount, expense.amount):
-                    desc = (expense.merchant or expense.description[:20]).encode('gbk', errors='replace').decode('gbk')
-                    print(f"  精确匹配: [{expense.date}] {desc} "
-                          f"{expense.amount} <-> [{refund.date}] 退款 {refund.amount}")
-                    to_remove.add(ref_idx)
-                    to_remove.add(exp_idx)
-                    matched_count += 1
-                    break
+        # 匹配条件：商户相同 + 金额相同；第一轮中消费只会从队首被匹配掉
+        candidates = by_merchant.get((ref_merchant, int(table.cents[ref_idx])))
+        if candidates:
+            exp_idx = candidates.popleft()
+            print(f"  精确匹配: [{table.date[exp_idx]}] {describe(exp_idx)} "
+                  f"{format_cents(table.cents[exp_idx])} <-> [{table.date[ref_idx]}] 退款 {format_cents(table.cents[ref_idx])}")
+            keep[ref_idx] = False
+            keep[exp_idx] = False
+            matched_count += 1
 
     # 第二轮：模糊匹配（针对脱敏商户名或人名）
-    for ref_idx, refund in refunds:
-        if ref_idx in to_remove:
+    for ref_idx in refunds:
+        if not keep[ref_idx]:
             continue
 
-        ref_merchant = refund.merchant or ""
+        ref_merchant = table.merchant[ref_idx] or ""
 
         # 只对脱敏商户名或人名进行模糊匹配
         if not is_masked_or_person_name(ref_merchant):
             continue
 
         # 按金额匹配 + 日期接近（±30天，因为退款可能很晚）
-        for exp_idx, expense in expenses:
-            if exp_idx in to_remove:
+        ref_ord = table.date_ord[ref_idx]
+        for exp_idx in by_cents.get(int(table.cents[ref_idx]), ()):
+            if not keep[exp_idx]:
                 continue
 
-            if amounts_match(refund.amount, expense.amount):
-                if dates_within_range(refund.date, expense.date, days=30):
-                    desc = (expense.merchant or expense.description[:20]).encode('gbk', errors='replace').decode('gbk')
-                    print(f"  模糊匹配: [{expense.date}] {desc} "
-                          f"{expense.amount} <-> [{refund.date}] 退款({ref_merchant}) {refund.amount}")
-                    to_remove.add(ref_idx)
-                    to_remove.add(exp_idx)
-                    fuzzy_matched_count += 1
-                    break
+            if _ordinals_within(ref_ord, table.date_ord[exp_idx], 30):
+                print(f"  模糊匹配: [{table.date[exp_idx]}] {describe(exp_idx)} "
+                      f"{format_cents(table.cents[exp_idx])} <-> [{table.date[ref_idx]}] 退款({ref_merchant}) {format_cents(table.cents[ref_idx])}")
+                keep[ref_idx] = False
+                keep[exp_idx] = False
+                fuzzy_matched_count += 1
+                break
 
     # 过滤掉已对冲的记录
-    result = [t for i, t in enumerate(transactions) if i not in to_remove]
+    result = table.filter(keep)
 
     print(f"退款对冲完成：精确匹配 {matched_count} 对，模糊匹配 {fuzzy_matched_count} 对")
-    print(f"  删除 {len(to_remove)} 条记录")
-    return result
-
-
-# 钱包（微信/支付宝）类转账语义标记：储蓄卡→钱包只有在这些语义下才算充值/转入，
-# 否则"财付通-微信支付-XX商户"/"支付宝-XX商户消费"这类经钱包的商户消费会被误判为转账
-WALLET_TRANSFER_MARKERS = ("充值", "转入", "零钱", "余额宝", "还款", "提现")
+    print(f"  删除 {len(table) - len(result)} 条记录")
+    return _from_table(result, as_list)
 
 
 def identify_transfer_target(description: str) -> Optional[str]:
     """
-    从描述中识别转账目标账户。
+    从描述中识别转账目标账户（规则见 config/transfer_rules.json，由 text_fields 编译为单次扫描）。
 
     信用卡/信贷类关键词（中信/招商/浦发/建行信用/花呗/京东白条/还款等）语义明确，直接命中。
     钱包类（微信/支付宝/零钱/余额宝）须同时出现转账语义标记（充值/转入/零钱/余额宝/还款/提现），
@@ -371,27 +391,58 @@ def identify_transfer_target(description: str) -> Optional[str]:
     """
     if not description:
         return None
+    return describe(description)[2]
 
-    desc_lower = description.lower()
-
-    # 信用卡/信贷类关键词（跳过钱包类，单独处理）
-    for keyword, target in TRANSFER_KEYWORDS.items():
-        if keyword in ("微信", "零钱", "支付宝", "余额宝"):
-            continue
-        if keyword.lower() in desc_lower:
-            return target
-
-    # 钱包类：须同时含转账语义标记才算充值/转入钱包
-    has_wallet = any(k in desc_lower for k in ("微信", "零钱", "支付宝", "余额宝"))
-    if has_wallet and any(m in desc_lower for m in WALLET_TRANSFER_MARKERS):
-        if "支付宝" in desc_lower or "余额宝" in desc_lower:
-            return "支付宝"
-        return "微信"
 
-    return None
+def transfer_row(table: TransactionTable, exp_idx: int, target: str, subcategory: str) -> Transaction:
+    """由储蓄卡支出生成转账记录"""
+    return Transaction(
+        date=table.date[exp_idx],
+        category="转账",
+        subcategory=subcategory,
+        account=table.text("account", exp_idx),
+        amount_cents=int(table.cents[exp_idx]),
+        description=table.description[exp_idx],
+        transaction_type="转账",
+        transfer_to_account=target,
+    )
 
 
-def identify_transfers(transactions: List[Transaction]) -> List[Transaction]:
+def transfer_candidates(table: TransactionTable) -> Tuple[List[Tuple[int, str]], List[int], np.ndarray]:
+    """
+    转账识别的候选（均按行号顺序）：
+    - 有明确目标的储蓄卡支出 [(行号, 目标账户)]（如"中信" → 中信信用卡）
+    - 含还款关键词（跨行还款/还款/信用卡）但无明确目标、需通过金额匹配确定目标的储蓄卡支出 [行号]
+    - 信用卡/钱包收入（还款）行号，包括来自信用卡解析器的 __REPAYMENT__ 标记（匹配后删除）
+    """
+    is_expense = table.tx_type == table.code("支出")
+    is_income = table.tx_type == table.code("收入")
+    is_repayment_marker = table.category == table.code("__REPAYMENT__")
+    # 跳过已被分类为按揭还款的交易（避免误识别为信用卡转账）
+    is_mortgage = (table.category == table.code("金融保险")) & (table.subcategory == table.code("按揭还款"))
+
+    with_target = []
+    need_match = []
+    types = account_types(table)
+    debit_expenses = ((types & TRANSFER_SOURCE) != 0) & is_expense & ~is_mortgage
+    fields = table.text_fields()
+    for i in np.flatnonzero(debit_expenses):
+        target = fields.transfer_target[i]
+        if target:
+            with_target.append((i, target))
+        elif fields.flags[i] & (FLAG_REPAYMENT | FLAG_CREDIT_CARD):
+            need_match.append(i)
+
+    credit_incomes = np.flatnonzero(is_income & (((types & TRANSFER_TARGET) != 0) | is_repayment_marker))
+    return with_target, need_match, credit_incomes
+
+
+def transfer_subcategory(target: str) -> str:
+    """转账子分类：转入钱包（支付宝/微信）为"充值"，其他为"还款"。"""
+    return "充值" if account_registry().is_type(target, WALLET) else "还款"
+
+
+def identify_transfers(transactions: Transactions) -> Transactions:
     """
     执行转账识别
     匹配条件：
@@ -403,241 +454,239 @@ def identify_transfers(transactions: List[Transaction]) -> List[Transaction]:
     新增：对于"跨行还款"等无明确目标的记录，通过金额+日期匹配信用卡还款记录来确定目标
     """
     print("\n=== 开始转账识别 ===")
+    table, as_list = _as_table(transactions)
+
+    debit_expenses_with_target, debit_expenses_need_match, credit_incomes = transfer_candidates(table)
+    is_repayment_marker = table.category == table.code("__REPAYMENT__")
+
+    # 收入索引：(账户, 金额分) -> 行号列表；金额分 -> 行号列表
+    incomes_by_account: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    incomes_by_cents: Dict[int, List[int]] = defaultdict(list)
+    for i in credit_incomes:
+        cents = int(table.cents[i])
+        incomes_by_account[(int(table.account[i]), cents)].append(i)
+        incomes_by_cents[cents].append(i)
+
+    def first_income(candidates, exp_idx):
+        """候选中第一条未删除、日期在±3天内的收入"""
+        exp_ord = table.date_ord[exp_idx]
+        for inc_idx in candidates:
+            if keep[inc_idx] and _ordinals_within(exp_ord, table.date_ord[inc_idx], 3):
+                return inc_idx
+        return None
 
-    # 分离储蓄卡支出（可能是转账）
-    debit_expenses_with_target = []  # (index, transaction, target) - 有明确目标
-    debit_expenses_need_match = []   # (index, transaction) - 需要通过匹配确定目标
-    credit_incomes = []  # (index, transaction)
-
-    for i, t in enumerate(transactions):
-        # 储蓄卡支出
-        if t.account in DEBIT_ACCOUNTS and t.transaction_type == "支出":
-            # 跳过已被分类为按揭还款的交易（避免误识别为信用卡转账）
-            if t.category == "金融保险" and t.subcategory == "按揭还款":
-                continue
-
-            target = identify_transfer_target(t.description)
-            if target:
-                # 有明确目标（如"中信" → 中信信用卡）
-                debit_expenses_with_target.append((i, t, target))
-            else:
-                # 检查是否含还款关键词但无明确目标
-                desc = (t.description or "").lower()
-                if "跨行还款" in desc or "还款" in desc or "信用卡" in desc:
-                    debit_expenses_need_match.append((i, t))
-
-        # 信用卡收入（还款）- 包括普通收入和特殊标记的还款记录
-        if t.account in CREDIT_ACCOUNTS and t.transaction_type == "收入":
-            credit_incomes.append((i, t))
-        # 特殊还款标记（来自信用卡解析器，用于匹配后删除）
-        elif t.category == "__REPAYMENT__" and t.transaction_type == "收入":
-            credit_incomes.append((i, t))
-
-    # 记录要删除的索引和新增的转账记录
-    to_remove = set()
+    # 记录要保留的行和新增的转账记录
+    keep = np.ones(len(table), dtype=bool)
     transfers = []
+    transfer_origins = []  # 转账记录的来源：轮次标记 | 来源支出的 origin
     matched_count = 0
 
     # 第一轮：处理有明确目标的转账
-    for exp_idx, expense, target in debit_expenses_with_target:
-        if exp_idx in to_remove:
-            continue
+    for exp_idx, target in debit_expenses_with_target:
+        account = table.text("account", exp_idx)
+        amount = format_cents(table.cents[exp_idx])
 
-        matched_income = False
+        # 尝试匹配目标账户的信用卡收入（金额和日期）
+        inc_idx = first_income(
+            incomes_by_account.get((table.code(target), int(table.cents[exp_idx])), ()), exp_idx
+        )
+        if inc_idx is not None:
+            print(f"  转账匹配: [{table.date[exp_idx]}] {account} -> {target} {amount}")
+            keep[inc_idx] = False
+        else:
+            # 如果没有匹配到信用卡收入，但有明确目标，仍标记为转账
+            print(f"  转账标记: [{table.date[exp_idx]}] {account} -> {target} {amount}")
 
-        # 尝试匹配信用卡收入
-        for inc_idx, income in credit_incomes:
-            if inc_idx in to_remove:
-                continue
+        transfers.append(transfer_row(table, exp_idx, target, transfer_subcategory(target)))
+        transfer_origins.append((1 << ORIGIN_ROUND_SHIFT) | table.origin[exp_idx])
+        keep[exp_idx] = False
+        matched_count += 1
 
-            # 检查是否是目标账户
-            if income.account != target:
-                continue
+    # 第二轮：处理需要通过金额匹配确定目标的转账（如"跨行还款"）
+    for exp_idx in debit_expenses_need_match:
+        account = table.text("account", exp_idx)
+        amount = format_cents(table.cents[exp_idx])
+
+        # 遍历同金额的信用卡收入，按日期匹配
+        inc_idx = first_income(incomes_by_cents.get(int(table.cents[exp_idx]), ()), exp_idx)
+        if inc_idx is not None:
+            target = table.text("account", inc_idx)
+            print(f"  跨行还款匹配: [{table.date[exp_idx]}] {account} -> {target} "
+                  f"{amount} (通过金额匹配)")
+            transfers.append(transfer_row(table, exp_idx, target, transfer_subcategory(target)))
+            keep[inc_idx] = False
+        else:
+            # 如果无法匹配但确实含有还款关键词，仍标记为转账到"信用卡"
+            print(f"  跨行还款(未匹配): [{table.date[exp_idx]}] {account} -> 信用卡 "
+                  f"{amount} (无法确定具体卡)")
+            transfers.append(transfer_row(table, exp_idx, "信用卡", "还款"))
 
-            # 检查金额和日期
-            if amounts_match(expense.amount, income.amount) and \
-               dates_within_range(expense.date, income.date):
-                print(f"  转账匹配: [{expense.date}] {expense.account} -> {income.account} "
-                      f"{expense.amount}")
-
-                # 确定子分类：支付宝/微信用"充值"，其他用"还款"
-                subcategory = "充值" if income.account in ["支付宝", "微信"] else "还款"
-
-                # 创建转账记录
-                transfer = Transaction(
-                    date=expense.date,
-                    category="转账",
-                    subcategory=subcategory,
-                    account=expense.account,
-                    amount=expense.amount,
-                    description=expense.description,
-                    transaction_type="转账",
-                    transfer_to_account=income.account,
-                )
-                transfers.append(transfer)
-
-                to_remove.add(exp_idx)
-                to_remove.add(inc_idx)
-                matched_count += 1
-                matched_income = True
-                break
+        transfer_origins.append((2 << ORIGIN_ROUND_SHIFT) | table.origin[exp_idx])
+        keep[exp_idx] = False
+        matched_count += 1
 
-        # 如果没有匹配到信用卡收入，但有明确目标，仍标记为转账
-        if not matched_income and exp_idx not in to_remove:
-            print(f"  转账标记: [{expense.date}] {expense.account} -> {target} "
-                  f"{expense.amount}")
-
-            subcategory = "充值" if target in ["支付宝", "微信"] else "还款"
-
-            transfer = Transaction(
-                date=expense.date,
-                category="转账",
-                subcategory=subcategory,
-                account=expense.account,
-                amount=expense.amount,
-                description=expense.description,
-                transaction_type="转账",
-                transfer_to_account=target,
-            )
-            transfers.append(transfer)
-
-            to_remove.add(exp_idx)
-            matched_count += 1
+    removed_count = len(table) - int(keep.sum())
 
-    # 第二轮：处理需要通过金额匹配确定目标的转账（如"跨行还款"）
-    for exp_idx, expense in debit_expenses_need_match:
-        if exp_idx in to_remove:
-            continue
+    # 过滤并添加转账记录
+    # 同时删除未匹配的 __REPAYMENT__ 标记记录（它们只是用于匹配的临时记录）
+    result = table.filter(keep & ~is_repayment_marker)
+    result.extend(transfers)
+    if transfers:
+        result.origin[-len(transfers):] = transfer_origins
 
-        matched = False
+    print(f"转账识别完成：{matched_count} 条识别，删除 {removed_count} 条原记录")
+    return _from_table(result, as_list)
 
-        # 遍历所有信用卡收入，按金额+日期匹配
-        for inc_idx, income in credit_incomes:
-            if inc_idx in to_remove:
-                continue
 
-            # 检查金额和日期
-            if amounts_match(expense.amount, income.amount) and \
-               dates_within_range(expense.date, income.date):
-                print(f"  跨行还款匹配: [{expense.date}] {expense.account} -> {income.account} "
-                      f"{expense.amount} (通过金额匹配)")
-
-                subcategory = "充值" if income.account in ["支付宝", "微信"] else "还款"
-
-                transfer = Transaction(
-                    date=expense.date,
-                    category="转账",
-                    subcategory=subcategory,
-                    account=expense.account,
-                    amount=expense.amount,
-                    description=expense.description,
-                    transaction_type="转账",
-                    transfer_to_account=income.account,
-                )
-                transfers.append(transfer)
-
-                to_remove.add(exp_idx)
-                to_remove.add(inc_idx)
-                matched_count += 1
-                matched = True
-                break
+def amount_shards(cents: np.ndarray, shards: int) -> np.ndarray:
+    """
+    各行所属的金额分片（0..shards-1）：金额分经乘法哈希打散，
+    整十/整百的金额也能均匀分布，同一金额总在同一分片
+    """
+    mixed = cents.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return ((mixed >> np.uint64(32)) % np.uint64(shards)).astype(np.int64)
 
-        # 如果无法匹配但确实含有还款关键词，仍标记为转账到"信用卡"
-        if not matched:
-            print(f"  跨行还款(未匹配): [{expense.date}] {expense.account} -> 信用卡 "
-                  f"{expense.amount} (无法确定具体卡)")
-
-            transfer = Transaction(
-                date=expense.date,
-                category="转账",
-                subcategory="还款",
-                account=expense.account,
-                amount=expense.amount,
-                description=expense.description,
-                transaction_type="转账",
-                transfer_to_account="信用卡",
-            )
-            transfers.append(transfer)
-
-            to_remove.add(exp_idx)
-            matched_count += 1
 
-    # 过滤并添加转账记录
-    # 同时删除未匹配的 __REPAYMENT__ 标记记录（它们只是用于匹配的临时记录）
-    result = [t for i, t in enumerate(transactions)
-              if i not in to_remove and t.category != "__REPAYMENT__"]
-    result.extend(transfers)
+def _match_shard(table: TransactionTable) -> Tuple[TransactionTable, str]:
+    """
+    工作进程：对一个金额分片执行退款对冲和转账识别，返回 (结果, 控制台输出)
+    """
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        result = identify_transfers(reconcile_refunds(table))
+    return result, buffer.getvalue()
 
-    print(f"转账识别完成：{matched_count} 条识别，删除 {len(to_remove)} 条原记录")
-    return result
+
+def refunds_and_transfers(table: TransactionTable, shards: Optional[int] = None,
+                          jobs: Optional[int] = None) -> TransactionTable:
+    """
+    执行退款对冲和转账识别
+
+    两个阶段只配对金额相同的交易：shards > 1 时按金额分哈希分片（各分片保持原有行顺序），
+    由进程池并发处理，结果按分片顺序拼接，各分片的控制台输出按分片顺序打印。
+    同一金额的行在结果中的相对顺序与串行执行相同，行来源（origin）也相同，
+    按 (日期, origin) 排序后与串行执行的结果一致
+    """
+    if not shards or shards <= 1:
+        return identify_transfers(reconcile_refunds(table))
+
+    shard_of = amount_shards(table.cents, shards)
+    parts = [table.filter(shard_of == k) for k in range(shards)]
+    parts = [part for part in parts if len(part)]
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(parts)))
+
+    print(f"\n=== 按金额分片执行退款对冲与转账识别（{len(parts)} 个分片，{jobs} 个进程） ===")
+    if jobs == 1:
+        results = [_match_shard(part) for part in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_match_shard, parts))
+
+    for k, (part, (result, output)) in enumerate(zip(parts, results), 1):
+        print(f"\n--- 金额分片 {k}/{len(parts)}：{len(part)} 条 -> {len(result)} 条 ---", end="")
+        print(output, end="")
+    return TransactionTable.concat([result for result, _ in results])
+
+
+def bank_data_rows(table: TransactionTable) -> np.ndarray:
+    """
+    计入"银行账户有数据"的行：银行卡/钱包账户上的非亲属卡标记交易
+    """
+    is_family_card = table.category == table.code("__FAMILY_CARD__")
+    return ~is_family_card & ((account_types(table) & BANK) != 0)
 
 
-def process_family_card(transactions: List[Transaction]) -> List[Transaction]:
+def process_family_card(transactions: Transactions, accounts_with_data: Optional[Set[str]] = None) -> Transactions:
     """
     处理亲属卡/亲友代付交易
     将微信"亲属卡交易"和支付宝"亲友代付"对应的银行卡支出重分类为"其他杂项-XX支出"
+    accounts_with_data 为有交易的银行账户集合，默认由本批交易统计（增量合并时传入全量统计结果）
     """
     print("\n=== 开始亲属卡处理 ===")
+    table, as_list = _as_table(transactions)
 
-    # 找出所有标记交易（来自微信/支付宝的亲属卡标记）
-    markers = []  # (index, transaction, user_name, target_bank)
-    for i, t in enumerate(transactions):
-        if t.category == "__FAMILY_CARD__" or t.transaction_type == "__MARKER__":
-            user_name = t.subcategory or "亲属"  # 使用者名称存在subcategory中
-            target_bank = t.account  # 目标银行（可能是具体银行名或"__ANY_BANK__"）
-            markers.append((i, t, user_name, target_bank))
-
-    if not markers:
+    if not has_family_card_markers(table):
         print("未发现亲属卡标记")
         return transactions
 
-    # 所有银行卡账户（用于匹配）
-    all_bank_accounts = set(DEBIT_ACCOUNTS + CREDIT_ACCOUNTS)
-
     # 统计各银行账户在数据中是否有交易
-    accounts_with_data = set()
-    for t in transactions:
-        if t.category != "__FAMILY_CARD__" and t.account in all_bank_accounts:
-            accounts_with_data.add(t.account)
+    if accounts_with_data is None:
+        accounts_with_data = {table.pool.text(code) for code in np.unique(table.account[bank_data_rows(table)])}
 
     print(f"  数据中存在的银行账户: {', '.join(sorted(accounts_with_data))}")
 
-    # 记录要删除的标记索引
-    marker_indices_to_remove = set()
-    matched_tx_indices = set()
+    result, (matched_count, unmatched_deleted_count, unmatched_kept_count) = match_family_cards(table, accounts_with_data)
+
+    print(f"亲属卡处理完成：")
+    print(f"  匹配成功: {matched_count} 条（重分类银行卡交易）")
+    print(f"  未匹配-删除: {unmatched_deleted_count} 条（银行有数据，避免重复）")
+    print(f"  未匹配-保留: {unmatched_kept_count} 条（银行无数据）")
+    return _from_table(result, as_list)
+
+
+def family_card_marker_rows(table: TransactionTable) -> np.ndarray:
+    """亲属卡标记行（来自微信/支付宝的亲属卡标记）"""
+    return (table.category == table.code("__FAMILY_CARD__")) | (table.tx_type == table.code("__MARKER__"))
+
+
+def family_card_candidate_rows(table: TransactionTable) -> np.ndarray:
+    """可与亲属卡标记匹配的行：微信以外的银行卡/钱包账户上的非亲属卡标记交易"""
+    return bank_data_rows(table) & (table.account != table.code("微信"))
+
+
+def has_family_card_markers(table: TransactionTable) -> bool:
+    """是否有亲属卡标记"""
+    return bool(family_card_marker_rows(table).any())
+
+
+def match_family_cards(table: TransactionTable, accounts_with_data: Set[str]) -> Tuple[TransactionTable, Tuple[int, int, int]]:
+    """
+    亲属卡标记与同日期、同金额的银行卡交易匹配（process_family_card 的匹配部分），
+    返回 (结果, (匹配成功数, 未匹配-删除数, 未匹配-保留数))
+    """
+    markers = np.flatnonzero(family_card_marker_rows(table))
+    registry = account_registry()
+
+    # 候选银行卡交易索引：(日期, 金额分) -> 行号列表（按原顺序）
+    candidates: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+    for i in np.flatnonzero(family_card_candidate_rows(table)):
+        candidates[(table.date[i], int(table.cents[i]))].append(i)
+
+    # 记录要删除的标记和已匹配的交易
+    keep = np.ones(len(table), dtype=bool)
+    matched = np.zeros(len(table), dtype=bool)
     matched_count = 0
     unmatched_deleted_count = 0  # 未匹配但银行有数据（删除避免重复）
     unmatched_kept_count = 0     # 未匹配且银行无数据（保留）
 
-    for marker_idx, marker, user_name, target_bank in markers:
+    for marker_idx in markers:
+        user_name = table.text("subcategory", marker_idx) or "亲属"  # 使用者名称存在subcategory中
+        target_bank = table.text("account", marker_idx)  # 目标银行（可能是具体银行名或"__ANY_BANK__"）
+        key = (table.date[marker_idx], int(table.cents[marker_idx]))
         found_match = False
 
-        # 在银行卡交易中查找匹配的交易
-        for i, t in enumerate(transactions):
-            if i in marker_indices_to_remove or i in matched_tx_indices:
+        # 在同日期、同金额的银行卡交易中查找匹配
+        for i in candidates.get(key, ()):
+            if not keep[i] or matched[i]:
                 continue
-            if t.category == "__FAMILY_CARD__":
-                continue
-            if t.account not in all_bank_accounts or t.account == "微信":
+            # 如果指定了具体银行，还要匹配账户
+            if target_bank != "__ANY_BANK__" and table.account[i] != table.code(target_bank):
                 continue
 
-            # 匹配条件：日期 + 金额
-            if t.date == marker.date and amounts_match(t.amount, marker.amount):
-                # 如果指定了具体银行，还要匹配账户
-                if target_bank != "__ANY_BANK__" and t.account != target_bank:
-                    continue
+            print(f"  亲属卡匹配: [{table.date[i]}] {table.text('account', i)} "
+                  f"{format_cents(table.cents[i])} -> {user_name}支出")
 
-                print(f"  亲属卡匹配: [{t.date}] {t.account} {t.amount} -> {user_name}支出")
-
-                # 重分类为"其他杂项-XX支出"
-                t.category = "其他杂项"
-                t.subcategory = f"{user_name}支出"
-                t.transaction_type = "支出"
-                matched_tx_indices.add(i)
-                marker_indices_to_remove.add(marker_idx)
-                matched_count += 1
-                found_match = True
-                break
+            # 重分类为"其他杂项-XX支出"
+            table.set_text("category", i, "其他杂项")
+            table.set_text("subcategory", i, f"{user_name}支出")
+            table.set_text("tx_type", i, "支出")
+            matched[i] = True
+            keep[marker_idx] = False
+            matched_count += 1
+            found_match = True
+            break
 
         # 未匹配的处理
         if not found_match:
@@ -646,69 +695,197 @@ def process_family_card(transactions: List[Transaction]) -> List[Transaction]:
 
             if bank_has_data:
                 # 银行有数据但未匹配 → 删除标记（避免重复）
-                marker_indices_to_remove.add(marker_idx)
+                keep[marker_idx] = False
                 unmatched_deleted_count += 1
             else:
                 # 银行无数据 → 保留标记作为唯一记录
-                marker.category = "其他杂项"
-                marker.subcategory = f"{user_name}支出"
-                marker.transaction_type = "支出"
-                if "微信" in (marker.description or ""):
-                    marker.account = "微信"
-                else:
-                    marker.account = "支付宝"
+                account = "微信" if "微信" in (table.description[marker_idx] or "") else "支付宝"
+                table.set_text("category", marker_idx, "其他杂项")
+                table.set_text("subcategory", marker_idx, f"{user_name}支出")
+                table.set_text("tx_type", marker_idx, "支出")
+                table.set_text("account", marker_idx, account)
+                # 保留的标记已成为普通银行卡账户交易，后续标记也可与之匹配
+                if account != "微信" and registry.is_type(account, BANK):
+                    bisect.insort(candidates[key], marker_idx)
                 unmatched_kept_count += 1
 
     # 过滤掉需要删除的标记
-    result = [t for i, t in enumerate(transactions) if i not in marker_indices_to_remove]
+    return table.filter(keep), (matched_count, unmatched_deleted_count, unmatched_kept_count)
 
-    print(f"亲属卡处理完成：")
-    print(f"  匹配成功: {matched_count} 条（重分类银行卡交易）")
-    print(f"  未匹配-删除: {unmatched_deleted_count} 条（银行有数据，避免重复）")
-    print(f"  未匹配-保留: {unmatched_kept_count} 条（银行无数据）")
-    return result
 
+def sort_transactions(transactions: Transactions) -> Transactions:
+    """按日期排序交易记录（稳定排序，无法解析的日期排最前）"""
+    table, as_list = _as_table(transactions)
+    return _from_table(table.sort_by_date(), as_list)
 
-def sort_transactions(transactions: List[Transaction]) -> List[Transaction]:
-    """按日期排序交易记录"""
-    def sort_key(t):
-        d = parse_date(t.date)
-        return d if d else datetime.min
 
-    return sorted(transactions, key=sort_key)
+def read_workbook_batch(file_path: str) -> Tuple[TransactionTable, float]:
+    """
+    读取单个Excel文件为列式表，返回 (表, 耗时秒数)
+    供进程池调用：列式表只含 NumPy 数组和少量字符串，跨进程传输开销小
+    """
+    start = time.perf_counter()
+    table = load_sidecar(file_path)
+    if table is None:
+        table = TransactionTable.from_transactions(read_excel_transactions(file_path, fast=True))
+    return table, time.perf_counter() - start
 
 
-def merge_excel_files(input_dir: str, output_path: str = None):
+def read_workbooks(excel_files: List[str], jobs: Optional[int] = None) -> TransactionTable:
     """
-    合并处理主函数
+    读取所有Excel文件并按文件列表顺序拼接
     """
-    print(f"=== 开始合并处理 ===")
-    print(f"输入目录: {input_dir}")
+    return TransactionTable.concat(read_workbook_tables(excel_files, jobs))
 
-    # 查找所有Excel文件
-    excel_files = []
-    for f in os.listdir(input_dir):
-        if f.endswith('.xlsx') and not f.startswith('~') and not f.startswith('merged'):
-            excel_files.append(os.path.join(input_dir, f))
 
+def read_workbook_tables(excel_files: List[str], jobs: Optional[int] = None) -> List[TransactionTable]:
+    """
+    读取所有Excel文件，按文件列表顺序返回各文件的列式表
+    jobs > 1 且文件多于一个时使用进程池并发读取（默认取 CPU 核数）
+    """
     if not excel_files:
-        print("未找到Excel文件")
-        return
+        return []
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(excel_files)))
 
-    print(f"找到 {len(excel_files)} 个Excel文件")
+    if jobs == 1:
+        batches = (read_workbook_batch(file_path) for file_path in excel_files)
+        return _collect_batches(excel_files, batches)
+
+    print(f"  并发读取（{jobs} 个进程）")
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # map 按提交顺序返回结果，拼接顺序与文件列表一致
+        return _collect_batches(excel_files, executor.map(read_workbook_batch, excel_files))
 
-    # 读取所有交易记录
-    all_transactions = []
-    for file_path in excel_files:
+
+def _collect_batches(excel_files: List[str], batches) -> List[TransactionTable]:
+    """按文件顺序输出读取耗时并收集各文件的列式表"""
+    tables = []
+    for file_path, (table, elapsed) in zip(excel_files, batches):
         print(f"  读取: {os.path.basename(file_path)}")
-        transactions = read_excel_transactions(file_path)
-        all_transactions.extend(transactions)
-        print(f"    {len(transactions)} 条记录")
+        print(f"    {len(table)} 条记录（{elapsed:.2f}s）")
+        tables.append(table)
+    return tables
+
+
+def _bank_contributions(table: TransactionTable):
+    """转账识别后计入账户统计的行：(金额分数组, 账户列表)"""
+    rows = np.flatnonzero(bank_data_rows(table))
+    return table.cents[rows], [table.text("account", i) for i in rows]
 
-    print(f"\n合计 {len(all_transactions)} 条交易记录")
 
+# 合并规则所在的文件：本文件、账户登记表、商户标准化和文本字段模块及其读取的配置
+RULE_FILES = [os.path.abspath(__file__), os.path.abspath(accounts.__file__), os.path.abspath(merchant_normalizer.__file__),
+              os.path.abspath(text_fields.__file__), ACCOUNTS_PATH, MERCHANT_RULES_PATH, TRANSFER_RULES_PATH]
+
+
+def rules_fingerprint() -> str:
+    """合并规则指纹：各规则文件内容的 SHA-256（规则修改后上次的合并状态失效）"""
+    digest = hashlib.sha256()
+    for path in RULE_FILES:
+        digest.update((file_sha256(path) if os.path.exists(path) else "").encode("ascii"))
+    return digest.hexdigest()
+
+
+def incremental_merge(excel_files: List[str], state: Optional[MergeState],
+                      jobs: Optional[int] = None,
+                      shards: Optional[int] = None) -> Tuple[TransactionTable, int, MergeState, bool]:
+    """
+    增量合并（原理见 merge_state.py），返回 (按日期排序的合并结果, 输入总行数, 新状态, 是否有变化)
+    state 为 None 时全量合并；shards > 1 时退款对冲与转账识别按金额分片并发执行（见 refunds_and_transfers）
+    """
+    names = [os.path.basename(path) for path in excel_files]
+    hashes = {name: file_sha256(path) for name, path in zip(names, excel_files)}
+    old_ranges = state.file_ranges() if state is not None else {}
+
+    unchanged = {name for name in names if name in old_ranges and old_ranges[name][0] == hashes[name]}
+    to_read = [path for name, path in zip(names, excel_files) if name not in unchanged]
+    stale = [name for name in old_ranges if name not in unchanged]
+    if state is not None:
+        print(f"  增量合并: 未变化 {len(unchanged)} 个文件，新增/变化 {len(to_read)} 个，"
+              f"删除 {len([n for n in stale if n not in hashes])} 个")
+
+    fresh_tables = dict(zip((os.path.basename(path) for path in to_read), read_workbook_tables(to_read, jobs)))
+
+    # 按文件顺序拼接输入；记录旧行号 -> 新行号
+    parts, files = [], []
+    remap = np.full(len(state.inputs) if state is not None else 0, -1, dtype=np.int64)
+    position = 0
+    for name in names:
+        if name in unchanged:
+            _, start, stop = old_ranges[name]
+            part = state.inputs.take(np.arange(start, stop))
+            remap[start:stop] = np.arange(position, position + (stop - start))
+        else:
+            part = fresh_tables[name]
+        parts.append(part)
+        files.append({"name": name, "sha256": hashes[name], "rows": len(part)})
+        position += len(part)
+    inputs = TransactionTable.concat(parts)
+    inputs.origin = np.arange(len(inputs), dtype=np.int64)
+
+    # 受影响金额：新增/变化文件的金额 + 变化/删除文件原有的金额
+    if state is None:
+        dirty = np.unique(inputs.cents)
+    else:
+        stale_cents = [state.inputs.cents[old_ranges[name][1]:old_ranges[name][2]] for name in stale]
+        dirty = np.unique(np.concatenate([fresh_tables[name].cents for name in fresh_tables] + stale_cents
+                                         + [np.empty(0, dtype=np.int64)]))
+
+    changed = state is None or len(dirty) > 0
+    if not changed:
+        return state.outputs, len(inputs), MergeState(files, inputs, state.outputs, state.bank_cents,
+                                                       state.bank_accounts), False
+
+    # 沿用未受影响金额的结果（origin 中的行号换成新行号）
+    if state is not None:
+        clean_out = state.outputs.filter(~np.isin(state.outputs.cents, dirty))
+        rows = remap[clean_out.origin & _ROW_MASK]
+        clean_out.origin = (clean_out.origin & ~_ROW_MASK) | rows
+        clean_bank = ~np.isin(state.bank_cents, dirty)
+        clean_bank_cents = state.bank_cents[clean_bank]
+        clean_bank_accounts = [a for a, keep in zip(state.bank_accounts, clean_bank) if keep]
+    else:
+        clean_out = TransactionTable()
+        clean_bank_cents, clean_bank_accounts = np.empty(0, dtype=np.int64), []
+
+    dirty_in = inputs.filter(np.isin(inputs.cents, dirty))
+    print(f"  重新计算 {len(dirty)} 个金额分组（{len(dirty_in)} 条记录），"
+          f"沿用 {len(clean_out)} 条已合并记录")
+
+    # 退款对冲、转账识别只涉及同金额交易，可在受影响部分上单独执行
+    post_transfer = refunds_and_transfers(dirty_in, shards, jobs)
+    dirty_bank_cents, dirty_bank_accounts = _bank_contributions(post_transfer)
+    accounts_with_data: Set[str] = set(clean_bank_accounts) | set(dirty_bank_accounts)
+
+    if state is not None and accounts_with_data != set(state.bank_accounts) and len(clean_out):
+        # 有数据的银行账户变化会影响未受影响金额中的亲属卡判断，改为全量重算
+        print("  有数据的银行账户发生变化，全量重算")
+        clean_out = TransactionTable()
+        clean_bank_cents, clean_bank_accounts = np.empty(0, dtype=np.int64), []
+        post_transfer = refunds_and_transfers(inputs, shards, jobs)
+        dirty_bank_cents, dirty_bank_accounts = _bank_contributions(post_transfer)
+        accounts_with_data = set(dirty_bank_accounts)
+
+    dirty_out = process_family_card(post_transfer, accounts_with_data=accounts_with_data)
+
+    # 合并两部分并按 (日期, origin) 排序，与全量合并的稳定排序结果一致
+    outputs = TransactionTable.concat([clean_out, dirty_out])
+    outputs = outputs.take(np.lexsort((outputs.origin, outputs.date_ord)))
+
+    new_state = MergeState(files, inputs, outputs,
+                           np.concatenate((clean_bank_cents, dirty_bank_cents)),
+                           clean_bank_accounts + dirty_bank_accounts)
+    return outputs, len(inputs), new_state, True
+
+
+def merge_transactions(transactions: Transactions) -> Transactions:
+    """
+    依次执行退款对冲、转账识别、亲属卡处理和按日期排序
+    """
     # 执行退款对冲
-    transactions = reconcile_refunds(all_transactions)
+    transactions = reconcile_refunds(transactions)
 
     # 执行转账识别
     transactions = identify_transfers(transactions)
@@ -717,40 +894,129 @@ def merge_excel_files(input_dir: str, output_path: str = None):
     transactions = process_family_card(transactions)
 
     # 按日期排序
-    transactions = sort_transactions(transactions)
+    return sort_transactions(transactions)
 
-    # 生成输出文件
-    if output_path is None:
-        output_path = os.path.join(input_dir, "merged_账单.xlsx")
 
+def write_merged(transactions: TransactionTable, output_path: str, split_by: Optional[str] = None,
+                 max_rows: Optional[int] = None, jobs: Optional[int] = None, fmt: Optional[str] = None):
+    """
+    生成合并文件（fmt 为输出格式，默认随手记Excel），同时写出按月份分类、按账户的汇总（见 summary.py）
+    指定 split_by（month/quarter/year）或 max_rows 时分卷写出，见 split_output.write_split
+    """
     print(f"\n=== 生成合并文件 ===")
-    generator = ExcelGenerator()
-    generator._create_workbook()
-    generator.add_transactions(transactions)
-    generator.save(output_path)
+    if split_by is not None or max_rows is not None:
+        write_split(transactions, output_path, split_by, max_rows, jobs, fmt)
+    else:
+        # Excel 使用只写模式：逐行写入临时文件，内存不随记录数增长
+        get_writer(fmt).write_table(transactions, output_path)
+    write_summary(transactions, output_path)
+
+
+def list_excel_files(input_dir: str) -> List[str]:
+    """
+    目录中待合并的各银行Excel（按文件名排序，保证拼接顺序与平台无关）
+    """
+    excel_files = []
+    for f in sorted(os.listdir(input_dir)):
+        if f.endswith('.xlsx') and not f.startswith('~') and not f.startswith('merged'):
+            excel_files.append(os.path.join(input_dir, f))
+    return excel_files
+
+
+def merge_excel_files(input_dir: str, output_path: str = None, jobs: Optional[int] = None, full: bool = False,
+                      split_by: Optional[str] = None, max_rows: Optional[int] = None, fmt: Optional[str] = None,
+                      shards: Optional[int] = None, ledger_path: Optional[str] = None):
+    """
+    合并处理主函数
+    默认沿用上次的合并状态，只重算受新增/变化文件影响的部分；full=True 时全量重算
+    split_by / max_rows 指定时按周期/行数分卷输出；fmt 为输出格式（xlsx/csv/tsv/jsonl）
+    shards > 1 时退款对冲与转账识别按金额分片，由 jobs 个进程并发执行，结果与串行一致
+    ledger_path 指定时把合并结果写入本地交易账本（见 ledger.py）
+    """
+    start = time.perf_counter()
+    print(f"=== 开始合并处理 ===")
+    print(f"输入目录: {input_dir}")
+
+    excel_files = list_excel_files(input_dir)
+    if not excel_files:
+        print("未找到Excel文件")
+        return
+
+    print(f"找到 {len(excel_files)} 个Excel文件")
+
+    writer = get_writer(fmt)
+    if output_path is None:
+        output_path = os.path.join(input_dir, "merged_账单" + writer.EXTENSION)
+    state_path = state_path_for(output_path)
+    rules = rules_fingerprint()
+    state = None if full else MergeState.load(state_path, rules)
+
+    # 读取交易记录并执行退款对冲、转账识别、亲属卡处理，按日期排序
+    transactions, total_count, new_state, changed = incremental_merge(excel_files, state, jobs, shards)
+
+    print(f"\n合计 {total_count} 条交易记录")
+
+    # 生成输出文件
+    if split_by is not None or max_rows is not None:
+        up_to_date = parts_up_to_date(output_path, split_by, max_rows, fmt)
+    else:
+        up_to_date = all(os.path.exists(path) for path in writer.output_paths(output_path))
+    if changed or not up_to_date:
+        write_merged(transactions, output_path, split_by, max_rows, jobs, fmt)
+        new_state.save(state_path, rules)
+    else:
+        print("\n输入文件没有变化，合并文件已是最新")
+        if not os.path.exists(summary_path_for(output_path)):
+            write_summary(transactions, output_path)
+
+    if ledger_path is not None:
+        print(f"\n=== 写入交易账本 ===")
+        inserted, updated, deleted = update_ledger(ledger_path, transactions, output_path)
+        print(f"  {ledger_path}: 新增 {inserted} 条，更新 {updated} 条，删除 {deleted} 条")
 
     print(f"\n处理完成！")
     print(f"  输入文件: {len(excel_files)} 个")
-    print(f"  原始记录: {len(all_transactions)} 条")
+    print(f"  原始记录: {total_count} 条")
     print(f"  最终记录: {len(transactions)} 条")
-    print(f"  输出文件: {output_path}")
+    if split_by is not None or max_rows is not None:
+        print(f"  分卷索引: {index_path_for(output_path)}")
+    else:
+        print(f"  输出文件: {output_path}")
+    print(f"  汇总文件: {summary_path_for(output_path)}")
+    print(f"  总耗时: {time.perf_counter() - start:.2f}s")
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("用法: python merge.py <输出目录> [合并文件名]")
-        print("示例: python merge.py output/")
-        print("      python merge.py output/ merged.xlsx")
-        sys.exit(1)
-
-    input_dir = sys.argv[1]
-    output_path = sys.argv[2] if len(sys.argv) > 2 else None
-
-    if not os.path.isdir(input_dir):
-        print(f"错误: 目录不存在 {input_dir}")
+    parser = argparse.ArgumentParser(
+        description="合并处理：跨文件退款对冲、转账识别、亲属卡处理",
+        epilog="示例: python merge.py output/\n      python merge.py output/ merged.xlsx --jobs 4"
+               "\n      python merge.py output/ --split-by month --max-rows 5000"
+               "\n      python merge.py output/ --shards 16 --jobs 8"
+               "\n      python merge.py output/ --ledger ledger.sqlite",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input_dir", help="包含 *_随手记.xlsx 的输出目录")
+    parser.add_argument("output_path", nargs="?", default=None, help="合并文件路径（默认 <目录>/merged_账单.<格式扩展名>）")
+    parser.add_argument("--jobs", type=int, default=None, help="并发读取/匹配的进程数（默认 CPU 核数，1 为串行）")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="按金额分为 N 片并发执行退款对冲与转账识别（默认不分片，结果与串行一致）")
+    parser.add_argument("--full", action="store_true", help="忽略上次的合并状态，全量重算")
+    parser.add_argument("--split-by", choices=PERIODS, default=None,
+                        help="按自然月/季度/年分卷输出，并生成 <合并文件>_index.json")
+    parser.add_argument("--max-rows", type=positive_int, default=None, help="每个分卷最多的记录数（可与 --split-by 同时使用）")
+    parser.add_argument("--format", choices=FORMATS, default="xlsx",
+                        help="输出格式：xlsx（随手记Excel，默认）、csv/tsv（每个Sheet一个文件）、jsonl")
+    parser.add_argument("--ledger", default=None,
+                        help="同时把合并结果写入本地交易账本（SQLite，按交易指纹更新，不产生重复记录）")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"错误: 目录不存在 {args.input_dir}")
         sys.exit(1)
 
-    merge_excel_files(input_dir, output_path)
+    merge_excel_files(args.input_dir, args.output_path, jobs=args.jobs, full=args.full,
+                      split_by=args.split_by, max_rows=args.max_rows, fmt=args.format, shards=args.shards,
+                      ledger_path=args.ledger)
 
 
 if __name__ == "__main__":
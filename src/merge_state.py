@@ -0,0 +1,98 @@
+"""
+合并状态模块
+merge.py 在合并文件旁保存合并状态（<合并文件>.state.npz），下次运行只重算受新增/变化文件影响的部分
+
+退款对冲、转账识别、亲属卡匹配都要求金额（分）相同，不同金额的交易互不影响，
+因此按金额分组即可精确划分受影响范围：
+- 新增、变化、删除的文件中出现过的金额为"受影响金额"，这些金额的全部交易重新执行各合并阶段
+- 其余金额直接沿用上次的合并结果
+- 各行的 origin（输入行号 + 转账识别轮次）还原全量合并的排序：日期相同时按 原记录 -> 第一轮转账 -> 第二轮转账、各自按输入顺序
+亲属卡处理中"银行账户是否有数据"依赖全量统计，统计结果变化时回退为全量重算
+
+状态内容：各文件的 SHA-256 和行数、全部输入行、上次的合并结果（含 origin）、
+计入账户统计的 (账户, 金额) 以及合并规则指纹（merge.py 内容变化后状态失效）
+增量计算本身见 merge.incremental_merge
+"""
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from sidecar import LOAD_ERRORS, decode_meta, encode_meta, save_arrays, table_from_arrays, table_to_arrays
+from transaction_table import TransactionTable
+
+# 状态格式版本
+STATE_VERSION = 1
+
+STATE_SUFFIX = ".state.npz"
+
+
+def state_path_for(output_path: str) -> str:
+    """合并文件对应的状态文件路径"""
+    return os.path.splitext(output_path)[0] + STATE_SUFFIX
+
+
+class MergeState:
+    """
+    上次合并的状态
+    files: [{"name", "sha256", "rows"}]，按输入拼接顺序
+    """
+
+    def __init__(self, files: List[dict], inputs: TransactionTable, outputs: TransactionTable,
+                 bank_cents: np.ndarray, bank_accounts: List[str]):
+        self.files = files
+        self.inputs = inputs
+        self.outputs = outputs
+        # 计入账户统计的行：金额分 + 账户
+        self.bank_cents = bank_cents
+        self.bank_accounts = bank_accounts
+
+    def file_ranges(self) -> Dict[str, tuple]:
+        """文件名 -> (sha256, 起始行, 结束行)"""
+        ranges = {}
+        start = 0
+        for entry in self.files:
+            ranges[entry["name"]] = (entry["sha256"], start, start + entry["rows"])
+            start += entry["rows"]
+        return ranges
+
+    def save(self, path: str, rules: str):
+        account_names = sorted(set(self.bank_accounts))
+        account_index = {name: i for i, name in enumerate(account_names)}
+        meta = {
+            "state_version": STATE_VERSION,
+            "rules": rules,
+            "files": self.files,
+            "bank_account_names": account_names,
+        }
+        arrays = table_to_arrays(self.inputs, "in_")
+        arrays.update(table_to_arrays(self.outputs, "out_"))
+        arrays["out_origin"] = self.outputs.origin
+        arrays["bank_cents"] = np.asarray(self.bank_cents, dtype=np.int64)
+        arrays["bank_account"] = np.array([account_index[name] for name in self.bank_accounts], dtype=np.int32)
+        arrays["meta"] = encode_meta(meta)
+        save_arrays(path, arrays)
+
+    @classmethod
+    def load(cls, path: str, rules: str) -> Optional["MergeState"]:
+        """读取状态；不存在、损坏、版本或规则指纹不一致时返回 None"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = decode_meta(data["meta"])
+                if meta.get("state_version") != STATE_VERSION:
+                    print("  合并状态版本不一致，全量重算")
+                    return None
+                if meta.get("rules") != rules:
+                    print("  合并规则已变化，全量重算")
+                    return None
+                inputs = table_from_arrays(data, "in_")
+                outputs = table_from_arrays(data, "out_")
+                outputs.origin = data["out_origin"]
+                account_names = meta["bank_account_names"]
+                bank_accounts = [account_names[i] for i in data["bank_account"].tolist()]
+                return cls(meta["files"], inputs, outputs, data["bank_cents"], bank_accounts)
+        except LOAD_ERRORS:
+            print("  合并状态无法读取，全量重算")
+            return None
@@ -2,26 +2,123 @@
 数据模型定义模块
 定义统一的账单数据结构
 """
+import re
+import sys
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from itertools import chain
+from typing import Iterator, Optional, Union
 
 
-@dataclass
+# 金额字符串：可选符号 + 整数部分 + 可选小数部分（已去除千分位和货币符号）
+_AMOUNT_RE = re.compile(r'^([+-]?)(\d*)(?:\.(\d*))?$')
+
+
+def to_cents(value: Union[str, int, float, None]) -> int:
+    """
+    将金额转换为整数分
+    字符串直接按十进制解析，不经过浮点；小数第三位四舍五入
+    无法解析时返回 0
+    """
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value * 100
+
+    text = str(value).strip().replace(",", "").replace("¥", "").replace("￥", "")
+    match = _AMOUNT_RE.match(text)
+    if match and (match.group(2) or match.group(3)):
+        sign, whole, frac = match.group(1), match.group(2), match.group(3) or ""
+        cents = int(whole or "0") * 100 + int((frac + "00")[:2])
+        if len(frac) > 2 and frac[2] >= "5":
+            cents += 1
+        return -cents if sign == "-" else cents
+
+    # 科学计数法等少见格式
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return 0
+    if not number.is_finite():
+        return 0
+    return int(number.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+
+
+def parse_date(date_str: str) -> Optional[datetime]:
+    """
+    解析日期字符串（YYYY-MM-DD / YYYY/MM/DD / YYYY年MM月DD日），无法解析时返回 None
+    """
+    for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%Y年%m月%d日"):
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def format_cents(cents: int) -> str:
+    """
+    整数分格式化为金额字符串，如 -2550 -> "-25.50"
+    """
+    sign = "-" if cents < 0 else ""
+    cents = abs(cents)
+    return f"{sign}{cents // 100}.{cents % 100:02d}"
+
+
+@dataclass(slots=True, init=False)
 class Transaction:
     """
     交易记录数据模型
+
+    使用 __slots__，不为每条记录分配 __dict__；
+    账户、分类、子分类、交易类型、转入账户在构造时驻留（sys.intern），
+    这些字段只有几十种取值，所有交易共享同一批字符串对象。
+    金额以整数分保存在 amount_cents；兼容旧接口，构造时也可用关键字 amount（元）给出，
+    amount 属性可读写，均经 to_cents 换算
     """
     date: str
     category: str
     subcategory: str
     account: str
-    amount: float
+    amount_cents: int  # 金额（整数分，匹配/去重均使用此字段）
     description: str
     transaction_type: str = "支出"
     transfer_to_account: Optional[str] = None  # 转账目标账户（仅转账类型使用）
     merchant: Optional[str] = None  # 商户名称（用于退款匹配）
 
+    def __init__(self, date: str, category: str, subcategory: str, account: str,
+                 amount_cents: Optional[int] = None, description: str = "", transaction_type: str = "支出",
+                 transfer_to_account: Optional[str] = None, merchant: Optional[str] = None, *,
+                 amount: Union[str, int, float, None] = None):
+        if amount is not None:
+            if amount_cents is not None:
+                raise TypeError("amount_cents 与 amount 只能给出一个")
+            amount_cents = to_cents(amount)
+        elif amount_cents is None:
+            raise TypeError("缺少金额：amount_cents（分）或 amount（元）")
+        self.date = date
+        self.category = sys.intern(category)
+        self.subcategory = sys.intern(subcategory)
+        self.account = sys.intern(account)
+        self.amount_cents = amount_cents
+        self.description = description
+        self.transaction_type = sys.intern(transaction_type)
+        self.transfer_to_account = sys.intern(transfer_to_account) if transfer_to_account is not None else None
+        self.merchant = merchant
+
+    @property
+    def amount(self) -> float:
+        """
+        金额（元），仅在输出Excel时使用
+        """
+        return self.amount_cents / 100
+
+    @amount.setter
+    def amount(self, value: Union[str, int, float]):
+        """按元设置金额（兼容旧接口），经 to_cents 换算为整数分"""
+        self.amount_cents = to_cents(value)
+
     def to_dict(self) -> dict:
         """
         转换为字典格式
@@ -32,6 +129,7 @@ class Transaction:
             "subcategory": self.subcategory,
             "account": self.account,
             "amount": self.amount,
+            "amount_cents": self.amount_cents,
             "description": self.description,
             "transaction_type": self.transaction_type,
             "transfer_to_account": self.transfer_to_account,
@@ -61,3 +159,46 @@ class BankStatement:
         获取交易记录数量
         """
         return len(self.transactions)
+
+    def has_transactions(self) -> bool:
+        """
+        是否有交易记录
+        """
+        return bool(self.transactions)
+
+    def iter_transactions(self) -> Iterator[Transaction]:
+        """
+        逐条产出交易记录
+        """
+        return iter(self.transactions)
+
+
+@dataclass
+class StreamingStatement(BankStatement):
+    """
+    流式账单：银行、账户、账单周期等表头信息在解析开始时即可用，
+    transactions 为惰性迭代器（边读取边解析），只能遍历一次；记录数在遍历过程中累计
+    """
+    count: int = 0
+
+    def get_transaction_count(self) -> int:
+        """
+        已遍历的交易记录数量
+        """
+        return self.count
+
+    def has_transactions(self) -> bool:
+        """
+        预读第一条记录判断是否为空（预读的记录仍会在遍历时产出）
+        """
+        self.transactions = iter(self.transactions)
+        first = next(self.transactions, None)
+        if first is None:
+            return False
+        self.transactions = chain([first], self.transactions)
+        return True
+
+    def iter_transactions(self) -> Iterator[Transaction]:
+        for transaction in self.transactions:
+            self.count += 1
+            yield transaction
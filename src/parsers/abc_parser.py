@@ -4,9 +4,10 @@
 """
 import re
 import pdfplumber
-from typing import List, Optional, Tuple
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Optional, Tuple
 from base_parser import BaseParser
-from models import Transaction, BankStatement
+from models import Transaction, BankStatement, StreamingStatement, to_cents
 
 
 class ABCParser(BaseParser):
@@ -15,6 +16,9 @@ class ABCParser(BaseParser):
     支持PDF格式的个人活期交易明细清单
     """
 
+    supports_page_split = True
+    STREAMING = True
+
     def __init__(self, config_path: str = None):
         super().__init__(config_path)
         self.account_name = "农业银行"
@@ -23,25 +27,19 @@ class ABCParser(BaseParser):
         """
         解析农业银行PDF账单文件
         """
-        print(f"开始解析农业银行账单：{file_path}")
+        return self.parse_lines(file_path, self._extract_pdf_text(file_path))
 
-        # 提取PDF文本
-        raw_lines = self._extract_pdf_text(file_path)
+    def parse_lines(self, file_path: str, raw_lines: List[str]) -> BankStatement:
+        """
+        由已提取的PDF文本行解析账单
+        """
+        print(f"开始解析农业银行账单：{file_path}")
 
         # 解析账户信息
         account_number, statement_period = self._parse_header(raw_lines)
 
-        # 合并多行交易记录
-        merged_lines = self._merge_transaction_lines(raw_lines)
-
-        # 解析每条交易
-        transactions = []
-        for line in merged_lines:
-            tx = self._parse_transaction_line(line)
-            if tx:
-                transactions.append(tx)
-
-        print(f"解析完成，共 {len(transactions)} 条交易记录")
+        # 合并多行交易记录并解析每条交易
+        transactions = list(self._iter_transactions(raw_lines))
 
         return BankStatement(
             bank_name="农业银行",
@@ -51,19 +49,61 @@ class ABCParser(BaseParser):
             transactions=transactions
         )
 
-    def _extract_pdf_text(self, file_path: str) -> List[str]:
+    def parse_stream(self, file_path: str) -> StreamingStatement:
         """
-        从PDF提取文本行
+        流式解析：先读取前10行解析账户信息，其余页面在遍历交易记录时逐页提取
+        """
+        print(f"开始解析农业银行账单：{file_path}")
+
+        lines = self._iter_pdf_lines(file_path)
+        head = list(islice(lines, 10))
+        account_number, statement_period = self._parse_header(head)
+
+        return StreamingStatement(
+            bank_name="农业银行",
+            account_name=self.account_name,
+            account_number=account_number,
+            statement_period=statement_period,
+            transactions=self._iter_transactions(chain(head, lines))
+        )
+
+    def _iter_transactions(self, lines: Iterable[str]) -> Iterator[Transaction]:
+        """
+        合并多行交易记录后逐条解析
+        """
+        count = 0
+        for line in self._iter_merged_lines(lines):
+            tx = self._parse_transaction_line(line)
+            if tx:
+                count += 1
+                yield tx
+
+        print(f"解析完成，共 {count} 条交易记录")
+
+    def _extract_pdf_text(self, file_path: str, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """
+        从PDF提取文本行（可只提取第 start 到 stop-1 页）
         """
         all_lines = []
         with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
+            for page in pdf.pages[start:stop]:
                 text = page.extract_text()
                 if text:
                     lines = text.split('\n')
                     all_lines.extend(lines)
         return all_lines
 
+    def _iter_pdf_lines(self, file_path: str) -> Iterator[str]:
+        """
+        逐页提取PDF文本行（处理完一页即释放该页的缓存）
+        """
+        with pdfplumber.open(file_path) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                if text:
+                    yield from text.split('\n')
+                page.close()
+
     def _parse_header(self, lines: List[str]) -> Tuple[str, str]:
         """
         解析头部信息，提取账号和日期范围
@@ -86,12 +126,11 @@ class ABCParser(BaseParser):
 
         return account_number, statement_period
 
-    def _merge_transaction_lines(self, lines: List[str]) -> List[str]:
+    def _iter_merged_lines(self, lines: Iterable[str]) -> Iterator[str]:
         """
-        合并多行交易记录
+        合并多行交易记录，逐条产出
         以8位日期开头的行为新交易，其他行追加到上一条
         """
-        merged = []
         current_line = ""
 
         for line in lines:
@@ -102,7 +141,7 @@ class ABCParser(BaseParser):
             # 检查是否是交易行开头（8位日期）
             if re.match(r'^\d{8}\s', line):
                 if current_line:
-                    merged.append(current_line)
+                    yield current_line
                 current_line = line
             elif current_line:
                 # 追加到当前行
@@ -110,9 +149,7 @@ class ABCParser(BaseParser):
 
         # 添加最后一条
         if current_line:
-            merged.append(current_line)
-
-        return merged
+            yield current_line
 
     def _parse_transaction_line(self, line: str) -> Optional[Transaction]:
         """
@@ -146,7 +183,7 @@ class ABCParser(BaseParser):
             return None
 
         amount_str = amount_match.group(1)
-        amount = float(amount_str)
+        amount = to_cents(amount_str)
 
         # 确定交易类型
         is_income = amount > 0
@@ -182,7 +219,7 @@ class ABCParser(BaseParser):
             category=category,
             subcategory=subcategory,
             account=self.account_name,
-            amount=amount,
+            amount_cents=amount,
             description=description,
             transaction_type=transaction_type
         )
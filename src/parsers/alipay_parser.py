@@ -5,8 +5,9 @@
 import re
 import pandas as pd
 from typing import List, Optional, Tuple
+from accounts import account_registry
 from base_parser import BaseParser
-from models import Transaction, BankStatement
+from models import Transaction, BankStatement, to_cents
 
 
 class AlipayParser(BaseParser):
@@ -59,7 +60,7 @@ class AlipayParser(BaseParser):
         all_rows = list(df.iterrows())
 
         # 第一遍：收集消费记录用于退款匹配
-        expense_records = {}  # {(对方, 金额): row_data}
+        expense_records = {}  # {(对方, 金额分): row_data}
         for _, row in all_rows:
             status = str(row.get('交易状态', '')).strip()
             income_expense = str(row.get('收/支', '')).strip()
@@ -135,14 +136,11 @@ class AlipayParser(BaseParser):
             return f"{start[:4]}-{start[4:6]}-{start[6:8]} 至 {end[:4]}-{end[4:6]}-{end[6:8]}"
         return ""
 
-    def _parse_amount(self, amount_val) -> float:
-        """解析金额"""
+    def _parse_amount(self, amount_val) -> int:
+        """解析金额，返回整数分"""
         if pd.isna(amount_val):
-            return 0.0
-        try:
-            return float(str(amount_val).strip())
-        except ValueError:
-            return 0.0
+            return 0
+        return to_cents(str(amount_val).strip())
 
     def _handle_refund(self, row, expense_records) -> Optional[Tuple[bool, Optional[Transaction]]]:
         """
@@ -171,7 +169,7 @@ class AlipayParser(BaseParser):
             category="其他收入",
             subcategory="退款",
             account=self.account_name,
-            amount=amount,
+            amount_cents=amount,
             description=f"退款 {counterparty}",
             transaction_type="收入",
             merchant=counterparty
@@ -226,7 +224,7 @@ class AlipayParser(BaseParser):
                 category="__FAMILY_CARD__",  # 特殊标记
                 subcategory=user_name,  # 记录使用者
                 account=bank_name or "__ANY_BANK__",  # 银行名或通配
-                amount=amount,
+                amount_cents=amount,
                 description=f"亲友代付 {user_name} {product}".strip(),
                 transaction_type="__MARKER__",  # 特殊标记
                 merchant=user_name
@@ -266,7 +264,7 @@ class AlipayParser(BaseParser):
             category=category,
             subcategory=subcategory,
             account=self.account_name,
-            amount=amount,
+            amount_cents=amount,
             description=description,
             transaction_type=transaction_type,
             merchant=counterparty if counterparty != '/' else ""
@@ -283,16 +281,17 @@ class AlipayParser(BaseParser):
         return False
 
     def _extract_bank_name(self, payment_method: str) -> Optional[str]:
-        """从支付方式提取银行名称"""
+        """从支付方式提取银行名称（经账户登记表的别名解析为登记的账户名）"""
         # 格式: "中信银行信用卡(2359)" -> "中信信用卡"
         if "信用卡" in payment_method:
             match = re.match(r'(.+?)银行信用卡', payment_method)
             if match:
-                return f"{match.group(1)}信用卡"
+                return account_registry().resolve(f"{match.group(1)}信用卡")
         elif "储蓄卡" in payment_method:
-            match = re.match(r'(.+?)银行', payment_method)
+            # 格式: "招商银行储蓄卡(1234)" -> "招商银行" -> "招商储蓄卡"
+            match = re.match(r'(.+?银行)', payment_method)
             if match:
-                return match.group(1)
+                return account_registry().resolve(match.group(1))
         return None
 
     def _apply_alipay_rules(self, trade_type: str, counterparty: str,
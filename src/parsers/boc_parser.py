@@ -7,9 +7,9 @@
 """
 import re
 import pdfplumber
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 from base_parser import BaseParser
-from models import Transaction, BankStatement
+from models import Transaction, BankStatement, StreamingStatement
 
 
 class BOCParser(BaseParser):
@@ -39,6 +39,8 @@ class BOCParser(BaseParser):
     # 支出侧礼金/人情关键词
     GIFT_KEYWORDS = ["礼金", "满月", "生日", "出生", "结婚", "份子", "送节", "过节"]
 
+    STREAMING = True
+
     def __init__(self, config_path: str = None):
         super().__init__(config_path)
         self.account_name = "宁波银行"
@@ -50,16 +52,7 @@ class BOCParser(BaseParser):
         print(f"开始解析宁波银行账单：{file_path}")
 
         account_number, statement_period = self._parse_header(file_path)
-        lines = self._extract_lines(file_path)
-        merged = self._merge_continuation(lines)
-
-        transactions: List[Transaction] = []
-        for line in merged:
-            tx = self._parse_line(line)
-            if tx:
-                transactions.append(tx)
-
-        print(f"解析完成，共 {len(transactions)} 条交易记录")
+        transactions = list(self._iter_transactions(file_path))
 
         return BankStatement(
             bank_name="宁波银行",
@@ -69,6 +62,33 @@ class BOCParser(BaseParser):
             transactions=transactions,
         )
 
+    def parse_stream(self, file_path: str) -> StreamingStatement:
+        """
+        流式解析：先从首页读取卡号与账单周期，交易记录在遍历时逐页提取
+        """
+        print(f"开始解析宁波银行账单：{file_path}")
+
+        account_number, statement_period = self._parse_header(file_path)
+
+        return StreamingStatement(
+            bank_name="宁波银行",
+            account_name=self.account_name,
+            account_number=account_number,
+            statement_period=statement_period,
+            transactions=self._iter_transactions(file_path),
+        )
+
+    def _iter_transactions(self, file_path: str) -> Iterator[Transaction]:
+        """逐页提取文本行，合并续行后逐条解析"""
+        count = 0
+        for line in self._merge_continuation(self._extract_lines(file_path)):
+            tx = self._parse_line(line)
+            if tx:
+                count += 1
+                yield tx
+
+        print(f"解析完成，共 {count} 条交易记录")
+
     def _parse_header(self, file_path: str) -> Tuple[str, str]:
         """
         从首页文本提取卡号与账单周期
@@ -91,34 +111,39 @@ class BOCParser(BaseParser):
 
         return account_number, statement_period
 
-    def _extract_lines(self, file_path: str) -> List[str]:
-        """提取所有页的非空文本行"""
-        all_lines: List[str] = []
+    def _extract_lines(self, file_path: str) -> Iterator[str]:
+        """逐页产出非空文本行（处理完一页即释放该页的缓存）"""
         with pdfplumber.open(file_path) as pdf:
             for page in pdf.pages:
-                all_lines.extend((page.extract_text() or "").split("\n"))
-        return [line.strip() for line in all_lines if line.strip()]
+                for line in (page.extract_text() or "").split("\n"):
+                    if line.strip():
+                        yield line.strip()
+                page.close()
 
-    def _merge_continuation(self, lines: List[str]) -> List[str]:
+    def _merge_continuation(self, lines: Iterable[str]) -> Iterator[str]:
         """
         合并续行：不以日期开头的行作为上一条交易的延续（处理对方户名/摘要折行）。
         跳过分隔符、标题、表头、统计、页脚等非交易行。
+        续行可能跟在交易行之后，下一条交易行出现时才产出上一条
         """
-        merged: List[str] = []
+        current: Optional[str] = None
         for line in lines:
             if self.SEPARATOR_RE.match(line):
                 continue
             if self.TX_RE.match(line):
-                merged.append(line)
+                if current is not None:
+                    yield current
+                current = line
                 continue
             # 非交易行：跳过标题/表头/统计/账户信息
             if any(line.startswith(p) for p in self.SKIP_PREFIXES):
                 continue
             # 否则视为上一条交易的续行：仅合并短折行（对方户名/摘要尾部，通常 1-3 字）；
             # 长行（页脚/免责声明）直接丢弃，避免污染描述
-            if merged and len(line) <= 10:
-                merged[-1] = merged[-1].rstrip() + line
-        return merged
+            if current is not None and len(line) <= 10:
+                current = current.rstrip() + line
+        if current is not None:
+            yield current
 
     def _parse_line(self, line: str) -> Optional[Transaction]:
         """解析单条交易行"""
@@ -142,7 +167,7 @@ class BOCParser(BaseParser):
                 category="转账",
                 subcategory="",
                 account=self.account_name,
-                amount=abs(amount),
+                amount_cents=abs(amount),
                 description=description,
                 transaction_type="转账",
                 transfer_to_account="股票账户",
@@ -158,7 +183,7 @@ class BOCParser(BaseParser):
             category=category,
             subcategory=subcategory,
             account=self.account_name,
-            amount=abs(amount),
+            amount_cents=abs(amount),
             description=description,
             transaction_type="收入" if is_income else "支出",
         )
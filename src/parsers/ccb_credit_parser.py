@@ -4,12 +4,12 @@
 """
 import re
 import pdfplumber
-from typing import List, Tuple
-from base_parser import BaseParser
-from models import Transaction, BankStatement
+from typing import List, Optional, Tuple
+from credit_card_parser import CreditCardParser, EXPENSE, REFUND, SKIP
+from models import BankStatement, to_cents
 
 
-class CCBCreditParser(BaseParser):
+class CCBCreditParser(CreditCardParser):
     """
     建设银行信用卡解析器
     支持PDF格式的信用卡月账单
@@ -19,6 +19,10 @@ class CCBCreditParser(BaseParser):
     - 退款（负金额）→ 与消费对冲
     """
 
+    supports_page_split = True
+
+    MERCHANT_FIELD = True
+
     def __init__(self, config_path: str = None):
         super().__init__(config_path)
         self.account_name = "建行信用卡"
@@ -27,10 +31,13 @@ class CCBCreditParser(BaseParser):
         """
         解析建行信用卡PDF账单文件
         """
-        print(f"开始解析建行信用卡账单：{file_path}")
+        return self.parse_lines(file_path, self._extract_pdf_text(file_path))
 
-        # 提取PDF文本
-        raw_lines = self._extract_pdf_text(file_path)
+    def parse_lines(self, file_path: str, raw_lines: List[str]) -> BankStatement:
+        """
+        由已提取的PDF文本行解析账单
+        """
+        print(f"开始解析建行信用卡账单：{file_path}")
 
         # 解析账户信息
         statement_period = self._parse_header(raw_lines)
@@ -51,13 +58,13 @@ class CCBCreditParser(BaseParser):
             transactions=transactions
         )
 
-    def _extract_pdf_text(self, file_path: str) -> List[str]:
+    def _extract_pdf_text(self, file_path: str, start: int = 0, stop: Optional[int] = None) -> List[str]:
         """
-        从PDF提取文本行
+        从PDF提取文本行（可只提取第 start 到 stop-1 页）
         """
         all_lines = []
         with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
+            for page in pdf.pages[start:stop]:
                 text = page.extract_text()
                 if text:
                     lines = text.split('\n')
@@ -110,127 +117,32 @@ class CCBCreditParser(BaseParser):
                 date_str = match.group(1)
                 description = match.group(2).strip()
                 amount_str = match.group(3)
-                amount = float(amount_str)
+                amount = to_cents(amount_str)
 
                 transactions.append({
                     'date': date_str,
                     'description': description,
-                    'amount': amount,
+                    'amount': amount,  # 整数分
                     'original_line': line
                 })
 
         return transactions
 
-    def _process_refunds(self, raw_transactions: List[dict]) -> List[Transaction]:
+    def _classify_raw(self, tx: dict) -> Optional[str]:
         """
-        处理退款对冲逻辑：
+        交易归类：
         1. 信用卡还款 → 跳过
         2. 退款 → 尝试与同商户消费对冲
         """
-        # 分类交易
-        expenses = []  # 正常消费
-        refunds = []   # 退款（待对冲）
-        skip_count = 0
-
-        for tx in raw_transactions:
-            desc = tx['description']
-            amount = tx['amount']
-
-            # 跳过信用卡还款（负金额 + 含"还款"）
-            if amount < 0 and '还款' in desc:
-                skip_count += 1
-                continue
-
-            # 正常消费（正金额）
-            if amount > 0:
-                expenses.append(tx)
-            else:
-                # 负金额（退款）
-                refunds.append(tx)
-
-        # 对冲退款
-        matched_expense_indices = set()
-        matched_refund_indices = set()
-
-        for ri, refund in enumerate(refunds):
-            refund_amount = abs(refund['amount'])
-            refund_merchant = self._extract_merchant(refund['description'])
-
-            # 查找同商户、同金额的消费
-            for ei, expense in enumerate(expenses):
-                if ei in matched_expense_indices:
-                    continue
-
-                expense_merchant = self._extract_merchant(expense['description'])
-                if (abs(expense['amount'] - refund_amount) < 0.01 and
-                    refund_merchant and expense_merchant and
-                    refund_merchant == expense_merchant):
-                    # 对冲成功
-                    matched_expense_indices.add(ei)
-                    matched_refund_indices.add(ri)
-                    print(f"  对冲: {expense['description']} {expense['amount']} <-> 退款 {refund['amount']}")
-                    break
-
-        # 生成最终交易列表
-        result = []
-
-        # 添加未对冲的消费
-        for i, exp in enumerate(expenses):
-            if i not in matched_expense_indices:
-                category, subcategory = self._categorize(exp['description'], False)
-                merchant = self._extract_merchant(exp['description'])
-                result.append(Transaction(
-                    date=exp['date'],
-                    category=category,
-                    subcategory=subcategory,
-                    account=self.account_name,
-                    amount=abs(exp['amount']),
-                    description=exp['description'],
-                    transaction_type="支出",
-                    merchant=merchant
-                ))
-
-        # 添加未对冲的退款（作为收入）
-        for i, ref in enumerate(refunds):
-            if i not in matched_refund_indices:
-                merchant = self._extract_merchant(ref['description'])
-                result.append(Transaction(
-                    date=ref['date'],
-                    category="其他收入",
-                    subcategory="退款",
-                    account=self.account_name,
-                    amount=abs(ref['amount']),
-                    description=ref['description'] + " (未匹配退款)",
-                    transaction_type="收入",
-                    merchant=merchant
-                ))
-
-        print(f"  跳过还款: {skip_count} 笔")
-        print(f"  对冲退款: {len(matched_refund_indices)} 笔")
-
-        return result
-
-    def _extract_merchant(self, description: str) -> str:
-        """
-        从描述中提取商户名称
-        例如: "支付宝-叮咚买菜" -> "叮咚买菜"
-              "北京 跨行消费 京东商城平台商户" -> "京东商城平台商户"
-        """
-        # 移除支付渠道前缀
-        for prefix in ['支付宝-支付宝-消费-', '支付宝-', '微信支付-', '财付通-', '云闪付-']:
-            if prefix in description:
-                description = description.split(prefix)[-1]
-                break
-
-        # 移除地点和交易类型前缀（如 "北京 跨行消费"）
-        match = re.search(r'(?:跨行消费|消费)\s+(.+)$', description)
-        if match:
-            description = match.group(1)
-
-        # 移除 "退款" "退货" 等后缀
-        description = re.sub(r'退款|退货|撤销', '', description)
+        # 跳过信用卡还款（负金额 + 含"还款"）
+        if tx['amount'] < 0 and '还款' in tx['description']:
+            return SKIP
 
-        return description.strip()
+        # 正常消费（正金额）
+        if tx['amount'] > 0:
+            return EXPENSE
+        # 负金额（退款）
+        return REFUND
 
     def _categorize(self, description: str, is_income: bool) -> Tuple[str, str]:
         """
@@ -7,9 +7,9 @@ PDF 表格列：序号 | 摘要 | 交易日期 | 交易金额 | 账户余额 | 
 """
 import re
 import pdfplumber
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 from base_parser import BaseParser
-from models import Transaction, BankStatement
+from models import Transaction, BankStatement, StreamingStatement
 
 
 class CCBDebitParser(BaseParser):
@@ -20,13 +20,15 @@ class CCBDebitParser(BaseParser):
     每行映射为一条 Transaction：
     - date      ← 交易日期（8 位）
     - amount    ← 交易金额（取 abs）
-    - account   ← 建行储蓄卡（与 accounts.json / merge.py DEBIT_ACCOUNTS 对齐）
+    - account   ← 建行储蓄卡（与 accounts.json 中的储蓄卡账户对齐）
     - 收入/支出 ← 金额 >= 0 为收入，< 0 为支出，is_income 传给分类映射
     """
 
     # 支出侧礼金/人情关键词（转出+这些词 → 送礼请客）
     GIFT_KEYWORDS = ["礼金", "生日", "出生", "结婚", "份子", "满月", "升学"]
 
+    STREAMING = True
+
     def __init__(self, config_path: str = None):
         super().__init__(config_path)
         self.account_name = "建行储蓄卡"
@@ -38,15 +40,7 @@ class CCBDebitParser(BaseParser):
         print(f"开始解析建设银行储蓄卡账单：{file_path}")
 
         account_number, statement_period = self._parse_header(file_path)
-        raw_rows = self._extract_table_rows(file_path)
-
-        transactions: List[Transaction] = []
-        for row in raw_rows:
-            tx = self._parse_row(row)
-            if tx:
-                transactions.append(tx)
-
-        print(f"解析完成，共 {len(transactions)} 条交易记录")
+        transactions = list(self._iter_transactions(file_path))
 
         return BankStatement(
             bank_name="建设银行",
@@ -56,6 +50,33 @@ class CCBDebitParser(BaseParser):
             transactions=transactions,
         )
 
+    def parse_stream(self, file_path: str) -> StreamingStatement:
+        """
+        流式解析：先从首页读取账号与起止日期，交易记录在遍历时逐页提取
+        """
+        print(f"开始解析建设银行储蓄卡账单：{file_path}")
+
+        account_number, statement_period = self._parse_header(file_path)
+
+        return StreamingStatement(
+            bank_name="建设银行",
+            account_name=self.account_name,
+            account_number=account_number,
+            statement_period=statement_period,
+            transactions=self._iter_transactions(file_path),
+        )
+
+    def _iter_transactions(self, file_path: str) -> Iterator[Transaction]:
+        """逐页提取表格行并逐条解析"""
+        count = 0
+        for row in self._extract_table_rows(file_path):
+            tx = self._parse_row(row)
+            if tx:
+                count += 1
+                yield tx
+
+        print(f"解析完成，共 {count} 条交易记录")
+
     def _parse_header(self, file_path: str) -> Tuple[str, str]:
         """
         从首页文本提取账号与起止日期
@@ -81,11 +102,10 @@ class CCBDebitParser(BaseParser):
 
         return account_number, statement_period
 
-    def _extract_table_rows(self, file_path: str) -> List[list]:
+    def _extract_table_rows(self, file_path: str) -> Iterator[list]:
         """
-        提取交易表格行（跳过表头与非交易行）
+        逐页产出交易表格行（跳过表头与非交易行，处理完一页即释放该页的缓存）
         """
-        rows: List[list] = []
         with pdfplumber.open(file_path) as pdf:
             for page in pdf.pages:
                 for table in (page.extract_tables() or []):
@@ -99,8 +119,8 @@ class CCBDebitParser(BaseParser):
                         # 交易行：序号为纯数字
                         if not re.match(r"^\d+$", first):
                             continue
-                        rows.append(r)
-        return rows
+                        yield r
+                page.close()
 
     def _parse_row(self, row: list) -> Optional[Transaction]:
         """
@@ -129,7 +149,7 @@ class CCBDebitParser(BaseParser):
             category=category,
             subcategory=subcategory,
             account=self.account_name,
-            amount=abs(amount),
+            amount_cents=abs(amount),
             description=description,
             transaction_type="收入" if is_income else "支出",
         )
@@ -48,7 +48,7 @@ class CCBParser(BaseParser):
                         category=category,
                         subcategory=subcategory,
                         account="建行储蓄卡",
-                        amount=abs(amount),
+                        amount_cents=abs(amount),
                         description=description,
                         transaction_type="收入" if is_income else "支出"
                     )
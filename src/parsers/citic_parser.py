@@ -4,12 +4,12 @@
 """
 import re
 import pdfplumber
-from typing import List, Tuple
-from base_parser import BaseParser
-from models import Transaction, BankStatement
+from typing import List, Optional, Tuple
+from credit_card_parser import CreditCardParser, EXPENSE, INCOME, REFUND, REPAYMENT, SKIP
+from models import BankStatement, to_cents, format_cents
 
 
-class CITICParser(BaseParser):
+class CITICParser(CreditCardParser):
     """
     中信银行信用卡解析器
     支持PDF格式的信用卡月账单
@@ -24,6 +24,15 @@ class CITICParser(BaseParser):
     - 返现/优惠（负金额）→ 收入
     """
 
+    supports_page_split = True
+
+    MERCHANT_FIELD = True
+    INCOME_LABEL = "返现收入"
+    KEEP_REPAYMENTS = True
+
+    # 退款关键词
+    REFUND_KEYWORDS = ['退款', '退货', '撤销']
+
     def __init__(self, config_path: str = None):
         super().__init__(config_path)
         self.account_name = "中信信用卡"
@@ -32,10 +41,13 @@ class CITICParser(BaseParser):
         """
         解析中信信用卡PDF账单文件
         """
-        print(f"开始解析中信信用卡账单：{file_path}")
+        return self.parse_lines(file_path, self._extract_pdf_text(file_path))
 
-        # 提取PDF文本
-        raw_lines = self._extract_pdf_text(file_path)
+    def parse_lines(self, file_path: str, raw_lines: List[str]) -> BankStatement:
+        """
+        由已提取的PDF文本行解析账单
+        """
+        print(f"开始解析中信信用卡账单：{file_path}")
 
         # 解析账户信息
         statement_period = self._parse_header(raw_lines)
@@ -56,13 +68,13 @@ class CITICParser(BaseParser):
             transactions=transactions
         )
 
-    def _extract_pdf_text(self, file_path: str) -> List[str]:
+    def _extract_pdf_text(self, file_path: str, start: int = 0, stop: Optional[int] = None) -> List[str]:
         """
-        从PDF提取文本行
+        从PDF提取文本行（可只提取第 start 到 stop-1 页）
         """
         all_lines = []
         with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
+            for page in pdf.pages[start:stop]:
                 text = page.extract_text()
                 if text:
                     lines = text.split('\n')
@@ -113,7 +125,7 @@ class CITICParser(BaseParser):
                 post_date = match.group(2)   # 记账日
                 description = match.group(4).strip()
                 amount_str = match.group(5)
-                amount = float(amount_str)
+                amount = to_cents(amount_str)
 
                 # 合并上一行的描述前缀
                 if pending_description:
@@ -129,7 +141,7 @@ class CITICParser(BaseParser):
                 transactions.append({
                     'date': date_str,
                     'description': description,
-                    'amount': amount,
+                    'amount': amount,  # 整数分
                     'original_line': line
                 })
             else:
@@ -182,161 +194,37 @@ class CITICParser(BaseParser):
 
         return transactions
 
-    def _process_refunds(self, raw_transactions: List[dict]) -> List[Transaction]:
+    def _classify_raw(self, tx: dict) -> Optional[str]:
         """
-        处理退款对冲逻辑：
-        1. 信用卡还款 → 跳过
+        交易归类：
+        1. 信用卡还款 → 跳过（负金额的还款保留为还款记录，供merge.py匹配转账来源）
         2. 返现/优惠（负金额）→ 收入
         3. 退款（正金额 + 退款关键词）→ 尝试与同商户消费对冲
         4. 正常消费（正金额）→ 支出
         """
-        # 分类交易
-        expenses = []      # 正常消费（正金额）
-        refunds = []       # 退款（正金额，含退款关键词，待对冲）
-        incomes = []       # 返现/优惠（负金额）
-        skip_count = 0
-
-        # 返现/优惠关键词
-        income_keywords = ['精彩笔笔返', '返现金', '指定银联手机Pay返现', '现金奖励', '支付券', '立减']
-        # 退款关键词
-        refund_keywords = ['退款', '退货', '撤销']
-
-        repayments = []    # 还款记录（负金额，保留用于merge匹配）
-
-        for tx in raw_transactions:
-            desc = tx['description']
-            amount = tx['amount']
-
-            # 信用卡还款（负金额，含"还款"关键词）
-            # 保留为收入记录，供merge.py匹配转账来源
-            if '还款' in desc and '还款日' not in desc:
-                if amount < 0:
-                    repayments.append(tx)
-                    print(f"  还款记录: {desc} {amount}")
-                else:
-                    skip_count += 1
-                    print(f"  跳过还款: {desc} {amount}")
-                continue
+        desc = tx['description']
+        amount = tx['amount']
 
-            # 负金额处理 = 返现/优惠（收入）
+        # 信用卡还款（负金额，含"还款"关键词）
+        if '还款' in desc and '还款日' not in desc:
             if amount < 0:
-                incomes.append(tx)
-                continue
-
-            # 正金额处理
-            if amount > 0:
-                # 检查是否是退款（含退款关键词）
-                if any(k in desc for k in refund_keywords):
-                    refunds.append(tx)
-                else:
-                    # 正常消费
-                    expenses.append(tx)
-
-        # 对冲退款（退款与消费对冲）
-        matched_expense_indices = set()
-        matched_refund_indices = set()
-
-        for ri, refund in enumerate(refunds):
-            refund_amount = refund['amount']  # 正金额
-            refund_merchant = self._extract_merchant(refund['description'])
-
-            # 查找同商户、同金额的消费
-            for ei, expense in enumerate(expenses):
-                if ei in matched_expense_indices:
-                    continue
-
-                expense_merchant = self._extract_merchant(expense['description'])
-
-                if (abs(expense['amount'] - refund_amount) < 0.01 and
-                    refund_merchant and expense_merchant and
-                    refund_merchant == expense_merchant):
-                    # 对冲成功
-                    matched_expense_indices.add(ei)
-                    matched_refund_indices.add(ri)
-                    print(f"  对冲: {expense['description']} {expense['amount']} <-> 退款 {refund['amount']}")
-                    break
-
-        # 生成最终交易列表
-        result = []
-
-        # 添加未对冲的消费
-        for i, exp in enumerate(expenses):
-            if i not in matched_expense_indices:
-                category, subcategory = self._categorize(exp['description'], False)
-                merchant = self._extract_merchant(exp['description'])
-                result.append(Transaction(
-                    date=exp['date'],
-                    category=category,
-                    subcategory=subcategory,
-                    account=self.account_name,
-                    amount=abs(exp['amount']),  # 统一取绝对值
-                    description=exp['description'],
-                    transaction_type="支出",
-                    merchant=merchant
-                ))
-
-        # 添加未对冲的退款（作为收入）
-        for i, ref in enumerate(refunds):
-            if i not in matched_refund_indices:
-                merchant = self._extract_merchant(ref['description'])
-                result.append(Transaction(
-                    date=ref['date'],
-                    category="其他收入",
-                    subcategory="退款",
-                    account=self.account_name,
-                    amount=ref['amount'],
-                    description=ref['description'] + " (未匹配退款)",
-                    transaction_type="收入",
-                    merchant=merchant
-                ))
-
-        # 添加返现/优惠收入
-        for inc in incomes:
-            result.append(Transaction(
-                date=inc['date'],
-                category="其他收入",
-                subcategory="抢红包",
-                account=self.account_name,
-                amount=abs(inc['amount']),
-                description=inc['description'],
-                transaction_type="收入"
-            ))
-
-        # 添加还款记录（用于merge.py匹配转账来源）
-        for rep in repayments:
-            result.append(Transaction(
-                date=rep['date'],
-                category="__REPAYMENT__",  # 特殊标记，merge.py匹配后会删除
-                subcategory="还款",
-                account=self.account_name,
-                amount=abs(rep['amount']),
-                description=rep['description'],
-                transaction_type="收入"
-            ))
-
-        print(f"  跳过还款: {skip_count} 笔")
-        print(f"  保留还款记录: {len(repayments)} 笔（用于匹配）")
-        print(f"  对冲退款: {len(matched_refund_indices)} 笔")
-        print(f"  返现收入: {len(incomes)} 笔")
-
-        return result
-
-    def _extract_merchant(self, description: str) -> str:
-        """
-        从描述中提取商户名称
-        例如: "支付宝－上海拉扎斯信息科技有限公司" -> "上海拉扎斯信息科技有限公司"
-              "财付通－Babycare" -> "Babycare"
-        """
-        # 移除支付渠道前缀
-        for prefix in ['支付宝－', '支付宝-', '财付通－', '财付通-', '微信支付－', 'Huawei Pay-']:
-            if description.startswith(prefix):
-                description = description[len(prefix):]
-                break
-
-        # 移除 "退款" "退货" 等后缀
-        description = re.sub(r'退款|退货|撤销', '', description)
-
-        return description.strip()
+                print(f"  还款记录: {desc} {format_cents(amount)}")
+                return REPAYMENT
+            print(f"  跳过还款: {desc} {format_cents(amount)}")
+            return SKIP
+
+        # 负金额处理 = 返现/优惠（收入）
+        if amount < 0:
+            return INCOME
+
+        # 正金额处理
+        if amount > 0:
+            # 检查是否是退款（含退款关键词）
+            if any(k in desc for k in self.REFUND_KEYWORDS):
+                return REFUND
+            # 正常消费
+            return EXPENSE
+        return None
 
     def _categorize(self, description: str, is_income: bool) -> Tuple[str, str]:
         """
@@ -4,12 +4,12 @@
 """
 import re
 import pdfplumber
-from typing import List, Tuple
-from base_parser import BaseParser
-from models import Transaction, BankStatement
+from typing import List, Optional, Tuple
+from credit_card_parser import CreditCardParser, EXPENSE, INCOME, REFUND, SKIP
+from models import BankStatement, to_cents
 
 
-class CMBParser(BaseParser):
+class CMBParser(CreditCardParser):
     """
     招商银行信用卡解析器
     支持PDF格式的信用卡月账单
@@ -20,6 +20,10 @@ class CMBParser(BaseParser):
     - 优惠/红包 → 收入
     """
 
+    supports_page_split = True
+
+    INCOME_LABEL = "优惠收入"
+
     def __init__(self, config_path: str = None):
         super().__init__(config_path)
         self.account_name = "招商信用卡"
@@ -28,10 +32,13 @@ class CMBParser(BaseParser):
         """
         解析招商信用卡PDF账单文件
         """
-        print(f"开始解析招商信用卡账单：{file_path}")
+        return self.parse_lines(file_path, self._extract_pdf_text(file_path))
 
-        # 提取PDF文本
-        raw_lines = self._extract_pdf_text(file_path)
+    def parse_lines(self, file_path: str, raw_lines: List[str]) -> BankStatement:
+        """
+        由已提取的PDF文本行解析账单
+        """
+        print(f"开始解析招商信用卡账单：{file_path}")
 
         # 解析账户信息
         statement_period = self._parse_header(raw_lines)
@@ -52,13 +59,13 @@ class CMBParser(BaseParser):
             transactions=transactions
         )
 
-    def _extract_pdf_text(self, file_path: str) -> List[str]:
+    def _extract_pdf_text(self, file_path: str, start: int = 0, stop: Optional[int] = None) -> List[str]:
         """
-        从PDF提取文本行
+        从PDF提取文本行（可只提取第 start 到 stop-1 页）
         """
         all_lines = []
         with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
+            for page in pdf.pages[start:stop]:
                 text = page.extract_text()
                 if text:
                     lines = text.split('\n')
@@ -111,7 +118,7 @@ class CMBParser(BaseParser):
                 post_date = match.group(2)   # 记账日
                 description = match.group(3).strip()
                 amount_str = match.group(4)
-                amount = float(amount_str)
+                amount = to_cents(amount_str)
 
                 # 解析日期，使用记账日
                 month, day = post_date.split('/')
@@ -125,141 +132,36 @@ class CMBParser(BaseParser):
                 transactions.append({
                     'date': date_str,
                     'description': description,
-                    'amount': amount,
+                    'amount': amount,  # 整数分
                     'original_line': line
                 })
 
         return transactions
 
-    def _process_refunds(self, raw_transactions: List[dict]) -> List[Transaction]:
+    def _classify_raw(self, tx: dict) -> Optional[str]:
         """
-        处理退款对冲逻辑：
+        交易归类：
         1. 信用卡还款 → 跳过
         2. 退款 → 尝试与同商户消费对冲
         3. 优惠/红包 → 收入
         """
-        # 分类交易
-        expenses = []  # 正常消费
-        refunds = []   # 退款（待对冲）
-        incomes = []   # 优惠/红包
-        skip_count = 0
-
-        for tx in raw_transactions:
-            desc = tx['description']
-            amount = tx['amount']
-
-            # 跳过信用卡还款
-            if '还款' in desc:
-                skip_count += 1
-                continue
-
-            # 负金额处理
-            if amount < 0:
-                # 优惠/红包类 → 收入
-                if any(k in desc for k in ['优惠', '红包', '抵扣', '返现', '奖励']):
-                    incomes.append(tx)
-                else:
-                    # 普通退款
-                    refunds.append(tx)
-                continue
-
-            # 正金额 = 正常消费
-            expenses.append(tx)
-
-        # 对冲退款
-        matched_expense_indices = set()
-        matched_refund_indices = set()
-
-        for ri, refund in enumerate(refunds):
-            refund_amount = abs(refund['amount'])
-            refund_merchant = self._extract_merchant(refund['description'])
-
-            # 查找同商户、同金额的消费
-            for ei, expense in enumerate(expenses):
-                if ei in matched_expense_indices:
-                    continue
-
-                expense_merchant = self._extract_merchant(expense['description'])
-                if (abs(expense['amount'] - refund_amount) < 0.01 and
-                    refund_merchant and expense_merchant and
-                    refund_merchant == expense_merchant):
-                    # 对冲成功
-                    matched_expense_indices.add(ei)
-                    matched_refund_indices.add(ri)
-                    print(f"  对冲: {expense['description']} {expense['amount']} <-> 退款 {refund['amount']}")
-                    break
-
-        # 生成最终交易列表
-        result = []
-
-        # 添加未对冲的消费
-        for i, exp in enumerate(expenses):
-            if i not in matched_expense_indices:
-                category, subcategory = self._categorize(exp['description'], False)
-                result.append(Transaction(
-                    date=exp['date'],
-                    category=category,
-                    subcategory=subcategory,
-                    account=self.account_name,
-                    amount=abs(exp['amount']),
-                    description=exp['description'],
-                    transaction_type="支出"
-                ))
-
-        # 添加未对冲的退款（作为收入）
-        for i, ref in enumerate(refunds):
-            if i not in matched_refund_indices:
-                result.append(Transaction(
-                    date=ref['date'],
-                    category="其他收入",
-                    subcategory="退款",
-                    account=self.account_name,
-                    amount=abs(ref['amount']),
-                    description=ref['description'] + " (未匹配退款)",
-                    transaction_type="收入"
-                ))
-
-        # 添加优惠/红包收入
-        for inc in incomes:
-            result.append(Transaction(
-                date=inc['date'],
-                category="其他收入",
-                subcategory="抢红包",
-                account=self.account_name,
-                amount=abs(inc['amount']),
-                description=inc['description'],
-                transaction_type="收入"
-            ))
-
-        print(f"  跳过还款: {skip_count} 笔")
-        print(f"  对冲退款: {len(matched_refund_indices)} 笔")
-        print(f"  优惠收入: {len(incomes)} 笔")
-
-        return result
-
-    def _extract_merchant(self, description: str) -> str:
-        """
-        从描述中提取商户名称
-        例如: "财付通-Manner Coffee" -> "Manner Coffee"
-              "掌上生活优惠商户-【月度新户专享】肯德基" -> "肯德基"
-        """
-        # 移除支付渠道前缀
-        for prefix in ['财付通-', '支付宝-', '微信支付-', '云闪付-']:
-            if prefix in description:
-                description = description.replace(prefix, '')
-                break
+        desc = tx['description']
+        amount = tx['amount']
 
-        # 处理掌上生活优惠商户格式
-        if '掌上生活优惠商户' in description:
-            # 提取最后的商户名（】后面的部分）
-            match = re.search(r'】(.+)$', description)
-            if match:
-                description = match.group(1)
+        # 跳过信用卡还款
+        if '还款' in desc:
+            return SKIP
 
-        # 移除 "退款" "退货" 等后缀
-        description = re.sub(r'退款|退货|撤销', '', description)
+        # 负金额处理
+        if amount < 0:
+            # 优惠/红包类 → 收入
+            if any(k in desc for k in ['优惠', '红包', '抵扣', '返现', '奖励']):
+                return INCOME
+            # 普通退款
+            return REFUND
 
-        return description.strip()
+        # 正金额 = 正常消费
+        return EXPENSE
 
     def _categorize(self, description: str, is_income: bool) -> Tuple[str, str]:
         """
@@ -5,11 +5,11 @@
 import re
 import pdfplumber
 from typing import List, Optional, Tuple
-from base_parser import BaseParser
-from models import Transaction, BankStatement
+from credit_card_parser import CreditCardParser, EXPENSE, INCOME, REFUND, SKIP
+from models import BankStatement, to_cents
 
 
-class SPDBParser(BaseParser):
+class SPDBParser(CreditCardParser):
     """
     浦发银行信用卡解析器
     支持PDF格式的信用卡月账单
@@ -20,6 +20,10 @@ class SPDBParser(BaseParser):
     - 退款（负金额）→ 与消费对冲
     """
 
+    supports_page_split = True
+
+    INCOME_LABEL = "红包收入"
+
     def __init__(self, config_path: str = None):
         super().__init__(config_path)
         self.account_name = "浦发信用卡"
@@ -28,10 +32,13 @@ class SPDBParser(BaseParser):
         """
         解析浦发信用卡PDF账单文件
         """
-        print(f"开始解析浦发信用卡账单：{file_path}")
+        return self.parse_lines(file_path, self._extract_pdf_text(file_path))
 
-        # 提取PDF文本
-        raw_lines = self._extract_pdf_text(file_path)
+    def parse_lines(self, file_path: str, raw_lines: List[str]) -> BankStatement:
+        """
+        由已提取的PDF文本行解析账单
+        """
+        print(f"开始解析浦发信用卡账单：{file_path}")
 
         # 解析账户信息
         statement_period = self._parse_header(raw_lines)
@@ -52,13 +59,13 @@ class SPDBParser(BaseParser):
             transactions=transactions
         )
 
-    def _extract_pdf_text(self, file_path: str) -> List[str]:
+    def _extract_pdf_text(self, file_path: str, start: int = 0, stop: Optional[int] = None) -> List[str]:
         """
-        从PDF提取文本行
+        从PDF提取文本行（可只提取第 start 到 stop-1 页）
         """
         all_lines = []
         with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
+            for page in pdf.pages[start:stop]:
                 text = page.extract_text()
                 if text:
                     lines = text.split('\n')
@@ -93,142 +100,44 @@ class SPDBParser(BaseParser):
                 date_str = match.group(1)
                 description = match.group(2).strip()
                 amount_str = match.group(4)
-                amount = float(amount_str)
+                amount = to_cents(amount_str)
 
                 transactions.append({
                     'date': f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}",
                     'description': description,
-                    'amount': amount,
+                    'amount': amount,  # 整数分
                     'original_line': line
                 })
 
         return transactions
 
-    def _process_refunds(self, raw_transactions: List[dict]) -> List[Transaction]:
+    def _classify_raw(self, tx: dict) -> Optional[str]:
         """
-        处理退款对冲逻辑：
+        交易归类：
         1. 信用卡还款 → 跳过
         2. 红包抵扣（分润金/抵扣）→ 收入
         3. 退款 → 尝试与同商户消费对冲
         """
-        # 分类交易
-        expenses = []  # 正常消费
-        refunds = []   # 退款（待对冲）
-        incomes = []   # 红包抵扣
-        skip_count = 0
-
-        for tx in raw_transactions:
-            desc = tx['description']
-            amount = tx['amount']
-
-            # 跳过信用卡还款
-            if '还款' in desc:
-                skip_count += 1
-                continue
-
-            # 红包抵扣 → 收入
-            if amount < 0 and ('分润金' in desc or '抵扣' in desc):
-                incomes.append(tx)
-                continue
-
-            # 红包退还 → 当作支出（抵消之前的收入）
-            if amount > 0 and '分润' in desc and '退还' in desc:
-                expenses.append(tx)
-                continue
-
-            # 正常消费
-            if amount > 0:
-                expenses.append(tx)
-            else:
-                # 负金额（退款）
-                refunds.append(tx)
+        desc = tx['description']
+        amount = tx['amount']
 
-        # 对冲退款
-        matched_expense_indices = set()
-        matched_refund_indices = set()
+        # 跳过信用卡还款
+        if '还款' in desc:
+            return SKIP
 
-        for ri, refund in enumerate(refunds):
-            refund_amount = abs(refund['amount'])
-            refund_merchant = self._extract_merchant(refund['description'])
-
-            # 查找同商户、同金额的消费
-            for ei, expense in enumerate(expenses):
-                if ei in matched_expense_indices:
-                    continue
-
-                expense_merchant = self._extract_merchant(expense['description'])
-                if (abs(expense['amount'] - refund_amount) < 0.01 and
-                    refund_merchant and expense_merchant and
-                    refund_merchant == expense_merchant):
-                    # 对冲成功
-                    matched_expense_indices.add(ei)
-                    matched_refund_indices.add(ri)
-                    print(f"  对冲: {expense['description']} {expense['amount']} <-> 退款 {refund['amount']}")
-                    break
-
-        # 生成最终交易列表
-        result = []
-
-        # 添加未对冲的消费
-        for i, exp in enumerate(expenses):
-            if i not in matched_expense_indices:
-                category, subcategory = self._categorize(exp['description'], False)
-                result.append(Transaction(
-                    date=exp['date'],
-                    category=category,
-                    subcategory=subcategory,
-                    account=self.account_name,
-                    amount=abs(exp['amount']),
-                    description=exp['description'],
-                    transaction_type="支出"
-                ))
-
-        # 添加未对冲的退款（作为收入）
-        for i, ref in enumerate(refunds):
-            if i not in matched_refund_indices:
-                result.append(Transaction(
-                    date=ref['date'],
-                    category="其他收入",
-                    subcategory="退款",
-                    account=self.account_name,
-                    amount=abs(ref['amount']),
-                    description=ref['description'] + " (未匹配退款)",
-                    transaction_type="收入"
-                ))
-
-        # 添加红包抵扣收入
-        for inc in incomes:
-            result.append(Transaction(
-                date=inc['date'],
-                category="其他收入",
-                subcategory="抢红包",
-                account=self.account_name,
-                amount=abs(inc['amount']),
-                description=inc['description'],
-                transaction_type="收入"
-            ))
-
-        print(f"  跳过还款: {skip_count} 笔")
-        print(f"  对冲退款: {len(matched_refund_indices)} 笔")
-        print(f"  红包收入: {len(incomes)} 笔")
-
-        return result
-
-    def _extract_merchant(self, description: str) -> str:
-        """
-        从描述中提取商户名称
-        例如: "支付宝-叮咚买菜" -> "叮咚买菜"
-        """
-        # 移除支付渠道前缀
-        for prefix in ['支付宝-', '微信支付-', '财付通-', '云闪付-']:
-            if prefix in description:
-                description = description.replace(prefix, '')
-                break
+        # 红包抵扣 → 收入
+        if amount < 0 and ('分润金' in desc or '抵扣' in desc):
+            return INCOME
 
-        # 移除 "退款" "退货" 等后缀
-        description = re.sub(r'退款|退货|撤销', '', description)
+        # 红包退还 → 当作支出（抵消之前的收入）
+        if amount > 0 and '分润' in desc and '退还' in desc:
+            return EXPENSE
 
-        return description.strip()
+        # 正常消费
+        if amount > 0:
+            return EXPENSE
+        # 负金额（退款）
+        return REFUND
 
     def _categorize(self, description: str, is_income: bool) -> Tuple[str, str]:
         """
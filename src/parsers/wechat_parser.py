@@ -5,8 +5,9 @@
 import re
 import pandas as pd
 from typing import List, Optional, Tuple
+from accounts import account_registry
 from base_parser import BaseParser
-from models import Transaction, BankStatement
+from models import Transaction, BankStatement, to_cents
 
 
 class WeChatParser(BaseParser):
@@ -157,7 +158,7 @@ class WeChatParser(BaseParser):
                 category="__FAMILY_CARD__",  # 特殊标记
                 subcategory=user_name,  # 记录使用者（如"张颖"）
                 account=bank_name or "__ANY_BANK__",  # 银行名或通配
-                amount=amount,
+                amount_cents=amount,
                 description=f"亲属卡交易 {user_name}".strip(),
                 transaction_type="__MARKER__",  # 特殊标记
                 merchant=user_name
@@ -176,7 +177,7 @@ class WeChatParser(BaseParser):
                 category="转账",
                 subcategory="转入微信",
                 account=source_bank or payment_method,
-                amount=amount,
+                amount_cents=amount,
                 description=f"{trade_type}".strip(),
                 transaction_type="转账",
                 transfer_to_account="微信",
@@ -216,23 +217,20 @@ class WeChatParser(BaseParser):
             category=category,
             subcategory=subcategory,
             account=self.account_name,
-            amount=amount,
+            amount_cents=amount,
             description=description,
             transaction_type=transaction_type,
             merchant=counterparty if counterparty != "/" else ""
         )
         return tx, False, False
 
-    def _parse_amount(self, amount_str: str) -> float:
-        """解析金额字符串"""
+    def _parse_amount(self, amount_str: str) -> int:
+        """解析金额字符串，返回整数分"""
         if not amount_str or amount_str == "/" or pd.isna(amount_str):
-            return 0.0
+            return 0
         # 移除¥符号和其他非数字字符
         cleaned = re.sub(r'[^\d.]', '', str(amount_str))
-        try:
-            return float(cleaned)
-        except ValueError:
-            return 0.0
+        return to_cents(cleaned)
 
     def _is_bank_payment(self, payment_method: str) -> bool:
         """检查是否是银行卡支付"""
@@ -244,17 +242,17 @@ class WeChatParser(BaseParser):
         return False
 
     def _extract_bank_name(self, payment_method: str) -> Optional[str]:
-        """从支付方式提取银行名称"""
+        """从支付方式提取银行名称（经账户登记表的别名解析为登记的账户名）"""
         # 格式: "农业银行储蓄卡(1970)" -> "农业银行"
         # 或: "中信银行信用卡(2359)" -> "中信信用卡"
         if "储蓄卡" in payment_method:
             match = re.match(r'(.+?)储蓄卡', payment_method)
             if match:
-                return match.group(1)
+                return account_registry().resolve(match.group(1))
         elif "信用卡" in payment_method:
             match = re.match(r'(.+?)银行信用卡', payment_method)
             if match:
-                return f"{match.group(1)}信用卡"
+                return account_registry().resolve(f"{match.group(1)}信用卡")
         return None
 
     def _apply_wechat_rules(self, trade_type: str, counterparty: str,
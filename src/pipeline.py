@@ -0,0 +1,114 @@
+"""
+一体化处理脚本
+解析目录中的所有账单后直接在内存中执行合并（退款对冲、转账识别、亲属卡处理），
+不再经过 *_随手记.xlsx 的写出与读回；各银行Excel可选择同时输出
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# 添加src目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from base_parser import BaseParser
+from main import SuiConverter, output_filename_for
+from merge import merge_transactions, transactions_as_read, write_merged
+from models import BankStatement
+from transaction_table import TransactionTable
+
+
+def parse_directory(converter: SuiConverter, input_dir: str) -> Dict[str, Tuple[str, BaseParser, BankStatement]]:
+    """
+    解析目录中的所有账单文件，返回 {随手记文件名: (账单文件路径, 解析器, 账单)}
+    文件遍历与跳过规则与 SuiConverter.process_directory 一致（同名输出时后者覆盖前者）
+    """
+    statements = {}
+    for filename in sorted(os.listdir(input_dir)):
+        file_path = os.path.join(input_dir, filename)
+
+        if not os.path.isfile(file_path):
+            continue
+
+        # 跳过隐藏文件和临时文件
+        if filename.startswith('.') or filename.startswith('~'):
+            continue
+
+        parsed = converter.parse_file(file_path)
+        if parsed is not None:
+            statements[output_filename_for(filename)] = (file_path, *parsed)
+    return statements
+
+
+def statements_to_table(statements: Dict[str, BankStatement]) -> TransactionTable:
+    """
+    按随手记文件名排序拼接各账单的交易记录，与 merge.py 读取输出目录的顺序和取值一致
+    """
+    transactions: List = []
+    for output_filename in sorted(statements):
+        # merge.py 不读取 merged* 文件
+        if output_filename.startswith('merged'):
+            continue
+        transactions.extend(transactions_as_read(statements[output_filename].transactions))
+    return TransactionTable.from_transactions(transactions)
+
+
+def run_pipeline(input_dir: str, output_dir: str, output_path: str = None, write_workbooks: bool = False):
+    """
+    一体化处理主函数：解析 -> 内存合并 -> 生成合并文件
+    """
+    start = time.perf_counter()
+    print(f"=== 开始一体化处理 ===")
+    print(f"输入目录: {input_dir}")
+
+    converter = SuiConverter()
+    statements = parse_directory(converter, input_dir)
+
+    if not statements:
+        print("未解析到任何账单")
+        return
+
+    if write_workbooks:
+        for output_filename, (input_path, parser, statement) in sorted(statements.items()):
+            converter.write_outputs(input_path, os.path.join(output_dir, output_filename), parser, statement)
+
+    transactions = statements_to_table({name: statement for name, (_, _, statement) in statements.items()})
+    total_count = len(transactions)
+    print(f"\n合计 {total_count} 条交易记录（解析耗时 {time.perf_counter() - start:.2f}s）")
+
+    transactions = merge_transactions(transactions)
+
+    if output_path is None:
+        output_path = os.path.join(output_dir, "merged_账单.xlsx")
+    write_merged(transactions, output_path)
+
+    print(f"\n处理完成！")
+    print(f"  账单文件: {len(statements)} 个")
+    print(f"  原始记录: {total_count} 条")
+    print(f"  最终记录: {len(transactions)} 条")
+    print(f"  输出文件: {output_path}")
+    print(f"  总耗时: {time.perf_counter() - start:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="一体化处理：解析账单并在内存中合并，直接生成合并文件",
+        epilog="示例: python pipeline.py input/ output/\n      python pipeline.py input/ output/ --workbooks",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input_dir", help="账单文件目录")
+    parser.add_argument("output_dir", nargs="?", default="output", help="输出目录（默认 output）")
+    parser.add_argument("--output", default=None, help="合并文件路径（默认 <输出目录>/merged_账单.xlsx）")
+    parser.add_argument("--workbooks", action="store_true", help="同时输出各账单的 *_随手记.xlsx")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"错误: 目录不存在 {args.input_dir}")
+        sys.exit(1)
+
+    run_pipeline(args.input_dir, args.output_dir, args.output, write_workbooks=args.workbooks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+转换调度模块
+并发转换前按文件大小、PDF 页数和解析器类型预估每个账单的转换耗时，
+SuiConverter 据此先派发耗时最长的任务，并可把页数很多的 PDF 按页范围拆给多个进程提取文本；
+并发转换时每个文件的预估与实际耗时追加写入输出目录的 .sui_costs.jsonl（只保留最近 MAX_COST_RECORDS 条），
+用于校准下面的耗时系数
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import pdfplumber
+
+COST_LOG_NAME = ".sui_costs.jsonl"
+
+# 耗时日志最多保留的记录数（超出时丢弃最早的记录）
+MAX_COST_RECORDS = 2000
+
+# 解析器耗时系数（秒）：(每页, 每 MB)；PDF 按页数估算，页数读取失败或非 PDF 时按文件大小估算
+# 表格提取（建行储蓄卡 PDF）明显慢于纯文本提取
+PARSER_COSTS = {
+    "ABCParser": (0.12, 1.5),
+    "SPDBParser": (0.12, 1.5),
+    "CMBParser": (0.12, 1.5),
+    "CITICParser": (0.12, 1.5),
+    "CCBCreditParser": (0.12, 1.5),
+    "CCBDebitParser": (0.35, 4.0),
+    "BOCParser": (0.12, 1.5),
+    "CCBParser": (0.0, 0.5),
+    "WeChatParser": (0.0, 2.0),
+    "AlipayParser": (0.0, 0.5),
+}
+DEFAULT_COSTS = (0.15, 2.0)
+
+# 每个文件的固定开销（生成随手记Excel、写列式副本）
+FILE_OVERHEAD = 0.05
+
+
+@dataclass
+class FileCost:
+    """
+    单个账单文件的预估转换耗时
+    """
+    parser: Optional[str]
+    size: int
+    pages: int
+    estimated: float
+
+
+def pdf_page_count(file_path: str) -> int:
+    """
+    PDF 页数（只读取页面树，不解析页面内容）；非 PDF 或读取失败时返回 0
+    """
+    if not file_path.lower().endswith(".pdf"):
+        return 0
+    try:
+        with pdfplumber.open(file_path) as pdf:
+            return len(pdf.pages)
+    except Exception:
+        return 0
+
+
+def estimate_cost(file_path: str, parser_class=None) -> FileCost:
+    """
+    按文件大小、PDF 页数和解析器类型预估转换耗时（秒）
+    """
+    parser = parser_class.__name__ if parser_class is not None else None
+    size = os.path.getsize(file_path)
+    pages = pdf_page_count(file_path) if parser_class is not None else 0
+    per_page, per_mb = PARSER_COSTS.get(parser, DEFAULT_COSTS)
+    if pages:
+        estimated = per_page * pages
+    else:
+        estimated = per_mb * size / (1024 * 1024)
+    return FileCost(parser, size, pages, FILE_OVERHEAD + estimated)
+
+
+def page_ranges(pages: int, split_pages: int) -> List[Tuple[int, int]]:
+    """
+    按每段 split_pages 页拆分为 [(起始页, 结束页)]（结束页不含）
+    """
+    return [(start, min(start + split_pages, pages)) for start in range(0, pages, split_pages)]
+
+
+def split_ranges(parser_class, cost: FileCost, split_pages: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    可按页拆分提取时返回各段页范围：解析器支持按页拆分（supports_page_split）且页数超过 split_pages；
+    否则返回 None
+    """
+    if split_pages <= 0 or parser_class is None or not parser_class.supports_page_split:
+        return None
+    if cost.pages <= split_pages:
+        return None
+    return page_ranges(cost.pages, split_pages)
+
+
+def longest_first(costs: List[float]) -> List[int]:
+    """
+    按预估耗时从长到短排列的下标（耗时相同时保持原顺序）
+    """
+    return sorted(range(len(costs)), key=lambda i: -costs[i])
+
+
+class CostLog:
+    """
+    预估/实际耗时日志，每行 JSON 记录一个文件；每次运行追加本次的记录，只保留最近 MAX_COST_RECORDS 条
+    """
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, COST_LOG_NAME)
+        self.records: List[dict] = []
+
+    def record(self, filename: str, cost: FileCost, actual: float, result, parts: int = 1):
+        self.records.append({
+            "file": filename,
+            "parser": cost.parser,
+            "size": cost.size,
+            "pages": cost.pages,
+            "parts": parts,
+            "estimated": round(cost.estimated, 3),
+            "actual": round(actual, 3),
+            "ok": bool(result),
+        })
+
+    def save(self):
+        if not self.records:
+            return
+        lines = []
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = [line for line in f if line.strip()]
+        lines += [json.dumps(record, ensure_ascii=False) + "\n" for record in self.records]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines[-MAX_COST_RECORDS:])
+        os.replace(tmp_path, self.path)
+        self.records = []
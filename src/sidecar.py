@@ -0,0 +1,155 @@
+"""
+列式二进制副本模块
+main.py 在每个 *_随手记.xlsx 旁写出同名 .npz 文件，按列保存交易记录（与从 xlsx 读回的内容一致），
+并记录解析器名称、版本和账单文件哈希；merge.py 读取时优先使用，省去 xlsx 解析
+"""
+import hashlib
+import json
+import os
+import zipfile
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from models import Transaction
+from transaction_table import CODED_COLUMNS, NO_ORIGIN, StringPool, TransactionTable
+
+# 格式版本：列布局变化时递增，版本不一致的副本不再读取
+SIDECAR_SCHEMA_VERSION = 1
+
+SIDECAR_SUFFIX = ".npz"
+
+# 副本损坏或不完整时 np.load 可能抛出的异常
+LOAD_ERRORS = (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile)
+
+# 以 UTF-8 拼接 + 长度数组保存的文本列
+_TEXT_COLUMNS = ("date", "description", "merchant")
+
+
+def sidecar_path_for(xlsx_path: str) -> str:
+    """xlsx 文件对应的副本路径"""
+    return os.path.splitext(xlsx_path)[0] + SIDECAR_SUFFIX
+
+
+def file_sha256(file_path: str) -> str:
+    """文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pack_texts(values: Iterable[Optional[str]]):
+    """字符串列表打包为 (UTF-8 字节, 字符长度)；None 记为长度 -1"""
+    values = list(values)
+    lengths = np.array([-1 if v is None else len(v) for v in values], dtype=np.int32)
+    blob = "".join(v for v in values if v is not None).encode("utf-8")
+    return np.frombuffer(blob, dtype=np.uint8), lengths
+
+
+def _unpack_texts(blob: np.ndarray, lengths: np.ndarray) -> List[Optional[str]]:
+    text = blob.tobytes().decode("utf-8")
+    lengths = lengths.tolist()
+    ends = accumulate(max(n, 0) for n in lengths)
+    values = []
+    start = 0
+    for n, end in zip(lengths, ends):
+        values.append(None if n < 0 else text[start:end])
+        start = end
+    return values
+
+
+def table_to_arrays(table: TransactionTable, prefix: str = "") -> Dict[str, np.ndarray]:
+    """列式表转为可写入 npz 的数组（不含 origin 列）"""
+    arrays = {f"{prefix}date_ord": table.date_ord, f"{prefix}cents": table.cents}
+    arrays[f"{prefix}pool"], arrays[f"{prefix}pool_lengths"] = _pack_texts(table.pool.strings)
+    for name in CODED_COLUMNS:
+        arrays[prefix + name] = getattr(table, name)
+    for name in _TEXT_COLUMNS:
+        arrays[prefix + name], arrays[f"{prefix}{name}_lengths"] = _pack_texts(getattr(table, name))
+    return arrays
+
+
+def table_from_arrays(data, prefix: str = "") -> TransactionTable:
+    """由 table_to_arrays 写出的数组还原列式表"""
+    table = TransactionTable(StringPool(_unpack_texts(data[f"{prefix}pool"], data[f"{prefix}pool_lengths"])))
+    table.date_ord = data[f"{prefix}date_ord"]
+    table.cents = data[f"{prefix}cents"]
+    for name in CODED_COLUMNS:
+        setattr(table, name, data[prefix + name])
+    for name in _TEXT_COLUMNS:
+        values = _unpack_texts(data[prefix + name], data[f"{prefix}{name}_lengths"])
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        setattr(table, name, array)
+    table.origin = np.full(len(table), NO_ORIGIN, dtype=np.int64)
+    return table
+
+
+def encode_meta(meta: dict) -> np.ndarray:
+    """元数据字典编码为字节数组"""
+    return np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+
+
+def decode_meta(array: np.ndarray) -> dict:
+    return json.loads(array.tobytes().decode("utf-8"))
+
+
+def save_arrays(path: str, arrays: Dict[str, np.ndarray]):
+    """
+    写出 npz（与 np.savez 格式相同，条目时间戳固定，相同内容逐字节相同）
+    先写临时文件再替换，避免留下不完整的文件
+    """
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, array in arrays.items():
+            info = zipfile.ZipInfo(name + ".npy", date_time=(1980, 1, 1, 0, 0, 0))
+            with archive.open(info, "w", force_zip64=True) as f:
+                np.lib.format.write_array(f, np.asanyarray(array), allow_pickle=False)
+    os.replace(tmp_path, path)
+
+
+def write_sidecar(xlsx_path: str, transactions: List[Transaction],
+                  parser_name: str, parser_version: str, source_hash: str) -> str:
+    """
+    写出列式副本
+    transactions 应为 xlsx 读回后的形态（见 merge.transactions_as_read）
+    """
+    table = TransactionTable.from_transactions(transactions)
+    meta = {
+        "schema_version": SIDECAR_SCHEMA_VERSION,
+        "parser": parser_name,
+        "parser_version": parser_version,
+        "source_sha256": source_hash,
+        "rows": len(table),
+    }
+
+    arrays = table_to_arrays(table)
+    arrays["meta"] = encode_meta(meta)
+    path = sidecar_path_for(xlsx_path)
+    save_arrays(path, arrays)
+    return path
+
+
+def load_sidecar(xlsx_path: str) -> Optional[TransactionTable]:
+    """
+    读取 xlsx 对应的列式副本
+    副本不存在、早于 xlsx（xlsx 被修改过）、格式版本不一致或损坏时返回 None，调用方改读 xlsx
+    """
+    path = sidecar_path_for(xlsx_path)
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(xlsx_path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            meta = decode_meta(data["meta"])
+            if meta.get("schema_version") != SIDECAR_SCHEMA_VERSION:
+                return None
+            table = table_from_arrays(data)
+    except LOAD_ERRORS:
+        return None
+
+    if len(table) != meta.get("rows"):
+        return None
+    return table
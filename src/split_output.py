@@ -0,0 +1,215 @@
+"""
+合并结果分卷输出模块
+随手记导入大文件较慢，merge.py 可按自然周期（月/季/年）和/或行数上限把合并结果拆成多个工作簿：
+每个分卷保持支出/收入/转账三个Sheet的布局（或所选输出格式的对应文件），由进程池并发写出；
+同时生成 <合并文件>_index.json，列出各分卷的日期范围和各Sheet行数
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from base_writer import sheet_indices
+from transaction_table import TransactionTable
+from writers import get_writer
+
+# 索引格式版本
+INDEX_VERSION = 1
+
+INDEX_SUFFIX = "_index.json"
+
+# 分卷周期
+PERIODS = ("month", "quarter", "year")
+
+# 日期无法解析的行单独成卷
+UNDATED_LABEL = "未知日期"
+
+
+def positive_int(text: str) -> int:
+    """命令行参数类型：正整数（如 --max-rows）"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"应为正整数: {text}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"应为正整数: {text}")
+    return value
+
+
+def index_path_for(output_path: str) -> str:
+    """合并文件对应的分卷索引路径"""
+    return os.path.splitext(output_path)[0] + INDEX_SUFFIX
+
+
+def part_path_for(output_path: str, label: str) -> str:
+    """分卷文件路径：<合并文件名>_<标签>.xlsx"""
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}_{label}{ext}"
+
+
+def _period_code(ordinal: int, split_by: str) -> int:
+    """日期序数 -> 周期编号（可排序）；无法解析的日期为 -1"""
+    if ordinal <= 0:
+        return -1
+    day = date.fromordinal(ordinal)
+    if split_by == "year":
+        return day.year
+    if split_by == "quarter":
+        return day.year * 4 + (day.month - 1) // 3
+    return day.year * 12 + day.month - 1
+
+
+def _period_label(code: int, split_by: str) -> str:
+    if code < 0:
+        return UNDATED_LABEL
+    if split_by == "year":
+        return str(code)
+    if split_by == "quarter":
+        return f"{code // 4}-Q{code % 4 + 1}"
+    return f"{code // 12}-{code % 12 + 1:02d}"
+
+
+def plan_parts(table: TransactionTable, split_by: Optional[str] = None,
+               max_rows: Optional[int] = None) -> List[Tuple[str, np.ndarray]]:
+    """
+    划分分卷，返回 [(标签, 行号数组)]
+    先按周期分组（周期内保持原有顺序），再把超过 max_rows 的分组按顺序切成多卷
+    """
+    if max_rows is not None and max_rows < 1:
+        raise ValueError(f"每卷最多的记录数应为正整数: {max_rows}")
+    if split_by is not None:
+        ordinals = np.unique(table.date_ord)
+        codes_by_ordinal = {int(o): _period_code(int(o), split_by) for o in ordinals}
+        codes = np.array([codes_by_ordinal[o] for o in table.date_ord.tolist()], dtype=np.int64)
+        order = np.argsort(codes, kind="stable")
+        groups = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1)
+        groups = [(_period_label(int(codes[g[0]]), split_by), g) for g in groups if len(g)]
+    else:
+        groups = [("", np.arange(len(table)))]
+
+    parts = []
+    for label, indices in groups:
+        if max_rows is None or len(indices) <= max_rows:
+            parts.append((label or "part1", indices))
+            continue
+        chunks = [indices[i:i + max_rows] for i in range(0, len(indices), max_rows)]
+        width = len(str(len(chunks)))
+        for n, chunk in enumerate(chunks, 1):
+            parts.append((f"{label}_{n:0{width}d}" if label else f"part{n:0{width}d}", chunk))
+    return parts
+
+
+def _sheet_counts(table: TransactionTable) -> dict:
+    """各Sheet的行数"""
+    return {sheet_name: len(indices) for sheet_name, indices in sheet_indices(table).items()}
+
+
+def _date_range(table: TransactionTable) -> Tuple[Optional[str], Optional[str]]:
+    """有效日期中最早和最晚的一天（全部无法解析时为 None）"""
+    valid = np.flatnonzero(table.date_ord > 0)
+    if not len(valid):
+        return None, None
+    ordinals = table.date_ord[valid]
+    return table.date[valid[np.argmin(ordinals)]], table.date[valid[np.argmax(ordinals)]]
+
+
+def write_part(table: TransactionTable, path: str, fmt: Optional[str] = None) -> float:
+    """
+    写出一个分卷（Excel 为只写模式），返回耗时秒数
+    供进程池调用，写入器的控制台输出不打印，由调用方统一汇总
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        get_writer(fmt).write_table(table, path)
+    return time.perf_counter() - start
+
+
+def _load_index(index_path: str) -> Optional[dict]:
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def _part_files(directory: str, part_file: str, fmt: Optional[str]) -> List[str]:
+    """分卷实际生成的文件（CSV/TSV 每个Sheet一个文件）"""
+    return get_writer(fmt).output_paths(os.path.join(directory, part_file))
+
+
+def parts_up_to_date(output_path: str, split_by: Optional[str], max_rows: Optional[int],
+                     fmt: Optional[str] = None) -> bool:
+    """索引存在、分卷方式和输出格式一致且所列分卷文件都存在"""
+    index = _load_index(index_path_for(output_path))
+    if (index is None or index.get("split_by") != split_by or index.get("max_rows") != max_rows
+            or index.get("format") != get_writer(fmt).FORMAT):
+        return False
+    directory = os.path.dirname(output_path)
+    return all(os.path.exists(path) for part in index["parts"]
+               for path in _part_files(directory, part["file"], fmt))
+
+
+def write_split(table: TransactionTable, output_path: str, split_by: Optional[str] = None,
+                max_rows: Optional[int] = None, jobs: Optional[int] = None, fmt: Optional[str] = None) -> str:
+    """
+    分卷写出合并结果（table 已按日期排序），返回索引文件路径
+    上次索引中不再使用的分卷文件会被删除
+    """
+    parts = plan_parts(table, split_by, max_rows)
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tables = [table.take(indices) for _, indices in parts]
+    paths = [part_path_for(output_path, label) for label, _ in parts]
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(parts)))
+    print(f"  分卷写出 {len(parts)} 个文件（{jobs} 个进程）")
+    if jobs == 1:
+        elapsed = [write_part(part, path, fmt) for part, path in zip(tables, paths)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            elapsed = list(executor.map(write_part, tables, paths, [fmt] * len(paths)))
+
+    entries = []
+    for part, path, seconds in zip(tables, paths, elapsed):
+        start_date, end_date = _date_range(part)
+        counts = _sheet_counts(part)
+        entries.append({"file": os.path.basename(path), "start_date": start_date, "end_date": end_date,
+                        "rows": len(part), **counts})
+        print(f"  {os.path.basename(path)}: {start_date} ~ {end_date}，{len(part)} 条"
+              f"（支出 {counts['支出']} / 收入 {counts['收入']} / 转账 {counts['转账']}，{seconds:.2f}s）")
+
+    index_path = index_path_for(output_path)
+    previous = _load_index(index_path)
+    if previous is not None:
+        current = {path for entry in entries for path in _part_files(directory, entry["file"], fmt)}
+        for part in previous["parts"]:
+            for stale in _part_files(directory, part["file"], previous.get("format")):
+                if stale not in current and os.path.exists(stale):
+                    os.remove(stale)
+
+    index = {
+        "version": INDEX_VERSION,
+        "format": get_writer(fmt).FORMAT,
+        "split_by": split_by,
+        "max_rows": max_rows,
+        "total_rows": len(table),
+        "parts": entries,
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, index_path)
+    print(f"  分卷索引: {index_path}")
+    return index_path
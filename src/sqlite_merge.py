@@ -0,0 +1,381 @@
+"""
+SQLite 合并引擎
+多年、多成员的大数据量下，把交易批量载入本地 SQLite 数据库（标准库 sqlite3），按 (金额分, 日期)、
+(账户, 金额分, 日期)、(日期, 金额分) 建索引，退款对冲、转账识别、亲属卡处理改为索引上的查询：
+- 能整体完成的用一条集合查询：精确退款按 (商户, 金额分) 分组后第 k 笔退款配第 k 笔消费，
+  转账候选、未匹配的还款标记由查询选出
+- "按行号顺序取第一条未匹配的候选"的贪心配对（模糊退款、转账两轮、亲属卡）逐条执行
+  带 ORDER BY 行号 LIMIT 1 的索引查询：每次配对都会改变后续查询的候选，无法改写为一条集合查询，
+  配对结果与 merge.py 的内存合并相同
+
+结果（含行来源 origin）与内存合并一致，用于核对内存合并和在数据库中查看合并过程，并不省内存、也不更快：
+输入列式表、转账识别结果仍整表留在内存中（数据库只多存一份匹配所需的列），逐条查询使整体耗时约为内存合并的
+2~3 倍（见 benchmarks/bench_sqlite_merge.py）。数据库默认是临时文件，合并后删除；--db 指定的文件保留，
+已存在的文件不会被覆盖
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Set, Tuple
+
+import numpy as np
+
+# 添加src目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from accounts import BANK, account_registry
+from merge import (bank_data_rows, family_card_candidate_rows, family_card_marker_rows, is_masked_or_person_name,
+                   list_excel_files, read_workbooks, refund_rows, transfer_candidates, transfer_row,
+                   transfer_subcategory, write_merged)
+from transaction_table import ORIGIN_ROUND_SHIFT, TransactionTable
+from writers import FORMATS, get_writer
+
+# tx.flags 各位
+EXPENSE = 1          # 支出（退款对冲的候选消费）
+REFUND = 2           # 退款
+MASKED = 4           # 退款商户为脱敏商户名或人名（可模糊匹配）
+CREDIT_INCOME = 8    # 信用卡/钱包收入（还款）
+NEED_MATCH = 16      # 需通过金额匹配确定目标的储蓄卡支出
+REPAYMENT_MARKER = 32  # 信用卡解析器的 __REPAYMENT__ 标记
+
+SCHEMA = """
+CREATE TABLE tx (
+    row INTEGER PRIMARY KEY,      -- 输入表中的行号（内存合并的处理顺序）
+    date_ord INTEGER NOT NULL,
+    cents INTEGER NOT NULL,
+    account TEXT,
+    merchant_key TEXT NOT NULL,
+    target TEXT,                  -- 有明确目标的储蓄卡支出的转入账户
+    flags INTEGER NOT NULL,
+    keep INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE family (
+    row INTEGER PRIMARY KEY,      -- 转账识别结果中的行号
+    date TEXT,
+    cents INTEGER NOT NULL,
+    account TEXT,
+    candidate INTEGER NOT NULL,   -- 可与亲属卡标记匹配
+    keep INTEGER NOT NULL DEFAULT 1,
+    matched INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# 载入后再建索引（批量插入时不维护索引）
+TX_INDEXES = """
+CREATE INDEX tx_cents_date ON tx (cents, date_ord);
+CREATE INDEX tx_account_cents_date ON tx (account, cents, date_ord);
+CREATE INDEX tx_merchant_cents ON tx (merchant_key, cents);
+"""
+FAMILY_INDEXES = """
+CREATE INDEX family_date_cents ON family (date, cents);
+"""
+
+# 精确退款：同一 (商户, 金额分) 中按行号第 k 笔退款与第 k 笔消费配对（与内存合并逐笔从队首取消费相同）
+EXACT_REFUNDS = f"""
+WITH expenses AS (
+    SELECT row, merchant_key, cents,
+           ROW_NUMBER() OVER (PARTITION BY merchant_key, cents ORDER BY row) AS n
+    FROM tx WHERE flags & {EXPENSE} AND merchant_key != ''
+), refunds AS (
+    SELECT row, merchant_key, cents,
+           ROW_NUMBER() OVER (PARTITION BY merchant_key, cents ORDER BY row) AS n
+    FROM tx WHERE flags & {REFUND} AND merchant_key != ''
+)
+SELECT refunds.row, expenses.row
+FROM refunds JOIN expenses USING (merchant_key, cents, n)
+ORDER BY refunds.row
+"""
+
+# 日期在 [?, ?] 内、按行号第一条未删除的消费 / 信用卡收入
+FIRST_EXPENSE_BY_CENTS = f"""
+SELECT row FROM tx INDEXED BY tx_cents_date
+WHERE cents = ? AND date_ord BETWEEN ? AND ? AND flags & {EXPENSE} AND keep
+ORDER BY row LIMIT 1
+"""
+FIRST_INCOME_BY_ACCOUNT = f"""
+SELECT row FROM tx INDEXED BY tx_account_cents_date
+WHERE account = ? AND cents = ? AND date_ord BETWEEN ? AND ? AND flags & {CREDIT_INCOME} AND keep
+ORDER BY row LIMIT 1
+"""
+FIRST_INCOME_BY_CENTS = f"""
+SELECT row FROM tx INDEXED BY tx_cents_date
+WHERE cents = ? AND date_ord BETWEEN ? AND ? AND flags & {CREDIT_INCOME} AND keep
+ORDER BY row LIMIT 1
+"""
+
+# 同日期、同金额、按行号第一条未删除且未匹配的银行卡交易（指定银行时再按账户筛选）
+FIRST_FAMILY_CANDIDATE = """
+SELECT row FROM family INDEXED BY family_date_cents
+WHERE date = ? AND cents = ? AND candidate AND keep AND NOT matched
+ORDER BY row LIMIT 1
+"""
+FIRST_FAMILY_CANDIDATE_IN_ACCOUNT = """
+SELECT row FROM family INDEXED BY family_date_cents
+WHERE date = ? AND cents = ? AND candidate AND keep AND NOT matched AND account = ?
+ORDER BY row LIMIT 1
+"""
+
+
+@contextmanager
+def database(db_path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """
+    打开合并用的数据库（db_path 为 None 时使用临时文件，关闭后删除；db_path 指定的文件合并后保留）
+    db_path 已存在时抛出 FileExistsError，不覆盖、不删除已有文件。
+    只在本次合并中使用，不需要日志和同步写盘
+    """
+    if db_path is not None and os.path.exists(db_path):
+        raise FileExistsError(f"数据库文件已存在: {db_path}")
+    with tempfile.TemporaryDirectory(prefix="sui_sqlite_") as tmp_dir:
+        conn = sqlite3.connect(db_path or os.path.join(tmp_dir, "merge.sqlite"))
+        try:
+            conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;" + SCHEMA)
+            yield conn
+        finally:
+            conn.close()
+
+
+def _window(date_ord: int, days: int) -> Tuple[int, int]:
+    """日期序数 ±days 的范围（日期无法解析的行不参与按日期的匹配）"""
+    return max(date_ord - days, 1), date_ord + days
+
+
+def load_transactions(conn: sqlite3.Connection, table: TransactionTable):
+    """
+    批量载入退款对冲与转账识别所需的列和各行的角色标志（候选的选取与 merge.py 相同）
+    """
+    fields = table.text_fields()
+    flags = np.zeros(len(table), dtype=np.int64)
+    flags[table.tx_type == table.code("支出")] |= EXPENSE
+    refunds = refund_rows(table)
+    flags[refunds] |= REFUND
+    masked = [i for i in refunds if is_masked_or_person_name(table.merchant[i] or "")]
+    flags[np.array(masked, dtype=np.int64)] |= MASKED
+
+    with_target, need_match, credit_incomes = transfer_candidates(table)
+    targets = [None] * len(table)
+    for i, target in with_target:
+        targets[i] = target
+    flags[np.array(need_match, dtype=np.int64)] |= NEED_MATCH
+    flags[credit_incomes] |= CREDIT_INCOME
+    flags[table.category == table.code("__REPAYMENT__")] |= REPAYMENT_MARKER
+
+    conn.executemany(
+        "INSERT INTO tx (row, date_ord, cents, account, merchant_key, target, flags) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        zip(range(len(table)), table.date_ord.tolist(), table.cents.tolist(),
+            (table.pool.text(code) for code in table.account.tolist()),
+            (key or "" for key in fields.merchant_key), targets, flags.tolist()),
+    )
+
+
+def reconcile_refunds(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """退款对冲，返回 (精确匹配对数, 模糊匹配对数)"""
+    print("\n=== 开始退款对冲 ===")
+    pairs = conn.execute(EXACT_REFUNDS).fetchall()
+    conn.executemany("UPDATE tx SET keep = 0 WHERE row = ?", [(row,) for pair in pairs for row in pair])
+
+    fuzzy_count = 0
+    refunds = conn.execute(f"SELECT row, cents, date_ord FROM tx WHERE flags & {MASKED} AND keep "
+                           f"AND date_ord > 0 ORDER BY row").fetchall()
+    for ref_row, cents, date_ord in refunds:
+        # 按金额匹配 + 日期接近（±30天，因为退款可能很晚）
+        found = conn.execute(FIRST_EXPENSE_BY_CENTS, (cents, *_window(date_ord, 30))).fetchone()
+        if found is not None:
+            conn.executemany("UPDATE tx SET keep = 0 WHERE row = ?", [(ref_row,), found])
+            fuzzy_count += 1
+
+    print(f"退款对冲完成：精确匹配 {len(pairs)} 对，模糊匹配 {fuzzy_count} 对")
+    print(f"  删除 {2 * (len(pairs) + fuzzy_count)} 条记录")
+    return len(pairs), fuzzy_count
+
+
+def identify_transfers(conn: sqlite3.Connection, table: TransactionTable) -> TransactionTable:
+    """
+    转账识别（在退款对冲后的行上执行），返回转账识别结果：
+    保留的行按原顺序在前，转账记录按生成顺序（先第一轮、后第二轮）在后，与内存合并相同
+    """
+    print("\n=== 开始转账识别 ===")
+    before = conn.execute("SELECT COUNT(*) FROM tx WHERE keep").fetchone()[0]
+    transfers, origins = [], []
+
+    # 第一轮：有明确目标的转账，尝试匹配目标账户的同金额收入
+    first_round = conn.execute("SELECT row, cents, date_ord, target FROM tx WHERE target IS NOT NULL AND keep "
+                               "ORDER BY row").fetchall()
+    for exp_row, cents, date_ord, target in first_round:
+        income = None
+        if date_ord > 0:
+            income = conn.execute(FIRST_INCOME_BY_ACCOUNT, (target, cents, *_window(date_ord, 3))).fetchone()
+        conn.executemany("UPDATE tx SET keep = 0 WHERE row = ?", [(exp_row,)] + ([income] if income else []))
+        transfers.append(transfer_row(table, exp_row, target, transfer_subcategory(target)))
+        origins.append((1 << ORIGIN_ROUND_SHIFT) | table.origin[exp_row])
+
+    # 第二轮：通过金额匹配确定目标，无法匹配时转入"信用卡"
+    second_round = conn.execute(f"SELECT row, cents, date_ord FROM tx WHERE flags & {NEED_MATCH} AND keep "
+                                f"ORDER BY row").fetchall()
+    for exp_row, cents, date_ord in second_round:
+        income = None
+        if date_ord > 0:
+            income = conn.execute(FIRST_INCOME_BY_CENTS, (cents, *_window(date_ord, 3))).fetchone()
+        conn.executemany("UPDATE tx SET keep = 0 WHERE row = ?", [(exp_row,)] + ([income] if income else []))
+        if income is not None:
+            target = table.text("account", income[0])
+            transfers.append(transfer_row(table, exp_row, target, transfer_subcategory(target)))
+        else:
+            transfers.append(transfer_row(table, exp_row, "信用卡", "还款"))
+        origins.append((2 << ORIGIN_ROUND_SHIFT) | table.origin[exp_row])
+
+    # 保留的行（去掉未匹配的 __REPAYMENT__ 标记）+ 转账记录
+    kept = np.array([row for row, in conn.execute(f"SELECT row FROM tx WHERE keep AND NOT flags & {REPAYMENT_MARKER} "
+                                                  f"ORDER BY row")], dtype=np.int64)
+    after = conn.execute("SELECT COUNT(*) FROM tx WHERE keep").fetchone()[0]
+    result = table.take(kept)
+    result.extend(transfers)
+    if transfers:
+        result.origin[-len(transfers):] = origins
+
+    print(f"转账识别完成：{len(transfers)} 条识别，删除 {before - after} 条原记录")
+    return result
+
+
+def refunds_and_transfers(conn: sqlite3.Connection, table: TransactionTable) -> TransactionTable:
+    """载入输入表，执行退款对冲和转账识别"""
+    load_transactions(conn, table)
+    conn.executescript(TX_INDEXES)
+    reconcile_refunds(conn)
+    return identify_transfers(conn, table)
+
+
+def match_family_cards(conn: sqlite3.Connection, table: TransactionTable,
+                       accounts_with_data: Set[str]) -> Tuple[TransactionTable, Tuple[int, int, int]]:
+    """
+    亲属卡标记与同日期、同金额的银行卡交易匹配（规则与 merge.match_family_cards 相同），
+    返回 (结果, (匹配成功数, 未匹配-删除数, 未匹配-保留数))
+    """
+    registry = account_registry()
+    conn.executemany(
+        "INSERT INTO family (row, date, cents, account, candidate) VALUES (?, ?, ?, ?, ?)",
+        zip(range(len(table)), table.date.tolist(), table.cents.tolist(),
+            (table.pool.text(code) for code in table.account.tolist()),
+            family_card_candidate_rows(table).astype(np.int64).tolist()),
+    )
+    conn.executescript(FAMILY_INDEXES)
+
+    matched_count = unmatched_deleted_count = unmatched_kept_count = 0
+    for marker in np.flatnonzero(family_card_marker_rows(table)).tolist():
+        user_name = table.text("subcategory", marker) or "亲属"  # 使用者名称存在subcategory中
+        target_bank = table.text("account", marker)  # 目标银行（可能是具体银行名或"__ANY_BANK__"）
+        key = (table.date[marker], int(table.cents[marker]))
+
+        if target_bank == "__ANY_BANK__":
+            found = conn.execute(FIRST_FAMILY_CANDIDATE, key).fetchone()
+        else:
+            found = conn.execute(FIRST_FAMILY_CANDIDATE_IN_ACCOUNT, (*key, target_bank)).fetchone()
+
+        if found is not None:
+            # 重分类为"其他杂项-XX支出"
+            table.set_text("category", found[0], "其他杂项")
+            table.set_text("subcategory", found[0], f"{user_name}支出")
+            table.set_text("tx_type", found[0], "支出")
+            conn.execute("UPDATE family SET matched = 1 WHERE row = ?", found)
+            conn.execute("UPDATE family SET keep = 0 WHERE row = ?", (marker,))
+            matched_count += 1
+        elif target_bank in accounts_with_data or target_bank == "__ANY_BANK__":
+            # 银行有数据但未匹配 → 删除标记（避免重复）
+            conn.execute("UPDATE family SET keep = 0 WHERE row = ?", (marker,))
+            unmatched_deleted_count += 1
+        else:
+            # 银行无数据 → 保留标记作为唯一记录，成为普通银行卡交易后，后续标记也可与之匹配
+            account = "微信" if "微信" in (table.description[marker] or "") else "支付宝"
+            table.set_text("category", marker, "其他杂项")
+            table.set_text("subcategory", marker, f"{user_name}支出")
+            table.set_text("tx_type", marker, "支出")
+            table.set_text("account", marker, account)
+            candidate = account != "微信" and registry.is_type(account, BANK)
+            conn.execute("UPDATE family SET account = ?, candidate = candidate OR ? WHERE row = ?",
+                         (account, candidate, marker))
+            unmatched_kept_count += 1
+
+    deleted = np.array([row for row, in conn.execute("SELECT row FROM family WHERE NOT keep")], dtype=np.int64)
+    keep = np.ones(len(table), dtype=bool)
+    keep[deleted] = False
+    return table.filter(keep), (matched_count, unmatched_deleted_count, unmatched_kept_count)
+
+
+def sqlite_merge(table: TransactionTable, db_path: Optional[str] = None) -> TransactionTable:
+    """
+    在 SQLite 中依次执行退款对冲、转账识别、亲属卡处理，返回按 (日期, origin) 排序的合并结果，
+    与 merge.py 全量合并的结果一致（table.origin 为输入行号）
+    """
+    with database(db_path) as conn:
+        post_transfer = refunds_and_transfers(conn, table)
+        conn.commit()
+
+        print("\n=== 开始亲属卡处理 ===")
+        if not family_card_marker_rows(post_transfer).any():
+            print("未发现亲属卡标记")
+            result = post_transfer
+        else:
+            accounts_with_data = {post_transfer.pool.text(code)
+                                  for code in np.unique(post_transfer.account[bank_data_rows(post_transfer)])}
+            print(f"  数据中存在的银行账户: {', '.join(sorted(accounts_with_data))}")
+            result, (matched, deleted, kept) = match_family_cards(conn, post_transfer, accounts_with_data)
+            print(f"亲属卡处理完成：")
+            print(f"  匹配成功: {matched} 条（重分类银行卡交易）")
+            print(f"  未匹配-删除: {deleted} 条（银行有数据，避免重复）")
+            print(f"  未匹配-保留: {kept} 条（银行无数据）")
+        conn.commit()
+
+    return result.take(np.lexsort((result.origin, result.date_ord)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="SQLite 合并引擎：交易载入本地 SQLite 后用索引查询执行各合并阶段，结果与 merge.py 相同（不省内存，耗时约为其 2~3 倍）",
+        epilog="示例: python sqlite_merge.py output/\n      python sqlite_merge.py output/ --db merge.sqlite",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input_dir", help="包含 *_随手记.xlsx 的输出目录")
+    parser.add_argument("output_path", nargs="?", default=None, help="合并文件路径（默认 <目录>/merged_账单.<格式扩展名>）")
+    parser.add_argument("--db", default=None, help="数据库文件路径（默认使用临时文件，合并后删除；指定时合并后保留，文件已存在时报错）")
+    parser.add_argument("--jobs", type=int, default=None, help="并发读取的进程数（默认 CPU 核数，1 为串行）")
+    parser.add_argument("--format", choices=FORMATS, default="xlsx",
+                        help="输出格式：xlsx（随手记Excel，默认）、csv/tsv（每个Sheet一个文件）、jsonl")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"错误: 目录不存在 {args.input_dir}")
+        sys.exit(1)
+    if args.db and os.path.exists(args.db):
+        print(f"错误: 数据库文件已存在 {args.db}（不会覆盖，请换一个路径或先删除）")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    print(f"=== 开始合并处理（SQLite） ===")
+    print(f"输入目录: {args.input_dir}")
+    excel_files = list_excel_files(args.input_dir)
+    if not excel_files:
+        print("未找到Excel文件")
+        return
+    print(f"找到 {len(excel_files)} 个Excel文件")
+
+    inputs = read_workbooks(excel_files, args.jobs)
+    inputs.origin = np.arange(len(inputs), dtype=np.int64)
+    print(f"\n合计 {len(inputs)} 条交易记录")
+
+    transactions = sqlite_merge(inputs, args.db)
+    output_path = args.output_path or os.path.join(args.input_dir, "merged_账单" + get_writer(args.format).EXTENSION)
+    write_merged(transactions, output_path, jobs=args.jobs, fmt=args.format)
+
+    print(f"\n处理完成！")
+    print(f"  输入文件: {len(excel_files)} 个")
+    print(f"  原始记录: {len(inputs)} 条")
+    print(f"  最终记录: {len(transactions)} 条")
+    print(f"  输出文件: {output_path}")
+    print(f"  总耗时: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
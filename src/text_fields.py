@@ -0,0 +1,205 @@
+"""
+交易文本的预计算字段
+合并各阶段都要在描述中查找退款/还款/钱包等关键词：列式表为每行计算一次
+小写描述、标准化商户、关键词标志位和转账目标账户，缓存在表上（随 take/filter/extend 传递），各阶段直接复用
+
+关键词（含 config/transfer_rules.json 中的转账关键词、钱包关键词和钱包转账标记）编译为一个正则，
+一次扫描全部找出（相互重叠的关键词补充拼接串），同时得到标志位和转账目标；相同描述的结果有缓存
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config_loader import config_path, load_json_config
+from merchant_normalizer import MEMO_SIZE, merchant_key
+
+TRANSFER_RULES_PATH = config_path("transfer_rules.json")
+
+_TRANSFER_RULES = load_json_config(TRANSFER_RULES_PATH, "不识别转账目标")
+
+# 转账关键词 -> 目标账户（按优先顺序，描述含多个时取最靠前的；目标为 None 表示需通过金额匹配确定）
+TRANSFER_KEYWORDS: Dict[str, Optional[str]] = _TRANSFER_RULES.get("keywords", {})
+
+# 钱包 -> 关键词（按优先顺序）：须同时含转账语义标记才算充值/转入钱包
+WALLET_TARGETS: Dict[str, list] = _TRANSFER_RULES.get("wallets", {})
+WALLET_KEYWORDS = tuple(keyword for keywords in WALLET_TARGETS.values() for keyword in keywords)
+
+# 钱包（微信/支付宝）类转账语义标记：储蓄卡→钱包只有在这些语义下才算充值/转入，
+# 否则"财付通-微信支付-XX商户"/"支付宝-XX商户消费"这类经钱包的商户消费会被误判为转账
+WALLET_TRANSFER_MARKERS = tuple(_TRANSFER_RULES.get("wallet_transfer_markers", ()))
+
+# 关键词标志位（小写描述含任一关键词即置位）
+FLAG_REFUND = 1           # 退款
+FLAG_REPAYMENT = 2        # 还款（含跨行还款）
+FLAG_CREDIT_CARD = 4      # 信用卡
+FLAG_WALLET = 8           # 钱包类关键词
+FLAG_TRANSFER_MARKER = 16  # 钱包转账语义标记
+
+FLAG_KEYWORDS = {
+    FLAG_REFUND: ("退款",),
+    FLAG_REPAYMENT: ("还款",),
+    FLAG_CREDIT_CARD: ("信用卡",),
+    FLAG_WALLET: WALLET_KEYWORDS,
+    FLAG_TRANSFER_MARKER: WALLET_TRANSFER_MARKERS,
+}
+
+# 未命中时的优先级
+_NO_RANK = 1 << 30
+
+_TRANSFER_TARGETS = list(TRANSFER_KEYWORDS.values())
+_WALLET_NAMES = list(WALLET_TARGETS)
+
+
+# 关键词相互重叠（如"微信用卡"中的"微信"与"信用卡"）时补充的拼接串最多几轮
+_MAX_OVERLAP_ROUNDS = 4
+
+
+def _overlap_closure(keywords) -> Optional[set]:
+    """
+    关键词及其相互重叠的拼接串（如 微信 + 信用卡 → 微信用卡）
+
+    正则在每个位置取最长的匹配后跳到其末尾：跨过末尾的重叠关键词由拼接串覆盖，
+    被包含的关键词由 _compile_keywords 合并进包含它的串。拼接轮数超出上限时返回 None
+    """
+    strings = set(keywords)
+    for _ in range(_MAX_OVERLAP_ROUNDS):
+        added = set()
+        for left in strings:
+            for right in keywords:
+                if right in left:
+                    continue
+                for size in range(1, min(len(left), len(right))):
+                    if left.endswith(right[:size]):
+                        added.add(left + right[size:])
+        added -= strings
+        if not added:
+            return strings
+        strings |= added
+    return None
+
+
+def _compile_keywords():
+    """
+    匹配串 -> (标志位, 转账关键词优先级, 钱包优先级)，以及匹配全部串的正则
+
+    匹配串的信息合并了它所包含的全部关键词
+    """
+    own = {}
+    for flag, keywords in FLAG_KEYWORDS.items():
+        for keyword in keywords:
+            flags, rank, wallet = own.get(keyword.lower(), (0, _NO_RANK, _NO_RANK))
+            own[keyword.lower()] = (flags | flag, rank, wallet)
+    for rank, keyword in enumerate(TRANSFER_KEYWORDS):
+        flags, old_rank, wallet = own.get(keyword.lower(), (0, _NO_RANK, _NO_RANK))
+        own[keyword.lower()] = (flags, min(old_rank, rank), wallet)
+    for wallet, keywords in enumerate(WALLET_TARGETS.values()):
+        for keyword in keywords:
+            flags, rank, old_wallet = own.get(keyword.lower(), (0, _NO_RANK, _NO_RANK))
+            own[keyword.lower()] = (flags, rank, min(old_wallet, wallet))
+
+    strings = _overlap_closure(own)
+    alternatives = "|".join(map(re.escape, sorted(strings or own, key=len, reverse=True)))
+    if strings is None:
+        # 重叠无法用有限的拼接串覆盖：改为每个位置前瞻匹配
+        pattern = re.compile("(?=(" + alternatives + "))")
+        strings = own
+    else:
+        pattern = re.compile(alternatives)
+
+    info = {}
+    for string in strings:
+        flags, rank, wallet = 0, _NO_RANK, _NO_RANK
+        for keyword, (keyword_flags, keyword_rank, keyword_wallet) in own.items():
+            if keyword in string:
+                flags |= keyword_flags
+                rank = min(rank, keyword_rank)
+                wallet = min(wallet, keyword_wallet)
+        info[string] = (flags, rank, wallet)
+    return info, pattern
+
+
+_KEYWORD_INFO, _KEYWORD_RE = _compile_keywords()
+
+
+def scan_text(desc_lower: str) -> Tuple[int, Optional[str]]:
+    """
+    一次扫描小写描述，得到 (关键词标志位, 转账目标账户)
+
+    转账目标：含转账关键词时取优先级最高者的目标（可能为 None，需通过金额匹配确定）；
+    否则含钱包关键词且含转账语义标记时为优先级最高的钱包；都不满足为 None
+    """
+    flags, rank, wallet = 0, _NO_RANK, _NO_RANK
+    for keyword in _KEYWORD_RE.findall(desc_lower):
+        keyword_flags, keyword_rank, keyword_wallet = _KEYWORD_INFO[keyword]
+        flags |= keyword_flags
+        if keyword_rank < rank:
+            rank = keyword_rank
+        if keyword_wallet < wallet:
+            wallet = keyword_wallet
+
+    if rank != _NO_RANK:
+        return flags, _TRANSFER_TARGETS[rank]
+    if wallet != _NO_RANK and flags & FLAG_TRANSFER_MARKER:
+        return flags, _WALLET_NAMES[wallet]
+    return flags, None
+
+
+def text_flags(desc_lower: str) -> int:
+    """小写描述的关键词标志位"""
+    return scan_text(desc_lower)[0]
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def describe(description: str) -> Tuple[str, int, Optional[str]]:
+    """描述 -> (小写描述, 关键词标志位, 转账目标账户)"""
+    desc_lower = description.lower()
+    return (desc_lower,) + scan_text(desc_lower)
+
+
+class TextFields:
+    """
+    列式表各行的预计算文本字段
+    """
+
+    __slots__ = ("desc_lower", "merchant_key", "flags", "transfer_target")
+
+    def __init__(self, desc_lower: np.ndarray, merchant_keys: np.ndarray, flags: np.ndarray,
+                 transfer_target: np.ndarray):
+        self.desc_lower = desc_lower
+        self.merchant_key = merchant_keys
+        self.flags = flags
+        self.transfer_target = transfer_target
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    @classmethod
+    def compute(cls, descriptions: np.ndarray, merchants: np.ndarray) -> "TextFields":
+        """由描述列和商户列计算"""
+        normalize = merchant_key().normalize
+        count = len(descriptions)
+        desc_lower = np.empty(count, dtype=object)
+        merchant_keys = np.empty(count, dtype=object)
+        flags = np.zeros(count, dtype=np.int32)
+        transfer_target = np.empty(count, dtype=object)
+        for i, (description, merchant) in enumerate(zip(descriptions.tolist(), merchants.tolist())):
+            desc_lower[i], flags[i], transfer_target[i] = describe(description or "")
+            merchant_keys[i] = normalize(merchant, description)
+        return cls(desc_lower, merchant_keys, flags, transfer_target)
+
+    def take(self, indices) -> "TextFields":
+        return TextFields(self.desc_lower[indices], self.merchant_key[indices], self.flags[indices],
+                          self.transfer_target[indices])
+
+    @classmethod
+    def concat(cls, parts: Sequence["TextFields"]) -> "TextFields":
+        return cls(np.concatenate([p.desc_lower for p in parts]),
+                   np.concatenate([p.merchant_key for p in parts]),
+                   np.concatenate([p.flags for p in parts]),
+                   np.concatenate([p.transfer_target for p in parts]))
+
+    def has(self, flag: int) -> np.ndarray:
+        """各行是否含指定标志（任一位）"""
+        return (self.flags & flag) != 0
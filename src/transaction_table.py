@@ -0,0 +1,281 @@
+"""
+列式交易表模块
+将交易记录按列存放，供 merge.py 各阶段做向量化筛选
+
+- 日期序数、金额（分）为 NumPy 整数数组
+- 账户、分类、子分类、交易类型、转入账户为字符串池编码（int32）
+- 日期、描述、商户为字符串数组
+- origin 为行来源（输入行号，转账识别生成的行带轮次标记），用于增量合并时还原输出顺序
+- text_fields() 为各行的小写描述、标准化商户和关键词标志位（见 text_fields.py），首次使用时计算并缓存
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from models import Transaction, parse_date
+from text_fields import TextFields
+
+
+# 编码列中 None 的编码
+NONE_CODE = -1
+# 字符串池中不存在的取值（与任何编码都不相等）
+MISSING_CODE = -2
+
+# 以字符串池编码存放的列
+CODED_COLUMNS = ("category", "subcategory", "account", "tx_type", "transfer_to")
+# 直接存放取值的列
+PLAIN_COLUMNS = ("date", "date_ord", "cents", "description", "merchant", "origin")
+
+# 未设置来源的行
+NO_ORIGIN = -1
+# origin 高位：转账识别第几轮生成的行（低位为来源支出的输入行号）
+ORIGIN_ROUND_SHIFT = 40
+
+
+class StringPool:
+    """
+    字符串池：账户、分类等取值只有几十种，每列只保存 int32 编码
+    同一批次派生出的表共享同一个池，编码可直接比较
+    """
+
+    def __init__(self, strings: Sequence[str] = ()):
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for text in strings:
+            self.add(text)
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def add(self, text: Optional[str]) -> int:
+        """返回字符串的编码，不存在时加入池中"""
+        if text is None:
+            return NONE_CODE
+        code = self._codes.get(text)
+        if code is None:
+            code = len(self.strings)
+            self._codes[text] = code
+            self.strings.append(text)
+        return code
+
+    def code(self, text: Optional[str]) -> int:
+        """查询编码，不存在时返回 MISSING_CODE"""
+        if text is None:
+            return NONE_CODE
+        return self._codes.get(text, MISSING_CODE)
+
+    def text(self, code: int) -> Optional[str]:
+        """编码还原为字符串"""
+        return None if code < 0 else self.strings[code]
+
+
+def date_ordinal(date_str: str) -> int:
+    """日期字符串转为序数（无法解析时为 0，排在所有有效日期之前）"""
+    date = parse_date(date_str) if date_str else None
+    return date.toordinal() if date else 0
+
+
+class TransactionTable:
+    """
+    列式交易表
+
+    支持布尔掩码过滤、按日期稳定排序和批量追加；
+    与 List[Transaction] 互相转换，供现有调用方继续使用
+    """
+
+    def __init__(self, pool: Optional[StringPool] = None):
+        self.pool = pool if pool is not None else StringPool()
+        self.date = np.empty(0, dtype=object)
+        self.date_ord = np.empty(0, dtype=np.int32)
+        self.cents = np.empty(0, dtype=np.int64)
+        self.category = np.empty(0, dtype=np.int32)
+        self.subcategory = np.empty(0, dtype=np.int32)
+        self.account = np.empty(0, dtype=np.int32)
+        self.tx_type = np.empty(0, dtype=np.int32)
+        self.transfer_to = np.empty(0, dtype=np.int32)
+        self.description = np.empty(0, dtype=object)
+        self.merchant = np.empty(0, dtype=object)
+        self.origin = np.empty(0, dtype=np.int64)
+        self._text_fields: Optional[TextFields] = None
+
+    def __len__(self) -> int:
+        return len(self.cents)
+
+    def __getstate__(self) -> dict:
+        """跨进程传输时不带预计算文本字段（需要时在接收方重新计算）"""
+        state = dict(self.__dict__)
+        state["_text_fields"] = None
+        return state
+
+    # ------------------------------------------------------------------
+    # 构造与转换
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Transaction],
+                          pool: Optional[StringPool] = None) -> "TransactionTable":
+        """由交易记录列表构建"""
+        table = cls(pool)
+        table.extend(transactions)
+        return table
+
+    def extend(self, transactions: Iterable[Transaction]):
+        """
+        批量追加交易记录（每列只做一次拼接）
+        """
+        add = self.pool.add
+        ordinals: Dict[str, int] = {}
+        dates, date_ords, cents = [], [], []
+        categories, subcategories, accounts, tx_types, transfer_tos = [], [], [], [], []
+        descriptions, merchants = [], []
+
+        for t in transactions:
+            date_ord = ordinals.get(t.date)
+            if date_ord is None:
+                date_ord = ordinals[t.date] = date_ordinal(t.date)
+            dates.append(t.date)
+            date_ords.append(date_ord)
+            cents.append(t.amount_cents)
+            categories.append(add(t.category))
+            subcategories.append(add(t.subcategory))
+            accounts.append(add(t.account))
+            tx_types.append(add(t.transaction_type))
+            transfer_tos.append(add(t.transfer_to_account))
+            descriptions.append(t.description)
+            merchants.append(t.merchant)
+
+        if not cents:
+            return
+
+        if self._text_fields is not None:
+            added = TextFields.compute(_object_array(descriptions), _object_array(merchants))
+            self._text_fields = TextFields.concat([self._text_fields, added])
+        self.date = np.concatenate((self.date, _object_array(dates)))
+        self.date_ord = np.concatenate((self.date_ord, np.array(date_ords, dtype=np.int32)))
+        self.cents = np.concatenate((self.cents, np.array(cents, dtype=np.int64)))
+        self.category = np.concatenate((self.category, np.array(categories, dtype=np.int32)))
+        self.subcategory = np.concatenate((self.subcategory, np.array(subcategories, dtype=np.int32)))
+        self.account = np.concatenate((self.account, np.array(accounts, dtype=np.int32)))
+        self.tx_type = np.concatenate((self.tx_type, np.array(tx_types, dtype=np.int32)))
+        self.transfer_to = np.concatenate((self.transfer_to, np.array(transfer_tos, dtype=np.int32)))
+        self.description = np.concatenate((self.description, _object_array(descriptions)))
+        self.merchant = np.concatenate((self.merchant, _object_array(merchants)))
+        self.origin = np.concatenate((self.origin, np.full(len(cents), NO_ORIGIN, dtype=np.int64)))
+
+    @classmethod
+    def concat(cls, tables: Sequence["TransactionTable"]) -> "TransactionTable":
+        """
+        按顺序拼接多个表，编码列重新映射到同一个字符串池
+        """
+        result = cls()
+        if not tables:
+            return result
+
+        pool = result.pool
+        coded = {name: [] for name in CODED_COLUMNS}
+        for table in tables:
+            # 旧编码 -> 新编码（末尾两位分别对应 MISSING_CODE / NONE_CODE）
+            remap = np.array([pool.add(text) for text in table.pool.strings] + [MISSING_CODE, NONE_CODE],
+                             dtype=np.int32)
+            for name in CODED_COLUMNS:
+                coded[name].append(remap[getattr(table, name)])
+
+        for name in CODED_COLUMNS:
+            setattr(result, name, np.concatenate(coded[name]))
+        for name in PLAIN_COLUMNS:
+            setattr(result, name, np.concatenate([getattr(table, name) for table in tables]))
+        if all(table._text_fields is not None for table in tables):
+            result._text_fields = TextFields.concat([table._text_fields for table in tables])
+        return result
+
+    def row(self, i: int) -> Transaction:
+        """取出第 i 行为 Transaction"""
+        text = self.pool.text
+        return Transaction(
+            date=self.date[i],
+            category=text(self.category[i]),
+            subcategory=text(self.subcategory[i]),
+            account=text(self.account[i]),
+            amount_cents=int(self.cents[i]),
+            description=self.description[i],
+            transaction_type=text(self.tx_type[i]),
+            transfer_to_account=text(self.transfer_to[i]),
+            merchant=self.merchant[i],
+        )
+
+    def iter_transactions(self) -> Iterator[Transaction]:
+        """逐行生成 Transaction"""
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def to_transactions(self) -> List[Transaction]:
+        """转换为交易记录列表"""
+        return list(self.iter_transactions())
+
+    # ------------------------------------------------------------------
+    # 查询与修改
+    # ------------------------------------------------------------------
+
+    def code(self, text: Optional[str]) -> int:
+        """字符串在本表池中的编码（不存在时为 MISSING_CODE）"""
+        return self.pool.code(text)
+
+    def codes(self, texts: Iterable[str]) -> np.ndarray:
+        """一组字符串的编码（忽略池中不存在的），用于 np.isin"""
+        codes = [self.pool.code(text) for text in texts]
+        return np.array([c for c in codes if c >= 0], dtype=np.int32)
+
+    def text(self, column: str, i: int) -> Optional[str]:
+        """编码列第 i 行的字符串"""
+        return self.pool.text(getattr(self, column)[i])
+
+    def decode(self, column: str, indices: Optional[np.ndarray] = None, none=None) -> list:
+        """编码列整列（或 indices 指定的行）还原为字符串，None 替换为 none"""
+        # 末尾两位分别对应 MISSING_CODE(-2) / NONE_CODE(-1)
+        lookup = np.array(self.pool.strings + [none, none], dtype=object)
+        codes = getattr(self, column)
+        return lookup[codes if indices is None else codes[indices]].tolist()
+
+    def set_text(self, column: str, i: int, value: Optional[str]):
+        """修改编码列第 i 行的取值"""
+        getattr(self, column)[i] = self.pool.add(value)
+
+    def text_fields(self) -> TextFields:
+        """
+        各行的预计算文本字段（首次调用时计算；take/filter/extend/concat 得到的表沿用已算出的部分）
+        """
+        if self._text_fields is None or len(self._text_fields) != len(self):
+            self._text_fields = TextFields.compute(self.description, self.merchant)
+        return self._text_fields
+
+    # ------------------------------------------------------------------
+    # 过滤与排序
+    # ------------------------------------------------------------------
+
+    def take(self, indices) -> "TransactionTable":
+        """按行号（或布尔掩码）取出子表，共享字符串池"""
+        result = TransactionTable(self.pool)
+        for name in PLAIN_COLUMNS + CODED_COLUMNS:
+            setattr(result, name, getattr(self, name)[indices])
+        if self._text_fields is not None and len(self._text_fields) == len(self):
+            result._text_fields = self._text_fields.take(indices)
+        return result
+
+    def filter(self, mask: np.ndarray) -> "TransactionTable":
+        """保留掩码为 True 的行"""
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def argsort_by_date(self) -> np.ndarray:
+        """按日期稳定排序的行号（同日保持原有顺序，无法解析的日期排最前）"""
+        return np.argsort(self.date_ord, kind="stable")
+
+    def sort_by_date(self) -> "TransactionTable":
+        """按日期稳定排序"""
+        return self.take(self.argsort_by_date())
+
+
+def _object_array(values: list) -> np.ndarray:
+    """构建一维 object 数组（避免 NumPy 把字符串/None 推断为其他类型）"""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
@@ -0,0 +1,420 @@
+"""
+滑动窗口合并脚本（内存与历史长度无关）
+退款对冲、转账识别、亲属卡处理的匹配都有时间窗口：模糊退款 30 天、转账 ±3 天、亲属卡同一天。
+各银行Excel逐个读入、按日期排序后分块写入临时目录（外部排序），再按 (日期, 输入行号) 多路归并为
+按天分组的交易流，依次经过三个窗口阶段：每个阶段只保留最近一个窗口内尚未匹配的候选，
+移出窗口的记录不会再参与匹配，直接交给下一阶段，最后逐块交给写入器写出。
+内存占用取决于窗口内的记录数和分块大小，与历史长度无关
+
+与 merge.py 内存合并的区别：
+- 退款只与此前 30 天内（含当天）的消费对冲，精确匹配也受此限制（内存合并的精确匹配不限日期）
+- 有多条候选时取交易流中最早的一条（内存合并按文件顺序取第一条）
+- 亲属卡处理中"银行账户有数据"按输入记录统计（内存合并按转账识别后的记录统计）
+- 不保存增量合并状态，不支持分卷输出
+"""
+import argparse
+import heapq
+import os
+import pickle
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+from itertools import groupby
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+# 添加src目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from accounts import account_registry
+from merchant_normalizer import merchant_key
+from merge import (TRANSFER_SOURCE, TRANSFER_TARGET, bank_data_rows, has_family_card_markers,
+                   is_masked_or_person_name, list_excel_files, match_family_cards, read_workbook_batch,
+                   transfer_subcategory)
+from models import Transaction
+from text_fields import FLAG_CREDIT_CARD, FLAG_REFUND, FLAG_REPAYMENT, describe
+from transaction_table import ORIGIN_ROUND_SHIFT, TransactionTable
+from writers import FORMATS, get_writer
+
+# 模糊退款 / 转账的匹配窗口（天）
+REFUND_WINDOW = 30
+TRANSFER_WINDOW = 3
+
+# 临时分块与写出分块的行数
+CHUNK_ROWS = 1 << 13
+
+
+class WindowRow:
+    """
+    交易流中的一行：交易记录、日期序数、行来源（输入行号 + 转账识别轮次）
+    """
+
+    __slots__ = ("tx", "date_ord", "origin", "removed")
+
+    def __init__(self, tx: Transaction, date_ord: int, origin: int):
+        self.tx = tx
+        self.date_ord = date_ord
+        self.origin = origin
+        self.removed = False
+
+
+Day = Tuple[int, List[WindowRow]]
+# 有序段：(首行的 (日期序数, 输入行号), 分块路径)
+Run = Tuple[Tuple[int, int], List[str]]
+
+
+def _within(ord1: int, ord2: int, days: int) -> bool:
+    """两个日期序数是否在指定天数范围内（序数 0 表示日期无法解析）"""
+    return ord1 > 0 and ord2 > 0 and abs(ord1 - ord2) <= days
+
+
+def _evict(index: Dict, key, date_ord: int):
+    """索引桶中移除已移出窗口（日期序数不大于 date_ord）的行"""
+    bucket = index.get(key)
+    while bucket and bucket[0].date_ord <= date_ord:
+        bucket.popleft()
+    if not bucket:
+        index.pop(key, None)
+
+
+def data_accounts(table: TransactionTable) -> Set[str]:
+    """输入记录中有数据的银行账户（merge.bank_data_rows 所在的账户）"""
+    return {table.pool.text(code) for code in np.unique(table.account[bank_data_rows(table)])}
+
+
+def sorted_runs(excel_files: List[str], work_dir: str,
+                chunk_rows: int = CHUNK_ROWS) -> Tuple[List[Run], Set[str], int]:
+    """
+    逐个读取各银行Excel，按日期稳定排序后分块写入 work_dir（外部排序的有序段，临时文件只由本进程读回，直接 pickle 列式表）
+    返回 (各文件的有序段, 有数据的银行账户, 输入总行数)；输入行号按文件顺序连续编号
+    """
+    runs = []
+    accounts_with_data: Set[str] = set()
+    position = 0
+    for index, file_path in enumerate(excel_files):
+        table, elapsed = read_workbook_batch(file_path)
+        print(f"  读取: {os.path.basename(file_path)}")
+        print(f"    {len(table)} 条记录（{elapsed:.2f}s）")
+
+        table.origin = np.arange(position, position + len(table), dtype=np.int64)
+        position += len(table)
+        accounts_with_data |= data_accounts(table)
+
+        table = table.sort_by_date()
+        if not len(table):
+            continue
+        paths = []
+        for start in range(0, len(table), chunk_rows):
+            chunk = table.take(np.arange(start, min(start + chunk_rows, len(table))))
+            path = os.path.join(work_dir, f"run{index:05d}_{len(paths):06d}.pkl")
+            with open(path, "wb") as f:
+                pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+            paths.append(path)
+        runs.append(((int(table.date_ord[0]), int(table.origin[0])), paths))
+    return runs, accounts_with_data, position
+
+
+def _iter_run(paths: List[str]) -> Iterator[WindowRow]:
+    """逐块读回一个有序段"""
+    for path in paths:
+        with open(path, "rb") as f:
+            chunk = pickle.load(f)
+        for tx, date_ord, origin in zip(chunk.iter_transactions(), chunk.date_ord.tolist(), chunk.origin.tolist()):
+            yield WindowRow(tx, date_ord, origin)
+
+
+def _merge_runs(runs: List[Run]) -> Iterator[WindowRow]:
+    """
+    各有序段按 (日期, 输入行号) 多路归并
+    有序段按首行排序，归并到其首行时才开始读取，读完即释放：同时打开的只有日期范围与当前日期重叠的有序段
+    （按 账户-月份 分文件时与历史长度无关）
+    """
+    waiting = deque(sorted(runs, key=lambda run: run[0]))
+    heap = []
+    while heap or waiting:
+        while waiting and (not heap or waiting[0][0] <= heap[0][0]):
+            _, paths = waiting.popleft()
+            rows = _iter_run(paths)
+            row = next(rows)
+            heapq.heappush(heap, ((row.date_ord, row.origin), row, rows))
+        _, row, rows = heap[0]
+        yield row
+        following = next(rows, None)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, ((following.date_ord, following.origin), following, rows))
+
+
+def iter_days(runs: List[Run]) -> Iterator[Day]:
+    """多路归并后按天分组产出"""
+    for date_ord, group in groupby(_merge_runs(runs), key=lambda row: row.date_ord):
+        yield date_ord, list(group)
+
+
+def _is_refund(tx: Transaction) -> bool:
+    """收入中的退款：分类/子分类或描述含"退款"（与 merge.reconcile_refunds 相同）"""
+    if tx.transaction_type != "收入":
+        return False
+    if any("退款" in text.lower() for text in (tx.category, tx.subcategory) if text):
+        return True
+    return bool(describe(tx.description or "")[1] & FLAG_REFUND)
+
+
+def refund_stage(days: Iterable[Day], stats: Dict[str, int], window: int = REFUND_WINDOW) -> Iterator[Day]:
+    """
+    退款对冲：每天先把当天的消费加入索引，再依次对冲当天的退款
+    精确匹配取同商户、同金额最早的消费；脱敏/人名商户再按金额 + 日期（window 天内）模糊匹配。
+    超出窗口的天移出索引并交给下一阶段
+    """
+    normalize = merchant_key().normalize
+    pending: Deque[Day] = deque()
+    by_merchant: Dict[Tuple[str, int], Deque[WindowRow]] = {}
+    by_cents: Dict[int, Deque[WindowRow]] = {}
+    keys: Dict[int, Optional[str]] = {}  # 窗口内消费的商户键（按 id）
+
+    def flush(date_ord: int) -> Iterator[Day]:
+        while pending and (pending[0][0] <= 0 or date_ord - pending[0][0] > window):
+            old_ord, rows = pending.popleft()
+            for row in rows:
+                if id(row) in keys:
+                    key = keys.pop(id(row))
+                    if key:
+                        _evict(by_merchant, (key, row.tx.amount_cents), old_ord)
+                    _evict(by_cents, row.tx.amount_cents, old_ord)
+            yield old_ord, [row for row in rows if not row.removed]
+
+    for date_ord, rows in days:
+        yield from flush(date_ord)
+
+        for row in rows:
+            if row.tx.transaction_type == "支出":
+                key = keys[id(row)] = normalize(row.tx.merchant, row.tx.description)
+                if key:
+                    by_merchant.setdefault((key, row.tx.amount_cents), deque()).append(row)
+                by_cents.setdefault(row.tx.amount_cents, deque()).append(row)
+
+        for refund in rows:
+            if refund.removed or not _is_refund(refund.tx):
+                continue
+            cents = refund.tx.amount_cents
+
+            # 精确匹配：同商户 + 同金额
+            key = normalize(refund.tx.merchant, refund.tx.description)
+            candidates = by_merchant.get((key, cents)) if key else None
+            while candidates and candidates[0].removed:
+                candidates.popleft()
+            if candidates:
+                candidates.popleft().removed = refund.removed = True
+                stats["exact"] += 1
+                continue
+
+            # 模糊匹配：脱敏商户名或人名，同金额 + 日期接近
+            if not is_masked_or_person_name(refund.tx.merchant or ""):
+                continue
+            for expense in by_cents.get(cents, ()):
+                if not expense.removed and _within(date_ord, expense.date_ord, window):
+                    expense.removed = refund.removed = True
+                    stats["fuzzy"] += 1
+                    break
+
+        pending.append((date_ord, rows))
+
+    yield from flush(sys.maxsize)
+
+
+def transfer_stage(days: Iterable[Day], stats: Dict[str, int], window: int = TRANSFER_WINDOW) -> Iterator[Day]:
+    """
+    转账识别：储蓄卡支出与 window 天内同金额的信用卡/钱包收入配对，生成转账记录
+
+    第一轮（有明确目标）在其后 window 天的记录到齐时进行；第二轮（通过金额确定目标）
+    在可能竞争同一收入的第一轮全部完成后进行（其后 3*window 天），与内存合并"先全部第一轮、
+    再第二轮"的结果一致；收入在不再可能被配对后（其后 4*window 天）随当天记录交给下一阶段
+    """
+    registry = account_registry()
+    # 各天：[日期序数, 记录, 转账记录, 第一轮候选, 第二轮候选]
+    pending: Deque[list] = deque()
+    by_account: Dict[Tuple[str, int], Deque[WindowRow]] = {}
+    by_cents: Dict[int, Deque[WindowRow]] = {}
+
+    def first_income(candidates, expense: WindowRow) -> Optional[WindowRow]:
+        for income in candidates:
+            if not income.removed and _within(expense.date_ord, income.date_ord, window):
+                return income
+        return None
+
+    def transfer(expense: WindowRow, target: str, subcategory: str, round_: int) -> WindowRow:
+        tx = expense.tx
+        expense.removed = True
+        stats["transfers"] += 1
+        return WindowRow(Transaction(
+            date=tx.date,
+            category="转账",
+            subcategory=subcategory,
+            account=tx.account,
+            amount_cents=tx.amount_cents,
+            description=tx.description,
+            transaction_type="转账",
+            transfer_to_account=target,
+        ), expense.date_ord, (round_ << ORIGIN_ROUND_SHIFT) | expense.origin)
+
+    def first_round(day: list):
+        for expense, target in day[3]:
+            income = first_income(by_account.get((target, expense.tx.amount_cents), ()), expense)
+            if income is not None:
+                income.removed = True
+            day[2].append(transfer(expense, target, transfer_subcategory(target), 1))
+        day[3] = None
+
+    def second_round(day: list):
+        for expense in day[4]:
+            income = first_income(by_cents.get(expense.tx.amount_cents, ()), expense)
+            if income is not None:
+                income.removed = True
+                target = income.tx.account
+                day[2].append(transfer(expense, target, transfer_subcategory(target), 2))
+            else:
+                day[2].append(transfer(expense, "信用卡", "还款", 2))
+        day[4] = None
+
+    def advance(date_ord: int) -> Iterator[Day]:
+        """date_ord 及之前的记录已到齐：执行到期的两轮匹配，交出不再需要的天"""
+        for day in pending:
+            if day[3] is not None and (day[0] <= 0 or date_ord - day[0] >= window):
+                first_round(day)
+        for day in pending:
+            if day[4] is not None and (day[0] <= 0 or date_ord - day[0] >= 3 * window):
+                second_round(day)
+        while pending and pending[0][4] is None and (pending[0][0] <= 0 or date_ord - pending[0][0] >= 4 * window):
+            old_ord, rows, transfers, _, _ = pending.popleft()
+            for row in rows:
+                if row.tx.transaction_type == "收入":
+                    _evict(by_account, (row.tx.account, row.tx.amount_cents), old_ord)
+                    _evict(by_cents, row.tx.amount_cents, old_ord)
+            # 未匹配的 __REPAYMENT__ 标记只用于匹配，不输出
+            kept = [row for row in rows if not row.removed and row.tx.category != "__REPAYMENT__"]
+            yield old_ord, kept + transfers
+
+    for date_ord, rows in days:
+        with_target, need_match = [], []
+        for row in rows:
+            tx = row.tx
+            if tx.transaction_type == "收入":
+                if registry.is_type(tx.account, TRANSFER_TARGET) or tx.category == "__REPAYMENT__":
+                    by_account.setdefault((tx.account, tx.amount_cents), deque()).append(row)
+                    by_cents.setdefault(tx.amount_cents, deque()).append(row)
+            elif (tx.transaction_type == "支出" and registry.is_type(tx.account, TRANSFER_SOURCE)
+                  and not (tx.category == "金融保险" and tx.subcategory == "按揭还款")):
+                _, flags, target = describe(tx.description or "")
+                if target:
+                    with_target.append((row, target))
+                elif flags & (FLAG_REPAYMENT | FLAG_CREDIT_CARD):
+                    need_match.append(row)
+        pending.append([date_ord, rows, [], with_target, need_match])
+        yield from advance(date_ord)
+
+    yield from advance(sys.maxsize)
+
+
+def family_card_stage(days: Iterable[Day], accounts_with_data: Set[str], stats: Dict[str, int]) -> Iterator[Transaction]:
+    """
+    亲属卡处理：标记只与同一天的银行卡交易匹配，逐天处理（merge.match_family_cards）
+    每天的记录按行来源排序，与内存合并按日期稳定排序后的顺序一致
+    """
+    for _, rows in days:
+        rows.sort(key=lambda row: row.origin)
+        if not any(row.tx.category == "__FAMILY_CARD__" or row.tx.transaction_type == "__MARKER__" for row in rows):
+            for row in rows:
+                yield row.tx
+            continue
+
+        table = TransactionTable.from_transactions(row.tx for row in rows)
+        if has_family_card_markers(table):
+            table, counts = match_family_cards(table, accounts_with_data)
+            for name, count in zip(("family_matched", "family_deleted", "family_kept"), counts):
+                stats[name] += count
+        yield from table.iter_transactions()
+
+
+def window_stages(days: Iterable[Day], accounts_with_data: Set[str], stats: Dict[str, int]) -> Iterator[Transaction]:
+    """按天的交易流依次经过退款对冲、转账识别、亲属卡处理三个窗口阶段，产出合并后的交易"""
+    return family_card_stage(transfer_stage(refund_stage(days, stats), stats), accounts_with_data, stats)
+
+
+def _chunks(transactions: Iterable[Transaction], chunk_rows: int) -> Iterator[TransactionTable]:
+    """按行数分块转换为列式表"""
+    batch = []
+    for tx in transactions:
+        batch.append(tx)
+        if len(batch) >= chunk_rows:
+            yield TransactionTable.from_transactions(batch)
+            batch = []
+    if batch:
+        yield TransactionTable.from_transactions(batch)
+
+
+def window_merge(excel_files: List[str], output_path: str, fmt: Optional[str] = None,
+                 chunk_rows: int = CHUNK_ROWS) -> Tuple[int, Dict[str, int]]:
+    """
+    滑动窗口合并各银行Excel并写出合并文件，返回 (输入总行数, 各Sheet记录数)
+    临时分块写在合并文件所在目录下，完成后删除
+    """
+    stats = defaultdict(int)
+    work_root = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(work_root, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".sui_window_", dir=work_root) as work_dir:
+        print("\n=== 按日期外部排序 ===")
+        runs, accounts_with_data, total_count = sorted_runs(excel_files, work_dir, chunk_rows)
+        print(f"  数据中存在的银行账户: {', '.join(sorted(accounts_with_data))}")
+
+        print(f"\n=== 滑动窗口合并（退款 {REFUND_WINDOW} 天，转账 ±{TRANSFER_WINDOW} 天，亲属卡同一天） ===")
+        transactions = window_stages(iter_days(runs), accounts_with_data, stats)
+        counts = get_writer(fmt).write_chunks(_chunks(transactions, chunk_rows), output_path)
+
+    print(f"退款对冲：精确匹配 {stats['exact']} 对，模糊匹配 {stats['fuzzy']} 对")
+    print(f"转账识别：{stats['transfers']} 条")
+    print(f"亲属卡处理：匹配成功 {stats['family_matched']} 条，未匹配-删除 {stats['family_deleted']} 条，"
+          f"未匹配-保留 {stats['family_kept']} 条")
+    return total_count, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="滑动窗口合并：按日期外部排序后逐天匹配并直接写出，内存与历史长度无关",
+        epilog="示例: python window_merge.py output/\n      python window_merge.py output/ merged.csv --format csv",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input_dir", help="包含 *_随手记.xlsx 的输出目录")
+    parser.add_argument("output_path", nargs="?", default=None, help="合并文件路径（默认 <目录>/merged_账单.<格式扩展名>）")
+    parser.add_argument("--format", choices=FORMATS, default="xlsx",
+                        help="输出格式：xlsx（随手记Excel，默认）、csv/tsv（每个Sheet一个文件）、jsonl")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input_dir):
+        print(f"错误: 目录不存在 {args.input_dir}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    print(f"=== 开始滑动窗口合并 ===")
+    print(f"输入目录: {args.input_dir}")
+    excel_files = list_excel_files(args.input_dir)
+    if not excel_files:
+        print("未找到Excel文件")
+        return
+    print(f"找到 {len(excel_files)} 个Excel文件")
+
+    output_path = args.output_path or os.path.join(args.input_dir, "merged_账单" + get_writer(args.format).EXTENSION)
+    total_count, counts = window_merge(excel_files, output_path, args.format)
+
+    print(f"\n处理完成！")
+    print(f"  输入文件: {len(excel_files)} 个")
+    print(f"  原始记录: {total_count} 条")
+    print(f"  最终记录: {sum(counts.values())} 条")
+    print(f"  输出文件: {output_path}")
+    print(f"  总耗时: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
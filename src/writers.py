@@ -0,0 +1,183 @@
+"""
+数据输出写入器
+不需要带样式的工作簿时（大批量中间结果、下游分析），按列式表直接写出文本：
+
+- CSV / TSV：每个Sheet一个文件（<输出文件名>_支出.csv 等），表头与 ExcelGenerator 的列定义相同
+- JSON Lines：一行一条交易，键为所属Sheet的列名
+
+各列先整列转换为文本，再逐行拼接写出，不为每行构造 Transaction 或字典；金额按分精确格式化
+"""
+import csv
+import json
+import os
+import shutil
+from contextlib import ExitStack
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from base_writer import SHEET_NAMES, BaseWriter, sheet_indices
+from excel_generator import ExcelGenerator
+from models import format_cents
+from transaction_table import TransactionTable
+
+
+def _texts(values: np.ndarray, indices: np.ndarray, none) -> list:
+    """文本列取出指定行（None 和空值替换为 none）"""
+    return [value or none for value in values[indices].tolist()]
+
+
+def sheet_columns(table: TransactionTable, sheet_name: str, indices: np.ndarray, none="") -> list:
+    """
+    指定Sheet各列的取值（每列一个列表），列顺序与 ExcelGenerator.row_values 一致
+    none 为空单元格的取值
+    """
+    count = len(indices)
+    dates = table.date[indices].tolist()
+    amounts = [format_cents(cents) for cents in table.cents[indices].tolist()]
+    merchants = _texts(table.merchant, indices, "")
+    descriptions = _texts(table.description, indices, "")
+
+    if sheet_name == "转账":
+        # 交易类型, 日期, 转出账户, 转入账户, 金额, 成员, 商家, 项目, 备注
+        return [repeat("转账", count), dates, table.decode("account", indices, none),
+                table.decode("transfer_to", indices, ""), amounts, repeat("", count), merchants,
+                repeat("", count), descriptions]
+
+    # 交易类型, 日期, 分类, 子分类, 支出/收入账户, 金额, 成员, 商家, 项目, 备注
+    return [repeat(sheet_name, count), dates, table.decode("category", indices, none),
+            table.decode("subcategory", indices, none), table.decode("account", indices, none),
+            amounts, repeat("", count), merchants, repeat("", count), descriptions]
+
+
+def sheet_headers(sheet_name: str) -> List[str]:
+    if sheet_name == "转账":
+        return ExcelGenerator.TRANSFER_COLUMNS
+    if sheet_name == "收入":
+        return ExcelGenerator.INCOME_COLUMNS
+    return ExcelGenerator.EXPENSE_COLUMNS
+
+
+def _ensure_dir(output_path: str):
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+
+class CSVWriter(BaseWriter):
+    """
+    CSV 写入器：每个Sheet一个文件
+    """
+
+    FORMAT = "csv"
+    EXTENSION = ".csv"
+    DELIMITER = ","
+
+    def output_paths(self, output_path: str) -> List[str]:
+        stem, ext = os.path.splitext(output_path)
+        return [f"{stem}_{sheet_name}{ext}" for sheet_name in SHEET_NAMES]
+
+    def write_table(self, table: TransactionTable, output_path: str) -> Dict[str, int]:
+        return self.write_chunks([table], output_path)
+
+    def write_chunks(self, chunks: Iterable[TransactionTable], output_path: str) -> Dict[str, int]:
+        """各Sheet的文件同时打开，逐块追加"""
+        _ensure_dir(output_path)
+        counts = dict.fromkeys(SHEET_NAMES, 0)
+        paths = self.output_paths(output_path)
+        with ExitStack() as stack:
+            writers = {}
+            for sheet_name, path in zip(SHEET_NAMES, paths):
+                f = stack.enter_context(open(path, "w", encoding="utf-8", newline=""))
+                writers[sheet_name] = csv.writer(f, delimiter=self.DELIMITER, lineterminator="\n")
+                writers[sheet_name].writerow(sheet_headers(sheet_name))
+            for table in chunks:
+                for sheet_name, rows in sheet_indices(table).items():
+                    # zip 在上一行元组已释放时复用同一个元组，逐行写出不产生额外对象
+                    writers[sheet_name].writerows(zip(*sheet_columns(table, sheet_name, rows)))
+                    counts[sheet_name] += len(rows)
+        for path in paths:
+            print(f"成功保存文件：{path}")
+        return counts
+
+
+class TSVWriter(CSVWriter):
+    """
+    TSV 写入器
+    """
+
+    FORMAT = "tsv"
+    EXTENSION = ".tsv"
+    DELIMITER = "\t"
+
+
+class JSONLinesWriter(BaseWriter):
+    """
+    JSON Lines 写入器：一行一条交易，按Sheet依次写出
+    """
+
+    FORMAT = "jsonl"
+    EXTENSION = ".jsonl"
+
+    def write_table(self, table: TransactionTable, output_path: str) -> Dict[str, int]:
+        _ensure_dir(output_path)
+        counts = {}
+        indices = sheet_indices(table)
+        with open(output_path, "w", encoding="utf-8") as f:
+            for sheet_name in SHEET_NAMES:
+                counts[sheet_name] = self._write_rows(f, table, sheet_name, indices[sheet_name])
+        print(f"成功保存文件：{output_path}")
+        return counts
+
+    def write_chunks(self, chunks: Iterable[TransactionTable], output_path: str) -> Dict[str, int]:
+        """各Sheet先逐块写入各自的临时分段文件，最后按Sheet顺序拼接为输出文件"""
+        _ensure_dir(output_path)
+        counts = dict.fromkeys(SHEET_NAMES, 0)
+        part_paths = {sheet_name: f"{output_path}.{sheet_name}.part" for sheet_name in SHEET_NAMES}
+        with ExitStack() as stack:
+            parts = {sheet_name: stack.enter_context(open(path, "w", encoding="utf-8"))
+                     for sheet_name, path in part_paths.items()}
+            for table in chunks:
+                for sheet_name, rows in sheet_indices(table).items():
+                    counts[sheet_name] += self._write_rows(parts[sheet_name], table, sheet_name, rows)
+        with open(output_path, "wb") as f:
+            for path in part_paths.values():
+                with open(path, "rb") as part:
+                    shutil.copyfileobj(part, f, 1024 * 1024)
+                os.remove(path)
+        print(f"成功保存文件：{output_path}")
+        return counts
+
+    @staticmethod
+    def _write_rows(f, table: TransactionTable, sheet_name: str, rows: np.ndarray) -> int:
+        """写出指定Sheet的行，返回行数"""
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+        headers = sheet_headers(sheet_name)
+        amount_column = headers.index("金额")
+        # 每行套用同一个模板，列值预先编码为 JSON 文本（金额直接作为数值）
+        template = "{{" + ", ".join(f"{encode(h)}: {{}}" for h in headers) + "}}\n"
+        columns = sheet_columns(table, sheet_name, rows, none=None)
+        encoded = [column if i == amount_column else map(encode, column) for i, column in enumerate(columns)]
+        f.writelines(template.format(*row) for row in zip(*encoded))
+        return len(rows)
+
+
+WRITERS = {
+    ExcelGenerator.FORMAT: ExcelGenerator,
+    CSVWriter.FORMAT: CSVWriter,
+    TSVWriter.FORMAT: TSVWriter,
+    JSONLinesWriter.FORMAT: JSONLinesWriter,
+}
+
+FORMATS = tuple(WRITERS)
+
+
+def get_writer(fmt: Optional[str] = None) -> BaseWriter:
+    """
+    按 --format 取值创建写入器（默认随手记Excel，使用只写模式）
+    """
+    fmt = fmt or ExcelGenerator.FORMAT
+    if fmt == ExcelGenerator.FORMAT:
+        return ExcelGenerator(write_only=True)
+    return WRITERS[fmt]()
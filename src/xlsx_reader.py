@@ -0,0 +1,191 @@
+"""
+xlsx 流式读取模块
+直接从 xlsx 压缩包读取 sheet XML 与共享字符串，用增量 XML 解析逐行产出单元格值，
+不构建 openpyxl 单元格对象；只支持纯值单元格（字符串/数字/布尔），遇到公式等抛出 UnsupportedWorkbook
+"""
+import posixpath
+import zipfile
+from typing import Dict, Iterator, List, Optional
+from xml.etree.ElementTree import iterparse
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_SHEET_DATA = MAIN_NS + "sheetData"
+_ROW = MAIN_NS + "row"
+_VALUE = MAIN_NS + "v"
+_FORMULA = MAIN_NS + "f"
+_INLINE = MAIN_NS + "is"
+_TEXT = MAIN_NS + "t"
+_RICH_RUN = MAIN_NS + "r"
+_SHARED_ITEM = MAIN_NS + "si"
+
+_DIGITS = "0123456789"
+
+
+class UnsupportedWorkbook(ValueError):
+    """工作簿结构超出流式读取器的支持范围（调用方应回退到 openpyxl）"""
+
+
+def _column_index(letters: str) -> int:
+    """列字母转为从0开始的列号，如 A -> 0, AB -> 27"""
+    index = 0
+    for char in letters:
+        index = index * 26 + (ord(char) - 64)
+    return index - 1
+
+
+def _string_item_text(item) -> str:
+    """共享字符串/内联字符串的文本（拼接富文本片段，忽略注音）"""
+    parts = []
+    for child in item:
+        if child.tag == _TEXT:
+            parts.append(child.text or "")
+        elif child.tag == _RICH_RUN:
+            text = child.find(_TEXT)
+            if text is not None:
+                parts.append(text.text or "")
+    return "".join(parts)
+
+
+class XlsxStreamReader:
+    """
+    xlsx 流式读取器
+
+    用法:
+        with XlsxStreamReader(path) as reader:
+            for row in reader.iter_rows("支出"):
+                ...
+    """
+
+    def __init__(self, file_path: str):
+        try:
+            self._zip = zipfile.ZipFile(file_path)
+        except zipfile.BadZipFile as e:
+            raise UnsupportedWorkbook(f"不是有效的 xlsx 文件: {e}")
+        self._sheet_parts = self._load_sheet_parts()
+        self._shared_strings: Optional[List[str]] = None
+
+    def __enter__(self) -> "XlsxStreamReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self._sheet_parts)
+
+    def _open_part(self, name: str):
+        try:
+            return self._zip.open(name)
+        except KeyError:
+            raise UnsupportedWorkbook(f"缺少部件 {name}")
+
+    def _load_sheet_parts(self) -> Dict[str, str]:
+        """读取 workbook.xml 及其关系文件，返回 {sheet名: sheet XML 路径}（按工作簿顺序）"""
+        targets = {}
+        with self._open_part("xl/_rels/workbook.xml.rels") as stream:
+            for _, rel in iterparse(stream):
+                if rel.tag == PKG_REL_NS + "Relationship":
+                    target = rel.get("Target", "")
+                    if target.startswith("/"):
+                        target = target[1:]
+                    else:
+                        target = posixpath.normpath(posixpath.join("xl", target))
+                    targets[rel.get("Id")] = target
+
+        sheets = {}
+        with self._open_part("xl/workbook.xml") as stream:
+            for _, elem in iterparse(stream):
+                if elem.tag == MAIN_NS + "sheet":
+                    rel_id = elem.get(REL_NS + "id")
+                    if rel_id not in targets:
+                        raise UnsupportedWorkbook(f"sheet {elem.get('name')} 缺少关系 {rel_id}")
+                    sheets[elem.get("name")] = targets[rel_id]
+        return sheets
+
+    def _load_shared_strings(self) -> List[str]:
+        """读取共享字符串表（openpyxl 写入的文件使用内联字符串，可能没有此部件）"""
+        if self._shared_strings is None:
+            strings = []
+            if "xl/sharedStrings.xml" in self._zip.NameToInfo:
+                with self._zip.open("xl/sharedStrings.xml") as stream:
+                    for _, elem in iterparse(stream):
+                        if elem.tag == _SHARED_ITEM:
+                            strings.append(_string_item_text(elem))
+                            elem.clear()
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def iter_rows(self, sheet_name: str, min_row: int = 1) -> Iterator[List]:
+        """
+        逐行产出 sheet 的单元格值列表（列号从0开始，空单元格为 None）
+        已处理的行立即从解析树中移除，内存占用与行数无关
+        """
+        if sheet_name not in self._sheet_parts:
+            raise UnsupportedWorkbook(f"sheet 不存在: {sheet_name}")
+        shared = self._load_shared_strings()
+        columns: Dict[str, int] = {}
+
+        with self._open_part(self._sheet_parts[sheet_name]) as stream:
+            sheet_data = None
+            row_number = 0
+            for event, elem in iterparse(stream, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == _SHEET_DATA:
+                        sheet_data = elem
+                    continue
+                if elem.tag != _ROW:
+                    continue
+
+                row_attr = elem.get("r")
+                row_number = int(row_attr) if row_attr else row_number + 1
+                if row_number >= min_row:
+                    yield self._row_values(elem, shared, columns)
+                sheet_data.clear()
+
+    def _row_values(self, row, shared: List[str], columns: Dict[str, int]) -> List:
+        values: List = []
+        for cell in row:
+            ref = cell.get("r")
+            if ref:
+                letters = ref.rstrip(_DIGITS)
+                col = columns.get(letters)
+                if col is None:
+                    col = columns[letters] = _column_index(letters)
+            else:
+                col = len(values)
+            if col >= len(values):
+                values.extend([None] * (col + 1 - len(values)))
+
+            cell_type = cell.get("t", "n")
+            if cell_type == "inlineStr":
+                inline = cell.find(_INLINE)
+                values[col] = _string_item_text(inline) if inline is not None else ""
+                continue
+
+            if cell.find(_FORMULA) is not None:
+                raise UnsupportedWorkbook(f"单元格 {ref} 含公式")
+            value = cell.find(_VALUE)
+            if value is None:
+                continue
+            text = value.text or ""
+
+            if cell_type == "s":
+                values[col] = shared[int(text)]
+            elif cell_type == "n":
+                if not text:
+                    continue
+                values[col] = float(text) if ("." in text or "E" in text or "e" in text) else int(text)
+            elif cell_type == "b":
+                values[col] = text == "1"
+            elif cell_type in ("str", "e"):
+                values[col] = text
+            else:
+                raise UnsupportedWorkbook(f"单元格 {ref} 类型不支持: {cell_type}")
+        return values
@@ -0,0 +1,10 @@
+"""
+单元测试（标准库 unittest，pytest 亦可直接运行）
+用法: python -m unittest discover -s tests -t .
+"""
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,65 @@
+"""
+合并测试用的随机交易：退款、还款/充值、亲属卡标记、按揭还款等混在一起，金额只取少数几种，
+便于产生大量同金额的配对候选
+"""
+import random
+from typing import List
+
+import numpy as np
+
+import merge
+from models import Transaction
+from transaction_table import TransactionTable
+
+ACCOUNTS = ["农业银行", "宁波银行", "建行储蓄卡", "招商信用卡", "中信信用卡", "建行信用卡", "微信", "支付宝", "未知卡"]
+DESCRIPTIONS = ["跨行还款", "中信 还款", "微信零钱充值", "支付宝-商户消费", "美团", "天猫**店退款", "张三", "信用卡还款",
+                "余额宝转入", "盒马 退款", ""]
+MERCHANTS = ["", "张三", "天猫**店", "盒马", "美团", "李四四"]
+AMOUNTS = [100, 200, 300, 500, 1990, 8800]
+
+
+def random_transactions(count: int, seed: int, months: int = 3, undated: float = 0.03) -> List[Transaction]:
+    """count 条随机交易，日期落在 2025 年前 months 个月内，约 undated 比例的行没有日期"""
+    rng = random.Random(seed)
+    transactions = []
+    for _ in range(count):
+        date = "" if rng.random() < undated else f"2025-{rng.randint(1, months):02d}-{rng.randint(1, 28):02d}"
+        roll = rng.random()
+        account = rng.choice(ACCOUNTS)
+        category, subcategory, tx_type = "食品酒水", "早午晚餐", "支出"
+        if roll < 0.45:
+            pass
+        elif roll < 0.75:
+            tx_type = "收入"
+            category, subcategory = rng.choice([("其他收入", "退款"), ("职业收入", "工资"), ("__REPAYMENT__", "")])
+        elif roll < 0.85:
+            tx_type, category, subcategory = "__MARKER__", "__FAMILY_CARD__", rng.choice(["妈妈", ""])
+            account = rng.choice(ACCOUNTS + ["__ANY_BANK__", "光大银行"])
+        elif roll < 0.9:
+            tx_type, category, subcategory = "__MARKER__", "其他", "爸爸"
+        else:
+            category, subcategory = "金融保险", rng.choice(["按揭还款", "保险"])
+        transactions.append(Transaction(
+            date=date, category=category, subcategory=subcategory, account=account,
+            amount_cents=rng.choice(AMOUNTS), description=rng.choice(DESCRIPTIONS) + rng.choice(["", "微信"]),
+            transaction_type=tx_type, merchant=rng.choice(MERCHANTS)))
+    return transactions
+
+
+def random_table(count: int, seed: int, **kwargs) -> TransactionTable:
+    """random_transactions 的列式表，origin 为输入行号"""
+    table = TransactionTable.from_transactions(random_transactions(count, seed, **kwargs))
+    table.origin = np.arange(len(table), dtype=np.int64)
+    return table
+
+
+def in_memory_merge(table: TransactionTable) -> TransactionTable:
+    """merge.py 的全量合并流程（退款对冲、转账识别、亲属卡匹配），按 (日期, origin) 排序"""
+    matched = merge.refunds_and_transfers(table)
+    _, accounts = merge._bank_contributions(matched)
+    return by_date_and_origin(merge.process_family_card(matched, accounts_with_data=set(accounts)))
+
+
+def by_date_and_origin(table: TransactionTable) -> TransactionTable:
+    """按 (日期, origin) 排序"""
+    return table.take(np.lexsort((table.origin, table.date_ord)))
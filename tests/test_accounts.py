@@ -0,0 +1,78 @@
+"""
+账户登记表：别名只用于解析器提取的银行名称，合并阶段按账户名本身判断类型，
+账户为别名（建设银行、招商、余额宝 等）的记录与未登记的账户相同，不参与转账识别
+"""
+import contextlib
+import io
+import unittest
+
+import merge
+from accounts import CREDIT, DEBIT, WALLET, account_registry
+from models import Transaction
+from parsers import AlipayParser, WeChatParser
+from transaction_table import TransactionTable
+
+
+def tx(account: str, cents: int, tx_type: str, description: str = "", category: str = "其他杂项",
+       subcategory: str = "其他支出") -> Transaction:
+    return Transaction(date="2025-01-05", category=category, subcategory=subcategory, account=account,
+                       amount_cents=cents, description=description, transaction_type=tx_type)
+
+
+def transfers(transactions):
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = merge.identify_transfers(TransactionTable.from_transactions(transactions))
+    return [(t.account, t.transfer_to_account, t.amount_cents) for t in result.iter_transactions()
+            if t.transaction_type == "转账"]
+
+
+class AccountRegistryTest(unittest.TestCase):
+
+    def test_aliases_resolve_but_carry_no_type(self):
+        registry = account_registry()
+        self.assertEqual(registry.resolve("建设银行"), "建行储蓄卡")
+        self.assertEqual(registry.resolve("招商银行"), "招商储蓄卡")
+        self.assertEqual(registry.type_mask("建行储蓄卡"), DEBIT)
+        self.assertEqual(registry.type_mask("招商信用卡"), CREDIT)
+        self.assertEqual(registry.type_mask("支付宝"), WALLET)
+        for alias in ("建设银行", "招商银行", "余额宝"):
+            with self.subTest(alias=alias):
+                self.assertEqual(registry.type_mask(alias), 0)
+
+    def test_bare_bank_prefixes_are_not_aliases(self):
+        registry = account_registry()
+        for prefix in ("招商", "建设", "农业", "宁波", "工商"):
+            with self.subTest(prefix=prefix):
+                self.assertEqual(registry.resolve(prefix), prefix)
+                self.assertEqual(registry.type_mask(prefix), 0)
+
+    def test_payment_methods_resolve_to_registered_accounts(self):
+        for parser in (WeChatParser(), AlipayParser()):
+            with self.subTest(parser=type(parser).__name__):
+                self.assertEqual(parser._extract_bank_name("招商银行储蓄卡(1234)"), "招商储蓄卡")
+                self.assertEqual(parser._extract_bank_name("农业银行储蓄卡(1970)"), "农业银行")
+                self.assertEqual(parser._extract_bank_name("建设银行信用卡(2359)"), "建行信用卡")
+
+
+class AliasAccountMergeTest(unittest.TestCase):
+
+    def test_alias_accounts_are_not_transfer_sources(self):
+        rows = [tx("建设银行", 500, "支出", "中信 还款"), tx("招商", 300, "支出", "跨行还款"),
+                tx("中信信用卡", 500, "收入", category="__REPAYMENT__", subcategory="还款")]
+        self.assertEqual(transfers(rows), [])
+
+    def test_alias_accounts_are_not_transfer_targets(self):
+        # 余额宝 是 支付宝 的别名，但合并时不按钱包处理：跨行还款与 招商信用卡 的收入配对
+        rows = [tx("农业银行", 300, "支出", "跨行还款"),
+                tx("余额宝", 300, "收入", category="其他收入", subcategory="利息收入"),
+                tx("招商信用卡", 300, "收入", category="__REPAYMENT__", subcategory="还款")]
+        self.assertEqual(transfers(rows), [("农业银行", "招商信用卡", 300)])
+
+    def test_registered_accounts_still_transfer(self):
+        rows = [tx("建行储蓄卡", 500, "支出", "支付宝充值"), tx("支付宝", 500, "收入", category="其他收入",
+                                                             subcategory="充值")]
+        self.assertEqual(transfers(rows), [("建行储蓄卡", "支付宝", 500)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+配置加载：文件缺失或格式错误时返回空配置并打印警告
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from config_loader import CONFIG_DIR, config_path, load_json_config
+
+
+class LoadJsonConfigTest(unittest.TestCase):
+
+    def test_loads_config(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "rules.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"keywords": {"还款": "信用卡"}}, f, ensure_ascii=False)
+            self.assertEqual(load_json_config(path, "不识别转账目标"), {"keywords": {"还款": "信用卡"}})
+
+    def test_missing_or_invalid_config_falls_back(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            invalid = os.path.join(tmp_dir, "invalid.json")
+            with open(invalid, "w", encoding="utf-8") as f:
+                f.write("{")
+            for path in (os.path.join(tmp_dir, "missing.json"), invalid):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    self.assertEqual(load_json_config(path, "没有登记的账户"), {})
+                self.assertIn("警告", output.getvalue())
+                self.assertIn("没有登记的账户", output.getvalue())
+
+    def test_repository_configs_load(self):
+        for filename in ("accounts.json", "merchant_rules.json", "transfer_rules.json", "category_mapping.json"):
+            with self.subTest(filename=filename):
+                self.assertEqual(os.path.dirname(config_path(filename)), CONFIG_DIR)
+                self.assertTrue(load_json_config(config_path(filename), ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+信用卡解析器基类：未实现交易归类的子类无法实例化；退款与同商户、同金额的消费对冲
+"""
+import contextlib
+import io
+import unittest
+
+from credit_card_parser import CreditCardParser, offset_refunds
+from parsers import CCBCreditParser, CITICParser, CMBParser
+from parsers.spdb_parser import SPDBParser
+
+
+class CreditCardParserTest(unittest.TestCase):
+
+    def test_subclass_without_classify_raw_cannot_be_instantiated(self):
+        class IncompleteParser(CreditCardParser):
+            def parse(self, file_path):
+                return None
+
+            def get_supported_extensions(self):
+                return [".pdf"]
+
+        with self.assertRaises(TypeError):
+            IncompleteParser()
+
+    def test_bank_parsers_implement_classify_raw(self):
+        for parser_class in (CMBParser, CITICParser, SPDBParser, CCBCreditParser):
+            with self.subTest(parser=parser_class.__name__):
+                parser_class()
+
+    def test_offset_refunds_takes_first_unmatched_expense(self):
+        expenses = [{"description": "盒马 1", "amount": 500}, {"description": "盒马 2", "amount": 500},
+                    {"description": "美团 3", "amount": 500}]
+        refunds = [{"description": "盒马 退款", "amount": -500}, {"description": "盒马 退款", "amount": -500},
+                   {"description": "盒马 退款", "amount": -500}, {"description": "", "amount": -500}]
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, matched_expenses, matched_refunds = offset_refunds(
+                expenses, refunds, lambda description: description.split(" ")[0])
+        self.assertEqual(matched_expenses, {0, 1})
+        self.assertEqual(matched_refunds, {0, 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+增量合并与全量合并（--full）的结果一致：在上次合并的基础上新增、修改、删除输入文件后，
+增量合并写出的文件与全量重算逐字节相同；有数据的银行账户发生变化时改为全量重算
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from collections import defaultdict
+
+import merge
+from excel_generator import ExcelGenerator
+from models import Transaction
+from tests.merge_samples import random_transactions
+from transaction_table import TransactionTable
+
+SEEDS = range(5)
+
+
+def write_input(input_dir: str, name: str, transactions):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ExcelGenerator().write_table(TransactionTable.from_transactions(transactions), os.path.join(input_dir, name))
+
+
+def write_inputs(input_dir: str, seed: int):
+    """
+    random_transactions 按账户和月份（1 月及无日期 / 2 月以后）拆成 <账户>-2025MM_随手记.xlsx，
+    另有一条 浦发信用卡 的亲属卡标记（随机交易不使用该账户，标记金额也不与随机交易重复）
+    """
+    groups = defaultdict(list)
+    for t in random_transactions(300, seed):
+        groups[(t.account, "02" if t.date[5:7] > "01" else "01")].append(t)
+    for (account, month), group in groups.items():
+        write_input(input_dir, f"{account}-2025{month}_随手记.xlsx", group)
+    write_input(input_dir, "微信亲属卡-202502_随手记.xlsx", [Transaction(
+        date="2025-02-10", category="__FAMILY_CARD__", subcategory="妈妈", account="浦发信用卡", amount_cents=4321,
+        description="亲属卡交易", transaction_type="__MARKER__")])
+
+
+def merged(work_dir: str, name: str, full: bool = False):
+    """合并 <work_dir>/input 到 <work_dir>/<name>/merged_账单.jsonl，返回 (文件内容, 输出的日志)"""
+    output_path = os.path.join(work_dir, name, "merged_账单.jsonl")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        merge.merge_excel_files(os.path.join(work_dir, "input"), output_path, jobs=1, full=full, fmt="jsonl")
+    with open(output_path, "rb") as f:
+        return f.read(), log.getvalue()
+
+
+class IncrementalMergeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_matches_full_run(self, change, full_recompute: bool = False):
+        """首次合并后用 change(输入目录, 种子) 修改输入，增量合并写出的文件应与全量合并相同"""
+        for seed in SEEDS:
+            with self.subTest(seed=seed):
+                work_dir = os.path.join(self.tmp_dir.name, str(seed))
+                input_dir = os.path.join(work_dir, "input")
+                os.makedirs(input_dir)
+                write_inputs(input_dir, seed)
+                before, _ = merged(work_dir, "incremental")
+
+                change(input_dir, seed)
+                incremental, log = merged(work_dir, "incremental")
+                full, _ = merged(work_dir, "full", full=True)
+
+                self.assertIn("增量合并", log)
+                self.assertEqual("全量重算" in log, full_recompute)
+                self.assertNotEqual(incremental, before)
+                self.assertEqual(incremental.decode("utf-8"), full.decode("utf-8"))
+
+    def test_added_file(self):
+        def add(input_dir, seed):
+            write_input(input_dir, "招商信用卡-202503_随手记.xlsx",
+                        [t for t in random_transactions(80, seed + 100) if t.account == "招商信用卡"])
+        self.assert_matches_full_run(add)
+
+    def test_changed_file(self):
+        def change(input_dir, seed):
+            write_input(input_dir, "微信-202502_随手记.xlsx",
+                        [t for t in random_transactions(300, seed + 200) if t.account == "微信"])
+        self.assert_matches_full_run(change)
+
+    def test_deleted_file(self):
+        def delete(input_dir, seed):
+            os.remove(os.path.join(input_dir, "支付宝-202502_随手记.xlsx"))
+        self.assert_matches_full_run(delete)
+
+    def test_accounts_with_bank_data_changed(self):
+        def add_account(input_dir, seed):
+            # 浦发信用卡 由无数据变为有数据：受影响的只有 12.34 元，但未受影响的 43.21 元亲属卡标记应随之删除
+            write_input(input_dir, "浦发信用卡-202502_随手记.xlsx", [Transaction(
+                date="2025-02-11", category="食品酒水", subcategory="早午晚餐", account="浦发信用卡",
+                amount_cents=1234, description="肯德基", transaction_type="支出")])
+        self.assert_matches_full_run(add_account, full_recompute=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+本地交易账本：重复写入只计确有变化的记录，各合并来源的记录互不覆盖，汇总默认统计全部交易类型
+"""
+import contextlib
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from ledger import connect, fingerprints, query_totals, update_ledger
+from models import Transaction
+from transaction_table import TransactionTable
+
+
+def sample_table() -> TransactionTable:
+    return TransactionTable.from_transactions([
+        Transaction(date="2025-01-03", category="食品酒水", subcategory="早午晚餐", account="招商信用卡",
+                    amount_cents=2550, description="肯德基", transaction_type="支出", merchant="肯德基"),
+        Transaction(date="2025-01-03", category="食品酒水", subcategory="早午晚餐", account="招商信用卡",
+                    amount_cents=2550, description="肯德基", transaction_type="支出", merchant="肯德基"),
+        Transaction(date="2025-01-05", category="职业收入", subcategory="工资收入", account="农业银行",
+                    amount_cents=900000, description="代发工资", transaction_type="收入"),
+        Transaction(date="2025-01-08", category="转账", subcategory="还款", account="农业银行",
+                    amount_cents=50000, description="跨行还款", transaction_type="转账",
+                    transfer_to_account="招商信用卡"),
+    ])
+
+
+class LedgerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.ledger_path = os.path.join(self.tmp_dir.name, "ledger.sqlite")
+        self.source = os.path.join(self.tmp_dir.name, "merged_账单.xlsx")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def rows(self) -> int:
+        with contextlib.closing(sqlite3.connect(self.ledger_path)) as conn:
+            return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def test_counts_only_changed_rows(self):
+        table = sample_table()
+        self.assertEqual(update_ledger(self.ledger_path, table, self.source), (4, 0, 0))
+        self.assertEqual(update_ledger(self.ledger_path, table, self.source), (0, 0, 0))
+
+        table.set_text("subcategory", 1, "零食")
+        self.assertEqual(update_ledger(self.ledger_path, table, self.source), (0, 1, 0))
+
+        table = table.take([0, 1, 2])
+        self.assertEqual(update_ledger(self.ledger_path, table, self.source), (0, 0, 1))
+        self.assertEqual(self.rows(), 3)
+
+    def test_sources_do_not_collide(self):
+        table = sample_table()
+        other = os.path.join(self.tmp_dir.name, "其他_账单.xlsx")
+        self.assertNotEqual(fingerprints(table, self.source), fingerprints(table, other))
+
+        update_ledger(self.ledger_path, table, self.source)
+        self.assertEqual(update_ledger(self.ledger_path, table, other), (4, 0, 0))
+        self.assertEqual(self.rows(), 8)
+
+        # 一个来源删除记录不影响另一个来源
+        self.assertEqual(update_ledger(self.ledger_path, table.take([0]), other), (0, 0, 3))
+        self.assertEqual(self.rows(), 5)
+
+    def test_totals_cover_all_types_by_default(self):
+        update_ledger(self.ledger_path, sample_table(), self.source)
+        with contextlib.closing(connect(self.ledger_path)) as conn:
+            by_type = {name: (count, cents) for name, count, cents in query_totals(conn, by="type")}
+            expenses = query_totals(conn, tx_type="支出", by="type")
+        self.assertEqual(by_type, {"支出": (2, 5100), "收入": (1, 900000), "转账": (1, 50000)})
+        self.assertEqual(expenses, [("支出", 2, 5100)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+数据模型：金额字符串精确解析为整数分；Transaction 兼容按元给出金额的旧接口
+"""
+import pickle
+import unittest
+
+from models import Transaction, to_cents
+
+
+def sample(**amount) -> Transaction:
+    return Transaction(date="2025-01-03", category="食品酒水", subcategory="早午晚餐", account="招商信用卡",
+                       description="肯德基", **amount)
+
+
+class ToCentsTest(unittest.TestCase):
+
+    def assert_cents(self, cases):
+        for value, cents in cases:
+            with self.subTest(value=value):
+                self.assertEqual(to_cents(value), cents)
+
+    def test_half_up_at_third_decimal(self):
+        self.assert_cents([("1.005", 101), ("1.004", 100), ("0.125", 13), ("2.675", 268), ("19.99", 1999),
+                           ("0.1", 10), ("5.", 500), ("+3.10", 310), ("  7 ", 700)])
+
+    def test_negatives(self):
+        self.assert_cents([("-1.005", -101), ("-1.004", -100), ("-.5", -50), ("-0.5", -50), (".5", 50),
+                           ("-25.50", -2550)])
+
+    def test_currency_symbols_and_thousands_separators(self):
+        self.assert_cents([("¥1,234.56", 123456), ("￥-2,000", -200000), ("1,000,000.01", 100000001),
+                           ("¥.99", 99)])
+
+    def test_scientific_notation_uses_decimal(self):
+        self.assert_cents([("1e3", 100000), ("1.2345E2", 12345), ("-1.5e-2", -2), ("2.5e-3", 0)])
+
+    def test_unparseable_text_is_zero(self):
+        self.assert_cents([("abc", 0), ("", 0), ("-", 0), (".", 0), ("1.2.3", 0), ("inf", 0), ("nan", 0),
+                           (None, 0)])
+
+    def test_numbers(self):
+        self.assert_cents([(0.1 + 0.2, 30), (2.675, 268), (-0.015, -2), (19.99, 1999), (12, 1200), (-3, -300),
+                           (0, 0)])
+
+
+class TransactionAmountTest(unittest.TestCase):
+
+    def test_amount_keyword_converts_to_cents(self):
+        self.assertEqual(sample(amount=25.5).amount_cents, 2550)
+        self.assertEqual(sample(amount="1,234.56").amount_cents, 123456)
+        self.assertEqual(sample(amount=12).amount_cents, 1200)
+        self.assertEqual(sample(amount=25.5), sample(amount_cents=2550))
+
+    def test_amount_and_amount_cents_are_exclusive(self):
+        with self.assertRaises(TypeError):
+            sample(amount=1, amount_cents=100)
+        with self.assertRaises(TypeError):
+            sample()
+
+    def test_amount_attribute_is_writable(self):
+        tx = sample(amount_cents=100)
+        tx.amount = 0.1 + 0.2
+        self.assertEqual(tx.amount_cents, 30)
+        self.assertEqual(tx.amount, 0.3)
+
+    def test_positional_arguments_and_pickle(self):
+        tx = Transaction("2025-01-03", "食品酒水", "早午晚餐", "招商信用卡", 2550, "肯德基", "支出", None, "肯德基")
+        self.assertEqual(tx, sample(amount_cents=2550, transaction_type="支出", merchant="肯德基"))
+        self.assertEqual(pickle.loads(pickle.dumps(tx)), tx)
+        self.assertIs(tx.account, sample(amount_cents=1).account)
+
+
+if __name__ == "__main__":
+    unittest.main()
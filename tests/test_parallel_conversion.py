@@ -0,0 +1,97 @@
+"""
+main.py 批量转换：串行时不预估耗时、不写耗时日志；--jobs 并发时工作进程异常退出，其余文件照常转换
+"""
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from main import SuiConverter
+from models import BankStatement, Transaction
+from parsers import ABCParser, WeChatParser
+from scheduler import COST_LOG_NAME
+
+
+def fake_parse(self, file_path: str) -> BankStatement:
+    """文件名含 crash 时直接结束工作进程，其余返回一条支出"""
+    if "crash" in os.path.basename(file_path):
+        os._exit(1)
+    transaction = Transaction(date="2025-01-01", category="食品酒水", subcategory="早午晚餐", account="微信",
+                              amount_cents=100, description=os.path.basename(file_path), transaction_type="支出")
+    return BankStatement(bank_name="微信", account_name="", account_number="", statement_period="",
+                         transactions=[transaction])
+
+
+def fake_extract_page_lines(self, file_path: str, start: int, stop=None):
+    """分段提取：文件名含 crash 时直接结束工作进程"""
+    if "crash" in os.path.basename(file_path):
+        os._exit(1)
+    return [f"{start}-{stop}"]
+
+
+def fake_parse_lines(self, file_path: str, raw_lines):
+    return fake_parse(self, file_path)
+
+
+def convert(input_dir: str, output_dir: str, names, **kwargs) -> str:
+    """写出空的账单文件并批量转换，返回控制台输出"""
+    os.makedirs(input_dir)
+    for name in names:
+        with open(os.path.join(input_dir, name), "wb") as f:
+            f.write(b"x")
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        SuiConverter().process_directory(input_dir, output_dir, **kwargs)
+    return buffer.getvalue()
+
+
+class SerialConversionTest(unittest.TestCase):
+
+    def test_serial_conversion_skips_cost_estimates(self):
+        names = ["微信a.xlsx", "微信b.xlsx"]
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(WeChatParser, "parse", fake_parse), \
+                mock.patch("main.estimate_cost") as estimate_cost:
+            output_dir = os.path.join(tmp_dir, "output")
+            output = convert(os.path.join(tmp_dir, "input"), output_dir, names, jobs=1)
+            self.assertIn("成功 2, 失败 0", output)
+            self.assertNotIn("预估", output)
+            self.assertFalse(estimate_cost.called)
+            self.assertNotIn(COST_LOG_NAME, os.listdir(output_dir))
+
+
+@unittest.skipUnless(multiprocessing.get_start_method() == "fork", "需要 fork 启动的工作进程继承替换的解析函数")
+class ParallelConversionTest(unittest.TestCase):
+
+    def assert_converted(self, output_dir: str, names):
+        outputs = set(os.listdir(output_dir))
+        for name in names:
+            expected = os.path.splitext(name)[0] + "_随手记.xlsx"
+            self.assertEqual(expected in outputs, "crash" not in name, name)
+        self.assertIn(".sui_manifest.json", outputs)
+
+    def test_worker_crash_only_fails_that_file(self):
+        names = ["微信a.xlsx", "微信b.xlsx", "微信crash.xlsx", "微信c.xlsx", "微信d.xlsx"]
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(WeChatParser, "parse", fake_parse):
+            output_dir = os.path.join(tmp_dir, "output")
+            output = convert(os.path.join(tmp_dir, "input"), output_dir, names, jobs=3)
+            self.assert_converted(output_dir, names)
+            self.assertIn("成功 4, 失败 1", output)
+
+    def test_worker_crash_during_page_extraction(self):
+        names = ["农行a.pdf", "农行crash.pdf", "农行b.pdf"]
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                mock.patch("scheduler.pdf_page_count", return_value=4), \
+                mock.patch.object(ABCParser, "parse", fake_parse), \
+                mock.patch.object(ABCParser, "parse_lines", fake_parse_lines), \
+                mock.patch.object(ABCParser, "extract_page_lines", fake_extract_page_lines):
+            output_dir = os.path.join(tmp_dir, "output")
+            output = convert(os.path.join(tmp_dir, "input"), output_dir, names, jobs=2, split_pages=2)
+            self.assert_converted(output_dir, names)
+            self.assertIn("分 2 段提取", output)
+            self.assertIn("成功 2, 失败 1", output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+转换调度：按页拆分的判断、耗时日志只保留最近的记录
+"""
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from parsers import ABCParser, WeChatParser
+from scheduler import COST_LOG_NAME, CostLog, FileCost, split_ranges
+
+
+class SplitRangesTest(unittest.TestCase):
+
+    def test_splits_only_supported_parsers_over_threshold(self):
+        cost = FileCost("ABCParser", 1024, 45, 5.45)
+        self.assertEqual(split_ranges(ABCParser, cost, 20), [(0, 20), (20, 40), (40, 45)])
+        self.assertIsNone(split_ranges(ABCParser, cost, 45))
+        self.assertIsNone(split_ranges(ABCParser, cost, 0))
+        self.assertIsNone(split_ranges(WeChatParser, cost, 20))
+        self.assertIsNone(split_ranges(None, cost, 20))
+
+
+class CostLogTest(unittest.TestCase):
+
+    def test_keeps_most_recent_records(self):
+        cost = FileCost("ABCParser", 1024, 3, 0.41)
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch("scheduler.MAX_COST_RECORDS", 5):
+            for run in range(3):
+                log = CostLog(tmp_dir)
+                for i in range(3):
+                    log.record(f"{run}-{i}.pdf", cost, 0.5, True)
+                log.save()
+
+            with open(os.path.join(tmp_dir, COST_LOG_NAME), encoding="utf-8") as f:
+                files = [json.loads(line)["file"] for line in f]
+            self.assertEqual(files, ["1-1.pdf", "1-2.pdf", "2-0.pdf", "2-1.pdf", "2-2.pdf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
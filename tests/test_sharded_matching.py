@@ -0,0 +1,59 @@
+"""
+按金额分片的退款对冲与转账识别：各分片串行或由进程池执行，结果都与不分片的串行执行一致
+"""
+import contextlib
+import io
+import multiprocessing
+import unittest
+
+import numpy as np
+
+import merge
+from tests.merge_samples import by_date_and_origin, random_table
+
+SEEDS = range(12)
+
+
+def match(table, shards=None, jobs=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return by_date_and_origin(merge.refunds_and_transfers(table, shards, jobs))
+
+
+def transfer_pairs(table):
+    """转账记录：(来源行 origin, 转出账户, 转入账户, 金额分)"""
+    return [(int(origin), t.account, t.transfer_to_account, t.amount_cents)
+            for origin, t in zip(table.origin, table.to_transactions()) if t.transaction_type == "转账"]
+
+
+class ShardedMatchingTest(unittest.TestCase):
+
+    def assert_same_result(self, expected, actual):
+        self.assertEqual(actual.origin.tolist(), expected.origin.tolist())
+        self.assertEqual(actual.to_transactions(), expected.to_transactions())
+        self.assertEqual(transfer_pairs(actual), transfer_pairs(expected))
+
+    def test_amount_shards_keep_equal_amounts_together(self):
+        cents = np.array([100, 200, 100, 8800, 200, 100], dtype=np.int64)
+        shard_of = merge.amount_shards(cents, 4)
+        self.assertTrue(((shard_of >= 0) & (shard_of < 4)).all())
+        for amount in (100, 200):
+            self.assertEqual(len(set(shard_of[cents == amount].tolist())), 1)
+
+    def test_serial_shards_match_unsharded(self):
+        for seed in SEEDS:
+            table = random_table(300, seed)
+            expected = match(table)
+            for shards in (2, 3, 7):
+                with self.subTest(seed=seed, shards=shards):
+                    self.assert_same_result(expected, match(table, shards, jobs=1))
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "需要 fork 启动方式")
+    def test_parallel_shards_match_unsharded(self):
+        for seed in SEEDS[:4]:
+            table = random_table(300, seed)
+            with self.subTest(seed=seed):
+                self.assert_same_result(match(table), match(table, shards=4, jobs=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+合并结果分卷：按周期与行数上限划分，行数上限须为正整数
+"""
+import argparse
+import unittest
+
+import numpy as np
+
+from models import Transaction
+from split_output import plan_parts, positive_int
+from transaction_table import TransactionTable
+
+
+def make_table(dates):
+    return TransactionTable.from_transactions([
+        Transaction(date=day, category="食品酒水", subcategory="早午晚餐", account="微信", amount_cents=100,
+                    description=f"消费 {i}", transaction_type="支出")
+        for i, day in enumerate(dates)
+    ])
+
+
+class PlanPartsTest(unittest.TestCase):
+
+    def test_month_and_row_limit(self):
+        table = make_table(["2025-01-03", "2025-02-01", "2025-01-09", "2025-01-20", ""])
+        parts = plan_parts(table, "month", 2)
+        self.assertEqual([label for label, _ in parts], ["未知日期", "2025-01_1", "2025-01_2", "2025-02"])
+        self.assertEqual([indices.tolist() for _, indices in parts], [[4], [0, 2], [3], [1]])
+
+    def test_row_limit_only(self):
+        parts = plan_parts(make_table(["2025-01-01"] * 5), max_rows=2)
+        self.assertEqual([label for label, _ in parts], ["part1", "part2", "part3"])
+        self.assertEqual(np.concatenate([indices for _, indices in parts]).tolist(), list(range(5)))
+
+    def test_rejects_non_positive_row_limit(self):
+        table = make_table(["2025-01-01"] * 3)
+        for max_rows in (0, -1):
+            with self.assertRaises(ValueError):
+                plan_parts(table, max_rows=max_rows)
+
+    def test_positive_int_argument(self):
+        self.assertEqual(positive_int("5000"), 5000)
+        for text in ("0", "-3", "abc"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                positive_int(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
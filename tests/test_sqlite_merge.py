@@ -0,0 +1,87 @@
+"""
+SQLite 合并引擎与内存合并的差分测试：同样的随机输入经过两个引擎，退款对冲删除的行、转账配对和最终结果
+（含行来源）都一致；--db 指定的已有文件不会被覆盖
+"""
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+
+import merge
+import sqlite_merge
+from tests.merge_samples import in_memory_merge, random_table
+
+SEEDS = range(40)
+
+
+def sizes():
+    """各随机种子的记录数（1~400 条）"""
+    return [(seed, random.Random(seed).randint(1, 400)) for seed in SEEDS]
+
+
+def transfer_pairs(table):
+    """转账记录：(来源行 origin, 转出账户, 转入账户, 金额分)，按 origin 排序"""
+    return sorted((int(origin), t.account, t.transfer_to_account, t.amount_cents)
+                  for origin, t in zip(table.origin, table.to_transactions()) if t.transaction_type == "转账")
+
+
+class SqliteDifferentialTest(unittest.TestCase):
+
+    def test_refund_reconciliation_removes_same_rows(self):
+        for seed, count in sizes():
+            table = random_table(count, seed)
+            with self.subTest(seed=seed), contextlib.redirect_stdout(io.StringIO()):
+                expected = merge.reconcile_refunds(table).origin.tolist()
+                with sqlite_merge.database() as conn:
+                    sqlite_merge.load_transactions(conn, table)
+                    conn.executescript(sqlite_merge.TX_INDEXES)
+                    sqlite_merge.reconcile_refunds(conn)
+                    kept = [row for row, in conn.execute("SELECT row FROM tx WHERE keep ORDER BY row")]
+                self.assertEqual(table.origin[kept].tolist(), expected)
+
+    def test_transfers_pair_same_rows(self):
+        for seed, count in sizes():
+            with self.subTest(seed=seed), contextlib.redirect_stdout(io.StringIO()):
+                expected = merge.refunds_and_transfers(random_table(count, seed))
+                with sqlite_merge.database() as conn:
+                    actual = sqlite_merge.refunds_and_transfers(conn, random_table(count, seed))
+                self.assertEqual(actual.origin.tolist(), expected.origin.tolist())
+                self.assertEqual(transfer_pairs(actual), transfer_pairs(expected))
+
+    def test_merge_results_identical(self):
+        for seed, count in sizes():
+            # 亲属卡处理会修改输入表，两个引擎各用一份
+            with self.subTest(seed=seed), contextlib.redirect_stdout(io.StringIO()):
+                expected = in_memory_merge(random_table(count, seed))
+                actual = sqlite_merge.sqlite_merge(random_table(count, seed))
+                self.assertEqual(actual.origin.tolist(), expected.origin.tolist())
+                self.assertEqual(actual.to_transactions(), expected.to_transactions())
+
+
+class DatabasePathTest(unittest.TestCase):
+
+    def test_existing_db_path_is_left_untouched(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "ledger.sqlite")
+            with open(path, "wb") as f:
+                f.write(b"keep me")
+            with self.assertRaises(FileExistsError):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    sqlite_merge.sqlite_merge(random_table(10, 0), path)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"keep me")
+
+    def test_new_db_path_is_kept(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "merge.sqlite")
+            with contextlib.redirect_stdout(io.StringIO()):
+                sqlite_merge.sqlite_merge(random_table(50, 1), path)
+            with contextlib.closing(sqlite3.connect(path)) as conn:
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM tx").fetchone()[0], 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+滑动窗口合并（window_merge.py）与内存合并（merge.py）：匹配都落在窗口内且没有多条候选时结果一致，
+模块文档中列出的各项区别分别固定下来
+"""
+import contextlib
+import io
+import random
+import unittest
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import groupby
+from typing import List
+
+import numpy as np
+
+from models import Transaction
+from tests.merge_samples import in_memory_merge
+from transaction_table import TransactionTable
+from window_merge import REFUND_WINDOW, TRANSFER_WINDOW, WindowRow, data_accounts, window_stages
+
+BANK_ACCOUNTS = ["农业银行", "宁波银行", "建行储蓄卡", "招商信用卡", "中信信用卡", "微信", "支付宝"]
+
+
+def tx(day: date, account: str, cents: int, tx_type: str = "支出", category: str = "食品酒水",
+       subcategory: str = "早午晚餐", description: str = "", merchant: str = "") -> Transaction:
+    return Transaction(date=day.isoformat() if day else "", category=category, subcategory=subcategory,
+                       account=account, amount_cents=cents, description=description, transaction_type=tx_type,
+                       merchant=merchant)
+
+
+def refund(day: date, account: str, cents: int, merchant: str) -> Transaction:
+    return tx(day, account, cents, "收入", "其他收入", "退款", f"{merchant}退款", merchant)
+
+
+def marker(day: date, account: str, cents: int) -> Transaction:
+    return tx(day, account, cents, "__MARKER__", "__FAMILY_CARD__", "妈妈", "亲属卡交易")
+
+
+def table_of(transactions: List[Transaction]) -> TransactionTable:
+    """按给定顺序组成一个输入文件，origin 为行号"""
+    table = TransactionTable.from_transactions(transactions)
+    table.origin = np.arange(len(table), dtype=np.int64)
+    return table
+
+
+def memory_result(table: TransactionTable) -> List[Transaction]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return in_memory_merge(table).to_transactions()
+
+
+def window_result(table: TransactionTable) -> List[Transaction]:
+    """按 (日期, 输入行号) 排序后按天分组，经过三个窗口阶段（与 window_merge 相同，只是不经临时分块）"""
+    rows = sorted((WindowRow(t, date_ord, origin) for t, date_ord, origin in
+                   zip(table.iter_transactions(), table.date_ord.tolist(), table.origin.tolist())),
+                  key=lambda row: (row.date_ord, row.origin))
+    days = ((date_ord, list(group)) for date_ord, group in groupby(rows, key=lambda row: row.date_ord))
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(window_stages(days, data_accounts(table), defaultdict(int)))
+
+
+def clustered_transactions(seed: int, clusters: int = 60) -> List[Transaction]:
+    """
+    按组生成的随机交易：每组金额各不相同（每笔退款、还款、亲属卡标记只有一条候选），
+    退款在消费后 30 天内、还款收入在转账支出前后 3 天内，文件顺序随机打乱
+    """
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    # 各银行账户都有普通消费，转账识别删除收入后"银行账户有数据"不变
+    transactions = [tx(start, account, 1 + i) for i, account in enumerate(BANK_ACCOUNTS)]
+    transactions.append(tx(None, "农业银行", 99))
+    for cluster in range(clusters):
+        cents = 1000 + cluster * 10
+        day = start + timedelta(days=rng.randint(0, 80))
+        later = day + timedelta(days=rng.randint(0, REFUND_WINDOW))
+        nearby = day + timedelta(days=rng.randint(-TRANSFER_WINDOW, TRANSFER_WINDOW))
+        kind = rng.randrange(7)
+        if kind == 0:    # 精确退款
+            merchant = rng.choice(["盒马", "美团"])
+            transactions += [tx(day, rng.choice(BANK_ACCOUNTS), cents, merchant=merchant),
+                             refund(later, rng.choice(BANK_ACCOUNTS), cents, merchant)]
+        elif kind == 1:  # 模糊退款（人名/脱敏商户）
+            transactions += [tx(day, "招商信用卡", cents, merchant="肯德基"),
+                             refund(later, "招商信用卡", cents, rng.choice(["张三", "天猫**店"]))]
+        elif kind == 2:  # 有明确目标的转账
+            transactions += [tx(day, "建行储蓄卡", cents, "支出", "其他杂项", "其他支出", "中信 还款"),
+                             tx(nearby, "中信信用卡", cents, "收入", "__REPAYMENT__", "还款", "还款")]
+        elif kind == 3:  # 通过金额确定目标的转账
+            transactions += [tx(day, "农业银行", cents, "支出", "其他杂项", "其他支出", "跨行还款"),
+                             tx(nearby, "招商信用卡", cents, "收入", "__REPAYMENT__", "还款", "还款")]
+        elif kind == 4:  # 亲属卡匹配
+            transactions += [marker(day, rng.choice(["__ANY_BANK__", "招商信用卡"]), cents),
+                             tx(day, "招商信用卡", cents)]
+        elif kind == 5:  # 亲属卡未匹配：银行有数据删除、无数据保留
+            transactions.append(marker(day, rng.choice(["农业银行", "光大银行"]), cents))
+        else:
+            transactions.append(tx(day, rng.choice(BANK_ACCOUNTS), cents, merchant="美团"))
+    rng.shuffle(transactions)
+    return transactions
+
+
+class WindowMergeEquivalenceTest(unittest.TestCase):
+
+    def test_matches_in_memory_merge_inside_windows(self):
+        for seed in range(10):
+            table = table_of(clustered_transactions(seed))
+            with self.subTest(seed=seed):
+                expected = memory_result(table)
+                self.assertLess(len(expected), len(table))
+                self.assertEqual(window_result(table), expected)
+
+
+class WindowMergeDifferenceTest(unittest.TestCase):
+
+    def test_exact_refund_looks_back_only_refund_window(self):
+        expense = tx(date(2025, 1, 1), "招商信用卡", 500, merchant="盒马")
+        late_refund = refund(date(2025, 1, 1) + timedelta(days=REFUND_WINDOW + 1), "招商信用卡", 500, "盒马")
+        table = table_of([expense, late_refund])
+        # 内存合并的精确匹配不限日期，窗口合并只与此前 30 天内的消费对冲
+        self.assertEqual(memory_result(table), [])
+        self.assertEqual(window_result(table), [expense, late_refund])
+
+        early_refund = refund(date(2025, 1, 1) - timedelta(days=1), "招商信用卡", 500, "盒马")
+        table = table_of([expense, early_refund])
+        self.assertEqual(memory_result(table), [])
+        self.assertEqual(window_result(table), [early_refund, expense])
+
+    def test_ties_take_earliest_in_stream(self):
+        later = tx(date(2025, 1, 10), "招商信用卡", 500, merchant="盒马")
+        earlier = tx(date(2025, 1, 5), "招商信用卡", 500, merchant="盒马")
+        table = table_of([later, earlier, refund(date(2025, 1, 12), "招商信用卡", 500, "盒马")])
+        # 内存合并按文件顺序取第一条（1 月 10 日），窗口合并取交易流中最早的一条（1 月 5 日）
+        self.assertEqual(memory_result(table), [earlier])
+        self.assertEqual(window_result(table), [later])
+
+    def test_accounts_with_data_come_from_inputs(self):
+        day = date(2025, 1, 5)
+        repayment = tx(day, "农业银行", 300, "支出", "其他杂项", "其他支出", "跨行还款")
+        income = tx(day, "招商信用卡", 300, "收入", "__REPAYMENT__", "还款", "还款")
+        unmatched = marker(date(2025, 1, 20), "招商信用卡", 999)
+        table = table_of([repayment, income, unmatched])
+        memory, window = memory_result(table), window_result(table)
+        self.assertEqual([t.transaction_type for t in memory], ["转账", "支出"])
+        self.assertEqual([t.transaction_type for t in window], ["转账"])
+        # 招商信用卡 只有被转账识别删除的还款收入：内存合并视为无数据而保留标记，窗口合并按输入视为有数据而删除
+        self.assertEqual((memory[1].category, memory[1].subcategory), ("其他杂项", "妈妈支出"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+输出写入器：generate 逐块写出流式账单，结果与整表写出相同
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from models import StreamingStatement, Transaction
+from transaction_table import TransactionTable
+from writers import CSVWriter, JSONLinesWriter, TSVWriter
+
+TYPES = ("支出", "收入", "转账")
+
+
+def make_transactions(count: int):
+    return [Transaction(date=f"2025-01-{i % 28 + 1:02d}", category="食品酒水", subcategory="早午晚餐",
+                        account="微信", amount_cents=100 + i, description=f"消费 {i}", merchant=f"商户{i % 3}",
+                        transaction_type=TYPES[i % 3], transfer_to_account="支付宝" if i % 3 == 2 else None)
+            for i in range(count)]
+
+
+def read_outputs(writer, output_path: str) -> dict:
+    result = {}
+    for path in writer.output_paths(output_path):
+        with open(path, "rb") as f:
+            result[os.path.basename(path)] = f.read()
+    return result
+
+
+class GenerateTest(unittest.TestCase):
+
+    def test_streaming_statement_is_written_in_chunks(self):
+        transactions = make_transactions(11)
+        for writer_class in (CSVWriter, TSVWriter, JSONLinesWriter):
+            with self.subTest(writer=writer_class.FORMAT), tempfile.TemporaryDirectory() as tmp_dir:
+                produced = []
+
+                def source():
+                    for transaction in transactions:
+                        produced.append(transaction)
+                        yield transaction
+
+                writer = writer_class()
+                write_chunks = writer.write_chunks
+                chunk_log = []
+
+                def spy(chunks, output_path):
+                    def watched():
+                        for chunk in chunks:
+                            # 交给写入器时只读取了本块及之前的记录
+                            chunk_log.append((len(chunk), len(produced)))
+                            yield chunk
+                    return write_chunks(watched(), output_path)
+
+                statement = StreamingStatement(bank_name="微信", account_name="", account_number="",
+                                               statement_period="", transactions=source())
+                expected_path = os.path.join(tmp_dir, "expected" + writer.EXTENSION)
+                actual_path = os.path.join(tmp_dir, "actual" + writer.EXTENSION)
+                with mock.patch("base_writer.GENERATE_CHUNK_ROWS", 4), \
+                        mock.patch.object(writer, "write_chunks", spy), mock.patch("sys.stdout"):
+                    writer.generate(statement, actual_path)
+                    writer_class().write_table(TransactionTable.from_transactions(transactions), expected_path)
+
+                self.assertEqual(chunk_log, [(4, 4), (4, 8), (3, 11)])
+                self.assertEqual(statement.get_transaction_count(), 11)
+                expected = read_outputs(writer, expected_path)
+                actual = read_outputs(writer, actual_path)
+                self.assertEqual(list(expected.values()), list(actual.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()